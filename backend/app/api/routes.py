@@ -3,15 +3,17 @@ API Routes for PrivacyLens Backend
 """
 
 import os
+import hmac
 import time
+import asyncio
 import logging
-from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Form
+from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Form, Header
 from fastapi.responses import FileResponse
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from ..core.config import settings
 from ..services.pii_processor import PIIProcessorService
-from ..utils.helpers import generate_unique_filename, is_pdf_file, get_file_size
+from ..utils.helpers import generate_unique_filename, is_pdf_file, get_file_size, write_file_async
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,88 @@ async def health_check() -> Dict[str, str]:
         "version": "1.0.0"
     }
 
+@router.get("/llm/metrics")
+async def llm_metrics() -> Dict[str, Any]:
+    """LLM client metrics: circuit breaker state and transitions, job budget, verdict store"""
+    return pii_processor.llm_agent.get_metrics()
+
+
+@router.get("/patterns/report")
+async def pattern_report(reset: bool = False) -> Dict[str, Any]:
+    """Per-pattern regex timing and match counts, with pathological patterns flagged"""
+    executor = pii_processor.pii_detection.pattern_executor
+    report = executor.get_report()
+    if reset:
+        executor.reset()
+    return report
+
+
+def _hash_index(admin_key: Optional[str]):
+    """Known-image index for an admin request: 404 if the admin API or the index is off, 401 on a wrong key"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Admin API is disabled")
+    if not admin_key or not hmac.compare_digest(admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+    hash_index = pii_processor.image_detection.hash_index
+    if hash_index is None:
+        raise HTTPException(status_code=404, detail="Known-image index is disabled")
+    return hash_index
+
+
+@router.get("/admin/known-images")
+async def list_known_images(x_admin_key: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    """Images marked non-PII or PII, with index lookup counters"""
+    hash_index = _hash_index(x_admin_key)
+    return {"images": hash_index.list_entries(), **hash_index.get_stats()}
+
+
+@router.post("/admin/known-images")
+async def add_known_images(
+    file: UploadFile = File(...),
+    verdict: str = Form(...),
+    image_type: Optional[str] = Form(default=None),
+    label: str = Form(default=""),
+    page: Optional[int] = Form(default=None),
+    x_admin_key: Optional[str] = Header(default=None)
+) -> Dict[str, Any]:
+    """
+    Mark an image, or every image embedded in a PDF, as non-PII or PII
+    
+    Args:
+        file: Image file (JPEG, PNG, ...) or PDF
+        verdict: "non_pii" (never redacted) or "pii" (always redacted)
+        image_type: Type reported for PII images, e.g. "photo" or "signature"
+        label: Operator's note, e.g. "IPU seal"
+        page: For a PDF, only this page's images (1-based)
+        x_admin_key: ``X-Admin-Key`` header, must equal ADMIN_API_KEY
+        
+    Returns:
+        The stored entries
+    """
+    hash_index = _hash_index(x_admin_key)
+    content = await file.read()
+    try:
+        if is_pdf_file(file.filename):
+            page_num = page - 1 if page is not None else None
+            entries = await asyncio.to_thread(
+                hash_index.add_document_images, content, verdict, image_type, label, page_num)
+        else:
+            entries = [await asyncio.to_thread(hash_index.add, content, verdict, image_type, label)]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not entries:
+        raise HTTPException(status_code=400, detail="No decodable images found")
+    return {"added": [entry._asdict() for entry in entries], "entries": len(hash_index)}
+
+
+@router.delete("/admin/known-images/{dhash}")
+async def remove_known_image(dhash: str, x_admin_key: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    """Forget a known image by its dHash"""
+    hash_index = _hash_index(x_admin_key)
+    if not await asyncio.to_thread(hash_index.remove, dhash):
+        raise HTTPException(status_code=404, detail="Known image not found")
+    return {"removed": dhash, "entries": len(hash_index)}
+
 @router.post("/upload")
 async def upload_document(
     background_tasks: BackgroundTasks, 
@@ -63,8 +147,7 @@ async def upload_document(
     
     # Save uploaded file
     try:
-        with open(input_path, "wb") as buffer:
-            buffer.write(content)
+        await write_file_async(input_path, content)
         logger.info(f"Saved uploaded file to {input_path}")
     except Exception as e:
         logger.error(f"Failed to save uploaded file: {e}")
@@ -118,8 +201,11 @@ async def process_document_background(job_id: str, input_path: str, output_path:
         logger.info(f"Starting background processing for job {job_id}")
         logger.info(f"Using redaction prompt: '{redaction_prompt}'")
         
-        # Process the document with redaction prompt
-        results = pii_processor.process_document(input_path, output_path, job_id, redaction_prompt)
+        # Process the document with redaction prompt (async: LLM waits do not hold the event loop)
+        if settings.ASYNC_PROCESSING:
+            results = await pii_processor.process_document_async(input_path, output_path, job_id, redaction_prompt)
+        else:
+            results = pii_processor.process_document(input_path, output_path, job_id, redaction_prompt)
         
         if not results["success"]:
             logger.error(f"Processing failed for job {job_id}: {results.get('error', 'Unknown error')}")
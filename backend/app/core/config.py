@@ -3,7 +3,7 @@ Core configuration settings for PrivacyLens Backend
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List
 
 class Settings:
     """Application settings"""
@@ -18,6 +18,7 @@ class Settings:
     API_TITLE: str = "PrivacyLens API"
     API_DESCRIPTION: str = "Advanced PII Detection and Redaction"
     API_VERSION: str = "1.0.0"
+    ADMIN_API_KEY: Optional[str] = os.getenv("ADMIN_API_KEY") or None  # X-Admin-Key for /api/admin (unset = admin API off)
     
     # CORS Configuration
     ALLOWED_ORIGINS: list = ["*"]
@@ -27,6 +28,7 @@ class Settings:
     # File Storage
     UPLOAD_DIR: str = "uploads"
     OUTPUT_DIR: str = "outputs"
+    DATA_DIR: str = "data"  # Local state: verdict logs, trained models
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     
     # Tesseract OCR Configuration
@@ -34,18 +36,121 @@ class Settings:
     
     # GROQ API Configuration
     GROQ_API_KEY: str = "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"
-    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1/chat/completions"
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1/chat/completions")
     GROQ_MODEL: str = "llama-3.1-8b-instant"
     GROQ_TIMEOUT: int = 5
     
+    # LLM Call Policies
+    GROQ_BREAKER_FAILURE_THRESHOLD: int = 3  # consecutive failures before the breaker opens
+    GROQ_BREAKER_RESET_TIMEOUT: float = 30.0  # seconds open before a half-open trial call
+    GROQ_JOB_TIME_BUDGET: Optional[float] = 60.0  # total seconds a job may wait on the LLM (None = unlimited)
+    GROQ_MAX_RETRIES: int = 0  # retries per call, with full-jitter exponential backoff
+    GROQ_RETRY_BACKOFF: float = 0.2
+    GROQ_RETRY_BACKOFF_MAX: float = 2.0
+    GROQ_HEDGE_DELAY: Optional[float] = None  # seconds before racing a duplicate request (None = no hedging)
+    
+    # Detectors (run per page by the detector registry)
+    DETECTORS_ENABLED: List[str] = ["regex", "image"]  # also available: checksum, dictionary, ner, ocr_region
+    DETECTOR_WORKERS: int = 4  # threads for detectors that do not touch the PDF page
+    DETECTOR_DICTIONARY_PATH: str = "data/pii_dictionary.json"  # category -> known terms
+    NER_MODEL: str = "en_core_web_sm"
+    OCR_REGION_MIN_AREA: float = 2500.0  # pt^2; smaller image regions are not OCR'd
+
+    # Page Pipeline (staged: extract -> ocr -> detect -> validate -> render, pages overlap)
+    PIPELINE_MODE: str = os.getenv("PIPELINE_MODE", "serial")  # serial (all detection, then redaction) | staged (opt-in)
+    PIPELINE_QUEUE_SIZE: int = 2  # pages buffered between consecutive stages
+    PIPELINE_OCR_WORKERS: int = 2  # concurrent Tesseract runs
+    PIPELINE_VALIDATE_WORKERS: int = 8  # pages waiting on the LLM at once
+    PIPELINE_RENDER_WORKERS: int = 2  # redaction drawing and PNG encoding
+    RENDER_PROCESSES: int = int(os.getenv("RENDER_PROCESSES", "0"))  # worker processes rasterizing redacted pages (0 = in-process)
+    
+    # Async Processing (API jobs await the LLM on the event loop; no thread per job; opt-in)
+    ASYNC_PROCESSING: bool = os.getenv("ASYNC_PROCESSING", "false").lower() == "true"
+    ASYNC_EXECUTOR_WORKERS: int = 8  # threads for MuPDF, Tesseract and file I/O, shared by all jobs
+    ASYNC_PAGES_IN_FLIGHT: int = 4  # pages per job validating or rendering at once
+    LLM_ASYNC_MAX_CONNECTIONS: int = 100  # pooled HTTP connections for awaited LLM calls
+    
+    # Pattern Execution (per pattern, per page)
+    PATTERN_TIME_BUDGET_MS: float = 50.0  # per search (hard timeout ends the page for that pattern) and reporting threshold per page
+    PATTERN_SLOW_MS: float = 10.0  # single-page time at which a pattern is flagged as slow
+    PATTERN_MAX_MATCH_CHARS: int = 50  # longer matches are counted in the pattern report (validation rejects them)
+
+    # Prompt Parsing
+    PROMPT_CACHE_SIZE: int = 256  # distinct normalized prompts kept compiled
+
+    # LLM Transport (live | record | replay) for reproducible offline benchmarks
+    LLM_TRANSPORT_MODE: str = os.getenv("LLM_TRANSPORT_MODE", "live")
+    LLM_TRANSPORT_PATH: str = os.getenv("LLM_TRANSPORT_PATH", "data/llm_recording.jsonl")
+    LLM_REPLAY_LATENCY: str = os.getenv("LLM_REPLAY_LATENCY", "recorded")  # none | recorded | fixed:s | uniform:a,b | normal:mu,sd | lognormal:mu,sigma
+
+    # LLM Prompt Context
+    LLM_CONTEXT_WINDOW_CHARS: int = 120  # characters of page text on each side of a candidate
+    LLM_CONTEXT_TOKEN_BUDGET: int = 48  # estimated tokens of context sent per candidate
+
+    # LLM Gating Configuration (local score decides outside the uncertain band)
+    LLM_GATE_ENABLED: bool = True
+    LLM_GATE_LOW_THRESHOLD: float = 0.4   # score <= low: keep without asking the LLM
+    LLM_GATE_HIGH_THRESHOLD: float = 0.75  # score >= high: redact without asking the LLM
+    LLM_GATE_LABEL_WINDOW: int = 3  # words to look back for a field label
+
+    # Distilled Local Classifier Configuration
+    LLM_VERDICT_LOG_ENABLED: bool = True
+    LLM_VERDICT_LOG_PATH: str = os.path.join("data", "llm_verdicts.jsonl")
+    LOCAL_CLASSIFIER_ENABLED: bool = True
+    LOCAL_CLASSIFIER_PATH: str = os.path.join("data", "verdict_classifier.npz")
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.9  # below this confidence, fall back to the LLM
+
+    # Candidate Clustering Configuration (share verdicts within a job)
+    LLM_CLUSTER_ENABLED: bool = True
+    LLM_CLUSTER_SAMPLE_SIZE: int = 2  # agreeing LLM verdicts needed before sharing
+    LLM_CLUSTER_MAX_SIZE: int = 25  # shared verdicts before the cluster is re-sampled
+
+    # Persistent Verdict Store Configuration (SQLite, WAL mode)
+    VERDICT_STORE_ENABLED: bool = True
+    VERDICT_STORE_PATH: str = os.path.join("data", "llm_verdicts.sqlite3")
+    VERDICT_STORE_TTL_SECONDS: int = 30 * 24 * 3600  # 30 days
+    VERDICT_STORE_MAX_ENTRIES: int = 50000
+
+    # Known Image Index (perceptual hashes of images marked non-PII or PII, SQLite)
+    IMAGE_HASH_INDEX_ENABLED: bool = True
+    IMAGE_HASH_INDEX_PATH: str = os.path.join("data", "image_hashes.sqlite3")
+    IMAGE_HASH_MAX_DISTANCE: int = 7  # dHash plus aHash bits that may differ from a known image (at most 7)
+
     # Processing Configuration
     PDF_SCALE_FACTOR: float = 2.0
+    # page: rasterize every redacted page | regions: keep pages vector, rasterize only redacted image areas
+    REDACTION_RENDER_MODE: str = os.getenv("REDACTION_RENDER_MODE", "page")
+    PAGE_ENCODING: str = os.getenv("PAGE_ENCODING", "auto")  # rasterized pages: auto (JPEG if photo-heavy) | flate | jpeg
+    PAGE_JPEG_MIN_PHOTO_FRACTION: float = 0.35  # share of continuous-tone pixels that makes a page photo-heavy
+    PAGE_JPEG_QUALITY: int = 85
+    PAGE_FLATE_LEVEL: int = 3  # zlib level: 1 fastest, 9 smallest
+    RASTER_CACHE_MB: int = int(os.getenv("RASTER_CACHE_MB", "256"))  # per-job rendered pages shared by OCR and redaction (0 = off)
+    # off | flag (report pages still showing redacted values) | fail (fail the job, delete the output)
+    LEAK_CHECK_MODE: str = os.getenv("LEAK_CHECK_MODE", "flag")
+    LEAK_CHECK_MIN_CHARS: int = 4  # shorter values would match ordinary text
+    RENDER_MAX_PIXELS: int = int(os.getenv("RENDER_MAX_PIXELS", "16000000"))  # per raster: OCR scales down, redaction tiles above it (0 = no limit)
+    PDF_SAVE_PROFILE: str = os.getenv("PDF_SAVE_PROFILE", "balanced")  # fast | balanced | compact | web (linearized)
     OCR_CONFIDENCE_THRESHOLD: int = 30
     
+    # Image Redaction (photos and signatures; text is always filled black)
+    IMAGE_REDACTION_MODE: str = os.getenv("IMAGE_REDACTION_MODE", "gaussian")  # gaussian | box | pixelate | fill
+    IMAGE_REDACTION_BLUR_SIGMA: float = 10.0  # gaussian, in rendered pixels
+    IMAGE_REDACTION_BOX_KERNEL: int = 31  # box blur kernel size, in rendered pixels
+    IMAGE_REDACTION_PIXEL_BLOCK: int = 16  # pixelate block size, in rendered pixels
+
+    # Face Verification (OpenCV cascade check of embedded photos)
+    FACE_VERIFICATION: bool = os.getenv("FACE_VERIFICATION", "false").lower() == "true"
+    FACE_CASCADE: str = os.getenv("FACE_CASCADE", "haarcascade_frontalface_default.xml")  # bundled name or file path
+    FACE_VERIFY_MAX_SIDE: int = 320  # images are checked at most this many pixels a side
+    FACE_VERIFY_MIN_AREA: float = 150 * 150  # pt^2; larger unclassified images are checked too
+    FACE_VERIFY_WORKERS: int = 2
+    FACE_VERIFY_TIMEOUT_S: float = 5.0  # per page; unchecked photos are kept, unchecked large images skipped
+    
     def __init__(self):
         # Create necessary directories
         os.makedirs(self.UPLOAD_DIR, exist_ok=True)
         os.makedirs(self.OUTPUT_DIR, exist_ok=True)
+        os.makedirs(self.DATA_DIR, exist_ok=True)
         
         # Setup Tesseract path if on Windows
         if os.name == 'nt' and os.path.exists(self.TESSERACT_PATH):
@@ -15,18 +15,20 @@ class JobStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
-@dataclass
+@dataclass(slots=True)
 class DetectionResult:
-    """PII detection result"""
+    """PII detection result (slotted: no per-instance dict on large documents)"""
     text: str
     category: str
-    coordinates: List[float]
-    confidence: float
-    method: str
+    coordinates: Optional[List[float]] = None  # [x0, y0, x1, y1] in page points, once located
+    confidence: float = 0.9
+    method: str = "PATTERN_MATCH"
     page_num: int = 0
     pattern_index: Optional[int] = None
     image_type: Optional[str] = None
     dimensions: Optional[str] = None
+    offset: Optional[int] = None  # character offset of the match in the page text
+    detector: Optional[str] = None  # name of the detector that produced it
 
 @dataclass
 class ProcessingStats:
@@ -44,6 +46,24 @@ class ProcessingStats:
     overlap_preventions: int = 0
     smart_merges: int = 0
     rejected_oversized: int = 0
+    llm_calls_made: int = 0
+    llm_calls_avoided: int = 0
+    llm_gate_redacted: int = 0
+    llm_gate_kept: int = 0
+    llm_local_answers: int = 0
+    llm_cluster_shared: int = 0
+    llm_store_hits: int = 0
+    llm_failures: int = 0
+    llm_retries: int = 0
+    llm_hedges: int = 0
+    llm_breaker_rejections: int = 0
+    llm_budget_exhausted: int = 0
+    raster_cache_hits: int = 0
+    raster_cache_misses: int = 0
+    raster_cache_evictions: int = 0
+    rasters_downscaled: int = 0
+    pages_tiled: int = 0
+    peak_page_raster_bytes: int = 0
 
 @dataclass
 class ProcessingJob:
@@ -0,0 +1,184 @@
+"""
+Page models shared by detection, validation and redaction stages
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, NamedTuple, Tuple, Optional
+
+import numpy as np
+
+
+class WordBox(NamedTuple):
+    """
+    One word with its box, as produced by ``page.get_text("words")``
+    
+    A tuple subclass, so index/slice access (``word[4]``, ``word[:4]``) keeps working.
+    """
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    text: str
+    block_no: int = 0
+    line_no: int = 0
+    word_no: int = 0
+
+
+def to_word_boxes(words) -> List[WordBox]:
+    """Wrap raw PyMuPDF word tuples (or OCR word lists) as WordBox records"""
+    return [WordBox(*word[:8]) for word in words]
+
+
+# One row per word; ``token`` is the word's index in the page's word list
+WORD_DTYPE = np.dtype([
+    ('x0', np.float64), ('y0', np.float64), ('x1', np.float64), ('y1', np.float64),
+    ('line', np.int32), ('block', np.int32), ('token', np.int32)
+])
+
+
+def to_word_array(words) -> np.ndarray:
+    """
+    Pack a page's words into a structured array (WORD_DTYPE) for vectorized box math
+
+    Args:
+        words: WordBox records, raw PyMuPDF word tuples or OCR word lists
+
+    Returns:
+        Structured array with one row per word, in the same order as ``words``
+    """
+    array = np.zeros(len(words), dtype=WORD_DTYPE)
+    if len(words):
+        array['x0'], array['y0'], array['x1'], array['y1'] = np.array(
+            [word[:4] for word in words], dtype=np.float64).T
+        array['block'] = [word[5] if len(word) > 5 else 0 for word in words]
+        array['line'] = [word[6] if len(word) > 6 else 0 for word in words]
+        array['token'] = np.arange(len(words))
+    return array
+
+
+def box_matrix(array: np.ndarray) -> np.ndarray:
+    """(N, 4) float view of x0, y0, x1, y1 from a WORD_DTYPE array"""
+    return np.column_stack((array['x0'], array['y0'], array['x1'], array['y1']))
+
+
+@dataclass
+class PageContext:
+    """Per-page text context built once and shared by every candidate on the page"""
+    page_num: int
+    full_text: str
+    words: List = field(default_factory=list)
+    # Normalized word -> indices into ``words`` (reading order)
+    word_positions: Dict[str, List[int]] = field(default_factory=dict)
+    # Normalized word -> (font, flags, color) of its first span on the page
+    span_styles: Dict[str, Tuple[str, int, int]] = field(default_factory=dict)
+    dominant_font: Optional[str] = None
+    dominant_color: Optional[int] = None
+    # Read-only document word counts, shared by the job's page contexts
+    repeat_counts: Optional[Mapping[str, int]] = None
+    # Casefolded copy of full_text, computed once per page
+    text_casefold: str = field(init=False, repr=False)
+    # Casefolded candidate text -> offsets in full_text (filled lazily)
+    occurrence_index: Dict[str, List[int]] = field(init=False, repr=False, default_factory=dict)
+
+    def __post_init__(self):
+        folded = self.full_text.casefold()
+        if len(folded) != len(self.full_text):
+            # Offsets must line up with full_text; casefold expands a few characters (e.g. 'ß')
+            folded = self.full_text.lower()
+        self.text_casefold = folded
+
+    def occurrences(self, text: str) -> List[int]:
+        """
+        Offsets of every case-insensitive occurrence of text on the page
+
+        Args:
+            text: Candidate text
+
+        Returns:
+            Sorted list of offsets into ``full_text``
+        """
+        needle = text.casefold()
+        offsets = self.occurrence_index.get(needle)
+        if offsets is None:
+            offsets = []
+            if needle:
+                position = self.text_casefold.find(needle)
+                while position != -1:
+                    offsets.append(position)
+                    position = self.text_casefold.find(needle, position + 1)
+            self.occurrence_index[needle] = offsets
+        return offsets
+
+    def context_window(self, text: str, offset: Optional[int] = None, window_size: int = 100,
+                       token_budget: Optional[int] = None) -> str:
+        """
+        Context around a candidate, read from its actual offset on the page
+
+        Args:
+            text: Candidate text
+            offset: Offset of this candidate in ``full_text``; first occurrence if None
+            window_size: Characters of context on each side
+            token_budget: Optional cap on the (estimated) tokens of the returned window
+
+        Returns:
+            Whitespace-collapsed context string
+        """
+        if offset is None:
+            offsets = self.occurrences(text)
+            if not offsets:
+                return ' '.join(self.full_text[:window_size].split())
+            offset = offsets[0]
+
+        start = max(0, offset - window_size)
+        end = min(len(self.full_text), offset + len(text) + window_size)
+        before = self.full_text[start:offset].split()
+        target = self.full_text[offset:offset + len(text)]
+        after = self.full_text[offset + len(text):end].split()
+
+        if token_budget is not None:
+            # Grow outwards from the candidate, nearest words first, until the budget is spent
+            spent = _estimate_tokens(target)
+            kept_before, kept_after = [], []
+            while before or after:
+                grew = False
+                for side, kept in ((before, kept_before), (after, kept_after)):
+                    if not side:
+                        continue
+                    word = side.pop() if side is before else side.pop(0)
+                    cost = _estimate_tokens(word)
+                    if spent + cost > token_budget:
+                        side.clear()
+                        continue
+                    spent += cost
+                    kept.append(word)
+                    grew = True
+                if not grew:
+                    break
+            before = list(reversed(kept_before))
+            after = kept_after
+
+        return ' '.join(before + [target.strip()] + after)
+
+
+def _estimate_tokens(word: str) -> int:
+    """Rough BPE token estimate: about four characters per token"""
+    return len(word) // 4 + 1
+
+
+@dataclass
+class PageWork:
+    """One page travelling through the staged processing pipeline"""
+    page_num: int
+    page: Any = None  # PyMuPDF page; only touched under the MuPDF lock
+    page_rect: Any = None
+    words: List = field(default_factory=list)
+    full_text: str = ""
+    text_dict: Optional[Dict] = None
+    extraction_stats: Dict[str, Any] = field(default_factory=dict)
+    ocr_image: Any = None  # Rendered page awaiting OCR (no text layer)
+    ocr_scale: float = None  # Scale ocr_image was rendered at
+    page_input: Any = None  # Detector input shared by the detect and validate stages
+    candidates: Dict[str, List] = field(default_factory=dict)
+    detections: List = field(default_factory=list)
+    rendered: Any = None  # Output of RedactionEngineService.render_page; None copies the page unchanged
+    redactions: int = 0
@@ -0,0 +1,165 @@
+"""
+Candidate Cluster Service for sharing LLM verdicts across same-shaped candidates
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Any
+
+from ..core.config import settings
+from ..models.page import PageContext
+from .candidate_scorer import token_shape
+from .job_context import JobLocal
+
+logger = logging.getLogger(__name__)
+
+ClusterKey = Tuple[str, str, str]
+
+
+@dataclass
+class CandidateCluster:
+    """Candidates of one (category, token shape, preceding label) within a job"""
+    key: ClusterKey
+    sample_size: int
+    sample_verdicts: List[bool] = field(default_factory=list)
+    members: int = 0
+    validated: int = 0
+    shared: int = 0
+    generation_shared: int = 0
+    mixed: bool = False
+
+    @property
+    def verdict(self) -> Optional[bool]:
+        """Settled verdict once the representative sample agrees"""
+        if self.mixed or len(self.sample_verdicts) < self.sample_size:
+            return None
+        return self.sample_verdicts[0]
+
+
+class CandidateClusterService:
+    """
+    Service that validates a representative sample per cluster and shares its verdict
+
+    Only person names are clustered: the name check is the one live decision
+    that asks the LLM. ID numbers, phones, emails and dates are settled by
+    local validity checks (``PromptInterpreterService._verifiers``) without an
+    LLM call, so a repeated 12-digit number after "Application No" has no
+    verdict to share. Keys carry the category, so another LLM-validated
+    category can use the same service.
+    """
+    
+    clusters = JobLocal()
+
+    def __init__(self, candidate_scorer):
+        self.candidate_scorer = candidate_scorer
+        self.enabled = settings.LLM_CLUSTER_ENABLED
+        self.sample_size = settings.LLM_CLUSTER_SAMPLE_SIZE
+        self.max_shared = settings.LLM_CLUSTER_MAX_SIZE
+        self.clusters: Dict[ClusterKey, CandidateCluster] = {}
+        self._lock = threading.Lock()  # Pages may be validated concurrently
+        logger.info("Candidate Cluster Service initialized")
+
+    def start_job(self):
+        """Clusters never span jobs"""
+        self.clusters = {}
+
+    def cluster_key(self, text: str, category: str, page_context: Optional[PageContext]) -> Optional[ClusterKey]:
+        """
+        Compute the cluster key for a candidate
+
+        Only candidates with a preceding field label are clustered: a bare
+        ALL-CAPS token could be a name or a city, and shape alone is not
+        enough evidence to share a verdict between them.
+
+        Returns:
+            (category, token shape, preceding label) or None if not clusterable
+        """
+        if not self.enabled or page_context is None:
+            return None
+
+        label = self.candidate_scorer.find_preceding_label(text, category, page_context)
+        if not label:
+            return None
+        return (category, token_shape(text), label[0])
+
+    def _get_cluster(self, key: ClusterKey) -> CandidateCluster:
+        """Get or create the cluster for a key"""
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            cluster = self.clusters[key] = CandidateCluster(key=key, sample_size=self.sample_size)
+        return cluster
+
+    def shared_verdict(self, key: Optional[ClusterKey]) -> Optional[bool]:
+        """
+        Return the cluster's verdict for a new member, or None if it must be validated
+
+        Args:
+            key: Cluster key from ``cluster_key``
+
+        Returns:
+            Shared verdict, or None when the candidate should go to the LLM
+        """
+        if key is None:
+            return None
+
+        with self._lock:
+            cluster = self._get_cluster(key)
+            cluster.members += 1
+
+            verdict = cluster.verdict
+            if verdict is None:
+                return None
+
+            if cluster.generation_shared >= self.max_shared:
+                # Size cap reached: re-sample before sharing with further members
+                logger.debug(f"Cluster {key} reached {self.max_shared} shared verdicts, re-sampling")
+                cluster.sample_verdicts = []
+                cluster.generation_shared = 0
+                return None
+
+            cluster.shared += 1
+            cluster.generation_shared += 1
+            return verdict
+
+    def record(self, key: Optional[ClusterKey], verdict: bool):
+        """
+        Record an LLM verdict for a sampled cluster member
+
+        Args:
+            key: Cluster key from ``cluster_key``
+            verdict: LLM verdict for the member
+        """
+        if key is None:
+            return
+
+        with self._lock:
+            cluster = self._get_cluster(key)
+            cluster.validated += 1
+            if cluster.mixed:
+                return
+
+            if cluster.sample_verdicts and cluster.sample_verdicts[0] != verdict:
+                # Disagreeing sample: this shape/label pair is not homogeneous
+                cluster.mixed = True
+                logger.info(f"Cluster {key} has mixed verdicts, validating members individually")
+                return
+
+            if len(cluster.sample_verdicts) < self.sample_size:
+                cluster.sample_verdicts.append(verdict)
+
+    def audit(self) -> List[Dict[str, Any]]:
+        """Per-cluster audit of how many members were validated vs shared"""
+        return [
+            {
+                'category': cluster.key[0],
+                'shape': cluster.key[1],
+                'label': cluster.key[2],
+                'members': cluster.members,
+                'validated': cluster.validated,
+                'shared': cluster.shared,
+                'verdict': cluster.verdict,
+                'mixed': cluster.mixed
+            }
+            for cluster in self.clusters.values()
+        ]
@@ -0,0 +1,328 @@
+"""
+Candidate Scorer Service for cheap, local PII confidence scoring
+"""
+
+import logging
+import string
+from collections import Counter
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Tuple
+
+from ..core.config import settings
+from ..models.page import PageContext
+from .job_context import JobLocal
+
+logger = logging.getLogger(__name__)
+
+_STRIP_CHARS = string.punctuation + string.whitespace
+
+
+def normalize_token(token: str) -> str:
+    """Casefold a token and strip surrounding punctuation"""
+    return token.strip(_STRIP_CHARS).casefold()
+
+
+def token_shape(text: str) -> str:
+    """
+    Collapse text into a coarse shape, e.g. 'ASHISH' -> 'A', 'Kumar' -> 'Aa',
+    '128230000295' -> '9{12}', 'DL-01' -> 'A-9'
+    """
+    shape = []
+    digits = 0
+    for char in text.strip():
+        if char.isupper():
+            symbol = 'A'
+        elif char.islower():
+            symbol = 'a'
+        elif char.isdigit():
+            symbol = '9'
+            digits += 1
+        elif char.isspace():
+            symbol = ' '
+        else:
+            symbol = char
+        if not shape or shape[-1] != symbol:
+            shape.append(symbol)
+    collapsed = ''.join(shape)
+    # Digit count matters for IDs (6-digit PIN vs 12-digit application number)
+    if collapsed == '9':
+        return f"9{{{digits}}}"
+    return collapsed
+
+
+class CandidateScorerService:
+    """Service that scores ambiguous PII candidates from cheap page features"""
+
+    document_counts = JobLocal()
+    counted_pages = JobLocal()
+
+    def __init__(self):
+        self.enabled = settings.LLM_GATE_ENABLED
+        self.low_threshold = settings.LLM_GATE_LOW_THRESHOLD
+        self.high_threshold = settings.LLM_GATE_HIGH_THRESHOLD
+        self.label_window = settings.LLM_GATE_LABEL_WINDOW
+        self.setup_feature_weights()
+
+        # Value frequencies across the pages of the current document, and the pages counted
+        self.document_counts: Counter = Counter()
+        self.counted_pages = set()
+        logger.info("Candidate Scorer Service initialized")
+
+    def setup_feature_weights(self):
+        """
+        Setup CFGS (Cheap Feature Gating Score) weights
+
+        Research Algorithm for LLM call avoidance:
+        - Token Shape & Casing Analysis
+        - Span Style Contrast (font/colour vs page majority)
+        - Label Proximity Scoring
+        - Document Repetition Penalty
+        """
+        self.feature_weights = {
+            'upper_alpha': 0.15,
+            'title_alpha': 0.10,
+            'lowercase': -0.25,
+            'short_acronym': -0.20,
+            'has_digit': -0.30,
+            'near_label': 0.25,
+            'bold': -0.10,
+            'color_contrast': 0.10,
+            'font_contrast': 0.05,
+            'repeated': -0.20,
+            'long_number': 0.30,
+            'year_like': -0.40,
+        }
+
+        # Labels that usually precede a value of the given category
+        self.category_labels = {
+            'person_names': {'name', 'father', 'mother', 'student', 'candidate', 'guardian', 'applicant'},
+            'identification_numbers': {'no', 'number', 'roll', 'id', 'registration', 'application', 'admission', 'ref', 'reference'},
+            'phone_numbers': {'phone', 'mobile', 'contact', 'tel'},
+            'email_addresses': {'email', 'e-mail', 'mail'},
+            'dates': {'date', 'dob', 'birth', 'born'},
+            'addresses': {'address', 'city', 'state', 'district', 'location'},
+        }
+
+        # Repeated this many times in a document, a value is likely boilerplate
+        self.repeat_threshold = 4
+
+    def start_document(self):
+        """Reset per-document state before a new job"""
+        self.document_counts = Counter()
+        self.counted_pages = set()
+
+    def count_page_words(self, page_num: int, words: List):
+        """
+        Add a page's word frequencies to the document counts (once per page)
+
+        The processor calls this for every page with a text layer before any
+        page is scored, so all page contexts read the same whole-document
+        counts whatever order pages are scored in. Pages without one (scanned,
+        OCR'd later) are counted when their context is built.
+
+        Args:
+            page_num: Zero-based page index
+            words: Word tuples from ``page.get_text("words")`` or OCR
+        """
+        if page_num in self.counted_pages:
+            return
+        self.counted_pages.add(page_num)
+        self.document_counts.update(
+            key for key in (normalize_token(str(word[4])) for word in words if len(word) >= 5) if key)
+
+    def build_page_context(self, page_num: int, full_text: str, words: List, text_dict: Optional[Dict] = None) -> PageContext:
+        """
+        Build the shared page context (counting the page's words if not yet counted)
+
+        Args:
+            page_num: Zero-based page index
+            full_text: Full page text
+            words: Word tuples from ``page.get_text("words")`` or OCR
+            text_dict: Optional ``page.get_text("dict")`` output for span styles
+
+        Returns:
+            PageContext instance
+        """
+        context = PageContext(page_num=page_num, full_text=full_text, words=words)
+
+        for index, word_info in enumerate(words):
+            if len(word_info) >= 5:
+                key = normalize_token(str(word_info[4]))
+                if key:
+                    context.word_positions.setdefault(key, []).append(index)
+
+        if text_dict:
+            font_weight: Counter = Counter()
+            color_weight: Counter = Counter()
+            for block in text_dict.get('blocks', []):
+                for line in block.get('lines', []):
+                    for span in line.get('spans', []):
+                        span_text = span.get('text', '')
+                        style = (span.get('font', ''), span.get('flags', 0), span.get('color', 0))
+                        font_weight[style[0]] += len(span_text)
+                        color_weight[style[2]] += len(span_text)
+                        for token in span_text.split():
+                            key = normalize_token(token)
+                            if key and key not in context.span_styles:
+                                context.span_styles[key] = style
+            if font_weight:
+                context.dominant_font = font_weight.most_common(1)[0][0]
+                context.dominant_color = color_weight.most_common(1)[0][0]
+
+        self.count_page_words(page_num, words)
+        # One read-only view of the job's counts, shared by every page context
+        context.repeat_counts = MappingProxyType(self.document_counts)
+        return context
+
+    def _repeat_counts(self, page_context: Optional[PageContext]) -> Dict[str, int]:
+        """Document word counts of the candidate's job"""
+        if page_context is not None and page_context.repeat_counts is not None:
+            return page_context.repeat_counts
+        return self.document_counts
+
+    def extract_features(self, text: str, category: str, page_context: Optional[PageContext] = None) -> Dict[str, Any]:
+        """
+        Extract cheap features for a candidate
+
+        Args:
+            text: Candidate text
+            category: PII category
+            page_context: Optional page context for layout/style features
+
+        Returns:
+            Feature dictionary
+        """
+        stripped = text.strip()
+        compact = stripped.replace(' ', '')
+        first_key = normalize_token(stripped.split()[0]) if stripped.split() else ''
+
+        features = {
+            'shape': token_shape(stripped),
+            'upper_alpha': compact.isalpha() and compact.isupper(),
+            'title_alpha': compact.isalpha() and stripped.istitle() and not compact.isupper(),
+            'lowercase': stripped.islower(),
+            'short_acronym': compact.isalpha() and compact.isupper() and len(compact) <= 3,
+            'has_digit': any(c.isdigit() for c in stripped),
+            'digit_count': sum(1 for c in stripped if c.isdigit()),
+            'label_distance': None,
+            'bold': False,
+            'color_contrast': False,
+            'font_contrast': False,
+            'repeat_count': self._repeat_counts(page_context).get(first_key, 0),
+        }
+
+        if page_context is not None and first_key:
+            label = self.find_preceding_label(stripped, category, page_context)
+            features['label_distance'] = label[1] if label else None
+
+            style = page_context.span_styles.get(first_key)
+            if style:
+                font, flags, color = style
+                features['bold'] = bool(flags & 16)
+                features['color_contrast'] = page_context.dominant_color is not None and color != page_context.dominant_color
+                features['font_contrast'] = page_context.dominant_font is not None and font != page_context.dominant_font
+
+        return features
+
+    def find_preceding_label(self, text: str, category: str, page_context: PageContext) -> Optional[Tuple[str, int]]:
+        """
+        Find the nearest category label preceding any occurrence of the candidate
+
+        Args:
+            text: Candidate text (its first token is located on the page)
+            category: PII category
+            page_context: Page context
+
+        Returns:
+            Tuple of (label, distance in words) or None if no label is within the window
+        """
+        labels = self.category_labels.get(category)
+        tokens = text.split()
+        if not labels or not tokens:
+            return None
+
+        words = page_context.words
+        best = None
+        for position in page_context.word_positions.get(normalize_token(tokens[0]), []):
+            for distance in range(1, self.label_window + 1):
+                index = position - distance
+                if index < 0:
+                    break
+                label = normalize_token(str(words[index][4]))
+                if label in labels:
+                    if best is None or distance < best[1]:
+                        best = (label, distance)
+                    break
+        return best
+
+    def score_candidate(self, text: str, category: str, page_context: Optional[PageContext] = None) -> float:
+        """
+        Score how likely a candidate is real PII, in [0, 1]
+
+        Args:
+            text: Candidate text
+            category: PII category
+            page_context: Optional page context
+
+        Returns:
+            Confidence that the candidate should be redacted
+        """
+        features = self.extract_features(text, category, page_context)
+        weights = self.feature_weights
+        score = 0.5
+
+        if category == 'person_names':
+            if features['upper_alpha']:
+                score += weights['upper_alpha']
+            elif features['title_alpha']:
+                score += weights['title_alpha']
+            if features['lowercase']:
+                score += weights['lowercase']
+            if features['short_acronym']:
+                score += weights['short_acronym']
+            if features['has_digit']:
+                score += weights['has_digit']
+        elif category in ('identification_numbers', 'phone_numbers'):
+            digits = features['digit_count']
+            if digits >= 8:
+                score += weights['long_number']
+            if features['shape'] == '9{4}' and text.strip()[:2] in ('19', '20'):
+                score += weights['year_like']
+
+        if features['label_distance'] is not None:
+            # Closer labels are stronger evidence
+            score += weights['near_label'] / features['label_distance']
+        if features['bold']:
+            score += weights['bold']
+        if features['color_contrast']:
+            score += weights['color_contrast']
+        if features['font_contrast']:
+            score += weights['font_contrast']
+        if features['repeat_count'] >= self.repeat_threshold:
+            score += weights['repeated']
+
+        score = round(max(0.0, min(1.0, score)), 4)
+        logger.debug(f"CFGS score for '{text}' ({category}): {score:.2f} from {features}")
+        return score
+
+    def gate(self, text: str, category: str, page_context: Optional[PageContext] = None) -> Optional[bool]:
+        """
+        Decide a candidate locally when the score is outside the uncertain band
+
+        Args:
+            text: Candidate text
+            category: PII category
+            page_context: Optional page context
+
+        Returns:
+            True (redact) / False (keep) when confident, None when the LLM should decide
+        """
+        if not self.enabled:
+            return None
+
+        score = self.score_candidate(text, category, page_context)
+        if score >= self.high_threshold:
+            return True
+        if score <= self.low_threshold:
+            return False
+        return None
@@ -5,10 +5,27 @@ Coordinate Mapper Service for finding and validating text coordinates in PDFs
 import logging
 from typing import List, Optional, Tuple, Dict, Any
 
+import numpy as np
+
 from ..core.config import settings
+from ..models.job import DetectionResult
+from ..models.page import to_word_array, box_matrix
 
 logger = logging.getLogger(__name__)
 
+TEXT_CATEGORIES = frozenset(['person_names', 'identification_numbers', 'phone_numbers', 'email_addresses', 'dates'])
+LIMIT_KEYS = ('min_width', 'max_width', 'min_height', 'max_height', 'min_area', 'max_area')
+
+# Legacy validation failures, in the order they are checked
+VALIDATION_REASONS = (
+    "Valid coordinates",
+    "Invalid dimensions",
+    "Area too small",
+    "Area too large",
+    "Negative coordinates",
+    "Coordinates too large"
+)
+
 class CoordinateMapperService:
     """Service for mapping text to coordinates and validation"""
     
@@ -70,44 +87,35 @@ class CoordinateMapperService:
         - Text Density Computation
         - Layout Variability Assessment
         - Adaptive Scaling Factors
+        
+        Args:
+            words: Word list, or a WORD_DTYPE array from ``to_word_array``
         """
-        if not words:
+        array = words if isinstance(words, np.ndarray) else to_word_array(words)
+        if len(array) == 0:
             return {}
         
-        # Calculate document characteristics
-        all_widths = []
-        all_heights = []
-        all_areas = []
-        
-        for word_info in words:
-            if len(word_info) >= 5:
-                x0, y0, x1, y1 = word_info[:4]
-                width = abs(x1 - x0)
-                height = abs(y1 - y0)
-                area = width * height
-                
-                all_widths.append(width)
-                all_heights.append(height)
-                all_areas.append(area)
-        
-        if not all_widths:
-            return {}
+        # Calculate document characteristics across all words at once
+        widths = np.abs(array['x1'] - array['x0'])
+        heights = np.abs(array['y1'] - array['y0'])
+        areas = widths * heights
+        max_width = float(widths.max())
         
-        # Calculate statistics
         analysis = {
-            'avg_width': sum(all_widths) / len(all_widths),
-            'avg_height': sum(all_heights) / len(all_heights),
-            'avg_area': sum(all_areas) / len(all_areas),
-            'max_width': max(all_widths),
-            'max_height': max(all_heights),
-            'content_density': len(words) / (max(all_areas) + 1),
-            'text_variation': (max(all_widths) - min(all_widths)) / (max(all_widths) + 1)
+            'avg_width': float(widths.mean()),
+            'avg_height': float(heights.mean()),
+            'avg_area': float(areas.mean()),
+            'max_width': max_width,
+            'max_height': float(heights.max()),
+            'content_density': len(array) / (float(areas.max()) + 1),
+            'text_variation': (max_width - float(widths.min())) / (max_width + 1)
         }
         
         logger.debug(f"Document analysis: {analysis}")
         return analysis
     
-    def adapt_coordinate_limits(self, words: List, category: str):
+    def adapt_coordinate_limits(self, words, category: str, analysis: Optional[Dict[str, float]] = None,
+                                limits: Optional[Dict[str, Dict[str, float]]] = None):
         """
         ACVS (Adaptive Coordinate Validation System) Algorithm
         
@@ -116,8 +124,18 @@ class CoordinateMapperService:
         - Category-Specific Scaling
         - Content Density Adaptation
         - Intelligent Boundary Optimization
+        
+        Args:
+            words: Word list or WORD_DTYPE array
+            category: PII category (selects text or image limits)
+            analysis: Precomputed ``analyze_document_layout`` result for the page
+            limits: Limits table to update (default: the service's shared ``coordinate_limits``)
         """
-        analysis = self.analyze_document_layout(words)
+        if limits is None:
+            limits = self.coordinate_limits
+        
+        if analysis is None:
+            analysis = self.analyze_document_layout(words)
         
         if not analysis:
             return
@@ -138,12 +156,12 @@ class CoordinateMapperService:
             scale_factor *= 1.2  # Relax for sparse documents
         
         # Apply adaptive scaling
-        content_type = 'text' if category in ['person_names', 'identification_numbers', 'phone_numbers', 'email_addresses', 'dates'] else 'image'
+        content_type = self._content_type(category)
         
         original_limits = self.base_coordinate_limits[content_type].copy()
         
         # Apply intelligent scaling
-        self.coordinate_limits[content_type] = {
+        limits[content_type] = {
             'max_width': original_limits['max_width'] * scale_factor,
             'max_height': original_limits['max_height'] * scale_factor,
             'max_area': original_limits['max_area'] * (scale_factor ** 2),
@@ -153,7 +171,7 @@ class CoordinateMapperService:
         }
         
         logger.debug(f"Adapted {content_type} limits with scale factor {scale_factor:.2f}")
-        logger.debug(f"New limits: {self.coordinate_limits[content_type]}")
+        logger.debug(f"New limits: {limits[content_type]}")
     
     def find_coordinates(self, target_text: str, words: List, category: str) -> Optional[List[float]]:
         """
@@ -170,10 +188,11 @@ class CoordinateMapperService:
         logger.debug(f"Finding coordinates for '{target_text}' (category: {category})")
         
         # Step 1: Adapt coordinate limits based on document analysis
-        self.adapt_coordinate_limits(words, category)
+        array = to_word_array(words)
+        self.adapt_coordinate_limits(array, category)
         
         # Step 2: Intelligent text matching with multiple strategies
-        coordinates = self._find_coordinates_intelligent(target_text, words, category)
+        coordinates = self._find_coordinates_intelligent(target_text, words, category, box_matrix(array))
         
         if coordinates:
             # Step 3: Validate coordinates with adaptive rules
@@ -186,7 +205,62 @@ class CoordinateMapperService:
         logger.debug("No valid coordinates found")
         return None
     
-    def _find_coordinates_intelligent(self, target_text: str, words: List, category: str) -> Optional[List[float]]:
+    def locate_detections(self, detections: List[DetectionResult], words: List,
+                          page_rect=None) -> List[DetectionResult]:
+        """
+        Locate and validate all of a page's detections in one pass
+        
+        Layout statistics and adaptive limits are computed once per page. Text
+        matching runs per detection; adaptive validation, legacy validation and
+        clamping then run as array operations over every candidate box.
+        
+        Args:
+            detections: Page detections; those without coordinates are located in ``words``
+            words: Page words (WordBox records)
+            page_rect: Optional page rectangle that located boxes are clamped to
+            
+        Returns:
+            Detections with coordinates, in input order
+        """
+        array = to_word_array(words)
+        boxes = box_matrix(array)
+        analysis = self.analyze_document_layout(array)
+        limits = dict(self.coordinate_limits)  # Per-call copy: pages may be located concurrently
+        for category in ('person_names', 'image'):  # One category per limits family
+            self.adapt_coordinate_limits(array, category, analysis, limits)
+        
+        pending, candidates = [], []
+        for index, detection in enumerate(detections):
+            if detection.coordinates is None and detection.text:
+                coords = self._find_coordinates_intelligent(detection.text, words, detection.category, boxes)
+                if coords:
+                    pending.append(index)
+                    candidates.append(coords)
+                else:
+                    logger.warning(f"No coordinates found for '{detection.text}'")
+        
+        if candidates:
+            candidate_boxes = np.array(candidates, dtype=np.float64)
+            adaptive_valid = self.validate_boxes_adaptive(
+                candidate_boxes, [detections[index].category for index in pending], limits)
+            valid, reasons = self.validate_boxes(candidate_boxes)
+            if page_rect is not None:
+                candidate_boxes = self.clamp_boxes(candidate_boxes, tuple(page_rect))
+            
+            for row, index in enumerate(pending):
+                detection = detections[index]
+                if not adaptive_valid[row]:
+                    logger.warning(f"No coordinates found for '{detection.text}'")
+                elif not valid[row]:
+                    logger.warning(f"Invalid coordinates for '{detection.text}': {reasons[row]}")
+                else:
+                    detection.coordinates = candidate_boxes[row].tolist()
+                    logger.info(f"Added detection: {detection.category} = '{detection.text}'")
+        
+        return [detection for detection in detections if detection.coordinates is not None]
+    
+    def _find_coordinates_intelligent(self, target_text: str, words: List, category: str,
+                                      boxes: Optional[np.ndarray] = None) -> Optional[List[float]]:
         """
         MSCF (Multi-Strategy Coordinate Finding) Algorithm
         
@@ -210,7 +284,7 @@ class CoordinateMapperService:
             return coords
         
         # MWR: Multi-word reconstruction (Tier 3)
-        coords = self._multiword_strategy_mwr(target_text, words)
+        coords = self._multiword_strategy_mwr(target_text, words, boxes)
         if coords:
             logger.debug("MSCF: MWR (Multi-Word Reconstruction) successful")
             return coords
@@ -276,7 +350,8 @@ class CoordinateMapperService:
         
         return None
     
-    def _multiword_strategy_mwr(self, target_text: str, words: List) -> Optional[List[float]]:
+    def _multiword_strategy_mwr(self, target_text: str, words: List,
+                                boxes: Optional[np.ndarray] = None) -> Optional[List[float]]:
         """
         MWR (Multi-Word Reconstruction) Algorithm - Tier 3
         
@@ -292,26 +367,23 @@ class CoordinateMapperService:
         
         logger.debug(f"Strategy 3: Multi-word matching ({len(target_words)} words)")
         
-        word_boxes = []
+        found = []
         for target_word in target_words:
             logger.debug(f"Looking for word: '{target_word}'")
-            for word_info in words:
+            for index, word_info in enumerate(words):
                 if len(word_info) >= 5:
-                    x0, y0, x1, y1, word = word_info[:5]
+                    word = word_info[4]
                     if target_word.lower() in word.lower() or word.lower() in target_word.lower():
-                        word_boxes.append([float(x0), float(y0), float(x1), float(y1)])
-                        logger.debug(f"Found component word '{word}' at {[x0, y0, x1, y1]}")
+                        found.append(index)
+                        logger.debug(f"Found component word '{word}' at {list(word_info[:4])}")
                         break
         
-        if len(word_boxes) >= len(target_words) * 0.7:  # Found at least 70% of words
+        if len(found) >= len(target_words) * 0.7:  # Found at least 70% of words
             # Merge all word boxes
-            if word_boxes:
-                min_x = min(box[0] for box in word_boxes)
-                min_y = min(box[1] for box in word_boxes)
-                max_x = max(box[2] for box in word_boxes)
-                max_y = max(box[3] for box in word_boxes)
-                
-                merged_coords = [min_x, min_y, max_x, max_y]
+            if found:
+                if boxes is None:
+                    boxes = box_matrix(to_word_array(words))
+                merged_coords = self.union_boxes(boxes[found]).tolist()
                 logger.debug(f"Multi-word match found: {merged_coords}")
                 return merged_coords
         
@@ -412,35 +484,55 @@ class CoordinateMapperService:
         
         return None
     
+    def _content_type(self, category: str) -> str:
+        """Limits family ('text' or 'image') a category is validated against"""
+        return 'text' if category in TEXT_CATEGORIES else 'image'
+    
     def _validate_coordinates_adaptive(self, coords: List[float], category: str) -> bool:
         """Validate coordinates using adaptive rules"""
         if not coords or len(coords) != 4:
             return False
         
-        x0, y0, x1, y1 = coords
-        width = abs(x1 - x0)
-        height = abs(y1 - y0)
-        area = width * height
-        
-        # Determine content type
-        content_type = 'text' if category in ['person_names', 'identification_numbers', 'phone_numbers', 'email_addresses', 'dates'] else 'image'
-        limits = self.coordinate_limits.get(content_type, self.base_coordinate_limits['text'])
-        
-        # Validate dimensions
-        if width < limits['min_width'] or width > limits['max_width']:
-            logger.debug(f"Width validation failed: {width} not in [{limits['min_width']}, {limits['max_width']}]")
-            return False
-        
-        if height < limits['min_height'] or height > limits['max_height']:
-            logger.debug(f"Height validation failed: {height} not in [{limits['min_height']}, {limits['max_height']}]")
-            return False
-        
-        if area < limits['min_area'] or area > limits['max_area']:
-            logger.debug(f"Area validation failed: {area} not in [{limits['min_area']}, {limits['max_area']}]")
-            return False
+        is_valid = bool(self.validate_boxes_adaptive(np.array([coords], dtype=np.float64), [category])[0])
+        if is_valid:
+            logger.debug(f"Coordinates passed adaptive validation: {coords}")
+        return is_valid
+    
+    def validate_boxes_adaptive(self, boxes: np.ndarray, categories: List[str],
+                                limits: Optional[Dict[str, Dict[str, float]]] = None) -> np.ndarray:
+        """
+        Check boxes against the adaptive limits of their categories
         
-        logger.debug(f"Coordinates passed adaptive validation: {coords}")
-        return True
+        Args:
+            boxes: (N, 4) array of [x0, y0, x1, y1]
+            categories: PII category of each box
+            limits: Limits table (default: the service's ``coordinate_limits``)
+            
+        Returns:
+            Boolean array, True where width, height and area are within limits
+        """
+        if limits is None:
+            limits = self.coordinate_limits
+        table = {
+            content_type: [family[key] for key in LIMIT_KEYS]
+            for content_type, family in (
+                ('text', limits.get('text', self.base_coordinate_limits['text'])),
+                ('image', limits.get('image', self.base_coordinate_limits['text']))
+            )
+        }
+        bounds = np.array([table[self._content_type(category)] for category in categories], dtype=np.float64)
+        bounds = bounds.reshape(len(categories), len(LIMIT_KEYS))
+        
+        widths = np.abs(boxes[:, 2] - boxes[:, 0])
+        heights = np.abs(boxes[:, 3] - boxes[:, 1])
+        areas = widths * heights
+        valid = ((widths >= bounds[:, 0]) & (widths <= bounds[:, 1]) &
+                 (heights >= bounds[:, 2]) & (heights <= bounds[:, 3]) &
+                 (areas >= bounds[:, 4]) & (areas <= bounds[:, 5]))
+        
+        if not valid.all():
+            logger.debug(f"{int((~valid).sum())}/{len(valid)} boxes failed adaptive validation")
+        return valid
     
     def validate_coordinates(self, coords: List[float], text: str) -> Tuple[bool, str]:
         """
@@ -456,26 +548,54 @@ class CoordinateMapperService:
         if not coords or len(coords) != 4:
             return False, "Invalid coordinate format"
         
-        x0, y0, x1, y1 = coords
-        width = abs(x1 - x0)
-        height = abs(y1 - y0)
-        area = width * height
-        
-        # Basic validation
-        if width <= 0 or height <= 0:
-            return False, "Invalid dimensions"
-        
-        if area < 1:
-            return False, "Area too small"
-        
-        if area > 50000:
-            return False, "Area too large"
-        
-        # Coordinate bounds check
-        if any(coord < 0 for coord in coords):
-            return False, "Negative coordinates"
+        valid, reasons = self.validate_boxes(np.array([coords], dtype=np.float64))
+        return bool(valid[0]), reasons[0]
+    
+    def validate_boxes(self, boxes: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """
+        Legacy sanity checks (dimensions, area, bounds) over many boxes at once
         
-        if any(coord > 10000 for coord in coords):
-            return False, "Coordinates too large"
+        Args:
+            boxes: (N, 4) array of [x0, y0, x1, y1]
+            
+        Returns:
+            Tuple of (boolean validity array, reason per box)
+        """
+        widths = np.abs(boxes[:, 2] - boxes[:, 0])
+        heights = np.abs(boxes[:, 3] - boxes[:, 1])
+        areas = widths * heights
+        
+        # First failing check wins, as in the sequential version
+        failures = np.select(
+            [
+                (widths <= 0) | (heights <= 0),
+                areas < 1,
+                areas > 50000,
+                (boxes < 0).any(axis=1),
+                (boxes > 10000).any(axis=1)
+            ],
+            [1, 2, 3, 4, 5],
+            default=0
+        )
+        return failures == 0, [VALIDATION_REASONS[failure] for failure in failures]
+    
+    def clamp_boxes(self, boxes: np.ndarray, bounds: Tuple[float, float, float, float]) -> np.ndarray:
+        """
+        Clamp boxes to a rectangle (typically the page)
         
-        return True, "Valid coordinates"
\ No newline at end of file
+        Args:
+            boxes: (N, 4) array of [x0, y0, x1, y1]
+            bounds: (x0, y0, x1, y1) of the clamping rectangle
+            
+        Returns:
+            New (N, 4) array with every edge inside ``bounds``
+        """
+        left, top, right, bottom = bounds
+        clamped = boxes.copy()
+        clamped[:, [0, 2]] = np.clip(boxes[:, [0, 2]], left, right)
+        clamped[:, [1, 3]] = np.clip(boxes[:, [1, 3]], top, bottom)
+        return clamped
+    
+    def union_boxes(self, boxes: np.ndarray) -> np.ndarray:
+        """Smallest box containing every box in an (N, 4) array"""
+        return np.concatenate((boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)))
@@ -0,0 +1,329 @@
+"""
+Detector Registry: pluggable PII detectors and a per-page scheduler
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from ..core.config import settings
+from ..models.job import DetectionResult, ProcessingStats
+from ..models.page import PageContext
+from .job_context import JobLocal
+
+logger = logging.getLogger(__name__)
+
+# Cost classes (scheduling hints)
+COST_CHEAP = "cheap"  # microseconds to a few milliseconds of CPU; run inline
+COST_MODERATE = "moderate"  # noticeable CPU per page; worth a worker thread
+COST_EXPENSIVE = "expensive"  # model inference, OCR or network calls; start first
+
+# Inputs a detector may declare
+INPUT_PAGE = "page"  # the live PyMuPDF page (not thread-safe: main thread only)
+INPUT_TEXT = "text"
+INPUT_WORDS = "words"
+INPUT_PAGE_CONTEXT = "page_context"
+INPUT_RULES = "rules"
+
+# Phases a detector can be run in
+PHASE_DETECT = "detect"  # candidates and validation in one call
+PHASE_CANDIDATES = "candidates"  # CPU and page work only
+PHASE_VALIDATE = "validate"  # rule checks, possibly waiting on the LLM
+
+_COST_ORDER = {COST_EXPENSIVE: 0, COST_MODERATE: 1, COST_CHEAP: 2}
+
+
+@dataclass
+class PageInput:
+    """Everything a detector may read for one page"""
+    page_num: int
+    page: Any = None
+    full_text: str = ""
+    words: List = field(default_factory=list)
+    page_context: Optional[PageContext] = None
+    rules: Any = None
+    # Held while a detector reads ``page`` when pages are processed concurrently
+    page_lock: Any = None
+
+
+class Detector:
+    """
+    Base class for PII detectors
+
+    Subclasses set ``name``, ``cost_class`` and ``inputs`` and implement
+    ``find_candidates`` (plus ``validate`` when candidates need checking), or
+    set ``two_phase = False`` and override ``detect`` alone for a
+    single-phase detector. Both return DetectionResult records; a detection
+    without coordinates is located on the page by the processor afterwards.
+    """
+
+    name: str = "detector"
+    cost_class: str = COST_CHEAP
+    inputs: FrozenSet[str] = frozenset()
+    # Whether candidates and validation run separately (False: ``detect`` does all the work)
+    two_phase: bool = True
+    # Whether the detector takes ``page_input.page_lock`` itself, only around its page reads
+    locks_page: bool = False
+    stats = JobLocal()
+
+    def __init__(self):
+        self.stats = ProcessingStats()  # Rebound to the active job's stats by the registry
+
+    @property
+    def needs_page(self) -> bool:
+        """Detectors reading the PyMuPDF page must run on the calling thread"""
+        return INPUT_PAGE in self.inputs
+
+    def start_job(self):
+        """Hook called once per document"""
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        """Candidate phase: CPU and page work, no LLM calls"""
+        raise NotImplementedError(
+            f"{type(self).__name__} must implement find_candidates, or set two_phase = False and override detect")
+
+    def validate(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        """Validation phase (may wait on the LLM); keeps every candidate by default"""
+        return candidates
+
+    async def validate_async(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        """Validation phase awaiting the LLM; detectors that never call it inherit ``validate``"""
+        return self.validate(candidates, page_input)
+
+    def detect(self, page_input: PageInput) -> List[DetectionResult]:
+        """Both phases for one page"""
+        return self.validate(self.find_candidates(page_input), page_input)
+
+
+@dataclass
+class DetectorMetrics:
+    """Per-job timing and yield of one detector"""
+    cost_class: str
+    pages: int = 0
+    seconds: float = 0.0
+    detections: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'cost_class': self.cost_class,
+            'pages': self.pages,
+            'seconds': round(self.seconds, 4),
+            'detections': self.detections,
+            'errors': self.errors
+        }
+
+
+class DetectorRegistry:
+    """Registered detectors plus the per-page scheduler that runs the enabled ones"""
+
+    metrics = JobLocal()
+
+    def __init__(self, max_workers: int = None):
+        self.detectors: Dict[str, Detector] = {}
+        self.enabled: List[str] = []
+        self.max_workers = max_workers or settings.DETECTOR_WORKERS
+        self._pool = None
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, DetectorMetrics] = {}
+        logger.info("Detector Registry initialized")
+
+    def register(self, detector: Detector, enabled: bool = True):
+        """Add a detector (replacing one with the same name)"""
+        self.detectors[detector.name] = detector
+        if enabled and detector.name not in self.enabled:
+            self.enabled.append(detector.name)
+        elif not enabled and detector.name in self.enabled:
+            self.enabled.remove(detector.name)
+        logger.info(f"Registered detector '{detector.name}' ({detector.cost_class}, "
+                    f"inputs: {', '.join(sorted(detector.inputs)) or 'none'}){'' if enabled else ' [disabled]'}")
+
+    def start_job(self, stats: ProcessingStats):
+        """Bind the job's stats and reset per-job metrics"""
+        self.metrics = {}
+        for name in self.enabled:
+            detector = self.detectors[name]
+            detector.stats = stats
+            detector.start_job()
+            self.metrics[name] = DetectorMetrics(detector.cost_class)
+
+    def run_page(self, page_input: PageInput) -> List[DetectionResult]:
+        """
+        Run every enabled detector on one page
+
+        Detectors that need the page, and cheap ones, run on the calling
+        thread; the rest run concurrently in a worker pool, most expensive
+        first. Results are concatenated in registration order so output does
+        not depend on scheduling.
+
+        Args:
+            page_input: Page data shared by all detectors
+
+        Returns:
+            Combined detections of all enabled detectors
+        """
+        results = self._run_enabled(page_input, PHASE_DETECT)
+        return [detection for name in self.enabled for detection in results[name]]
+
+    def find_page_candidates(self, page_input: PageInput) -> Dict[str, List[DetectionResult]]:
+        """
+        Candidate phase of every enabled detector, for pipelines that validate separately
+
+        Single-phase detectors do all their work here.
+
+        Args:
+            page_input: Page data shared by all detectors
+
+        Returns:
+            Detector name -> candidates
+        """
+        return self._run_enabled(page_input, PHASE_CANDIDATES)
+
+    def validate_page(self, page_input: PageInput, candidates: Dict[str, List[DetectionResult]]) -> List[DetectionResult]:
+        """
+        Validation phase of every enabled detector
+
+        Args:
+            page_input: Page data shared by all detectors
+            candidates: Output of ``find_page_candidates`` for the page
+
+        Returns:
+            Combined detections, in registration order
+        """
+        results = self._run_enabled(page_input, PHASE_VALIDATE, candidates)
+        return [detection for name in self.enabled for detection in results[name]]
+
+    async def validate_page_async(self, page_input: PageInput,
+                                  candidates: Dict[str, List[DetectionResult]]) -> List[DetectionResult]:
+        """
+        Validation phase of every enabled detector, awaiting the LLM on the event loop
+
+        Detectors validate concurrently as tasks instead of worker threads.
+
+        Args:
+            page_input: Page data shared by all detectors
+            candidates: Output of ``find_page_candidates`` for the page
+
+        Returns:
+            Combined detections, in registration order
+        """
+        results = await asyncio.gather(*(
+            self._validate_detector_async(self.detectors[name], page_input, candidates) for name in self.enabled
+        ))
+        return [detection for detections in results for detection in detections]
+
+    def _run_enabled(self, page_input: PageInput, phase: str,
+                     candidates: Optional[Dict[str, List[DetectionResult]]] = None) -> Dict[str, List[DetectionResult]]:
+        """Schedule one phase of the enabled detectors; returns detector name -> detections"""
+        detectors = [self.detectors[name] for name in self.enabled]
+        if phase == PHASE_VALIDATE:
+            # Single-phase detectors already finished in the candidate phase
+            inline = [d for d in detectors if not d.two_phase or d.cost_class == COST_CHEAP]
+        else:
+            inline = [d for d in detectors if d.needs_page or d.cost_class == COST_CHEAP]
+        offloaded = sorted(
+            (d for d in detectors if d not in inline),
+            key=lambda d: _COST_ORDER.get(d.cost_class, 1)
+        )
+
+        futures = {}
+        if offloaded and len(detectors) > 1:
+            pool = self._get_pool()
+            for detector in offloaded:
+                # Carry the job's context so per-job state stays with the job
+                futures[detector.name] = pool.submit(
+                    contextvars.copy_context().run, self._run_detector, detector, page_input, phase, candidates)
+
+        results = {}
+        for detector in detectors:
+            if detector.name not in futures:
+                results[detector.name] = self._run_detector(detector, page_input, phase, candidates)
+        for name, future in futures.items():
+            results[name] = future.result()
+        return results
+
+    def _run_detector(self, detector: Detector, page_input: PageInput, phase: str = PHASE_DETECT,
+                      candidates: Optional[Dict[str, List[DetectionResult]]] = None) -> List[DetectionResult]:
+        """
+        Run one phase of a detector, recording its time and yield
+
+        A detector error is counted and re-raised: a page whose detectors did
+        not all run must fail the job, not go out partly unredacted.
+        """
+        start = time.perf_counter()
+        try:
+            if phase == PHASE_VALIDATE:
+                detections = candidates.get(detector.name, [])
+                if detector.two_phase:
+                    detections = detector.validate(detections, page_input)
+            elif phase == PHASE_CANDIDATES and detector.two_phase:
+                with self._page_access(detector, page_input):
+                    detections = detector.find_candidates(page_input)
+            else:
+                with self._page_access(detector, page_input):
+                    detections = detector.detect(page_input)
+        except Exception as e:
+            self._record_run(detector, phase, [], time.perf_counter() - start, True)
+            raise self._failure(detector, page_input, e) from e
+        self._record_run(detector, phase, detections, time.perf_counter() - start, False)
+        return detections
+
+    async def _validate_detector_async(self, detector: Detector, page_input: PageInput,
+                                       candidates: Dict[str, List[DetectionResult]]) -> List[DetectionResult]:
+        """Async validation phase of one detector; errors are counted and re-raised, as in ``_run_detector``"""
+        start = time.perf_counter()
+        detections = candidates.get(detector.name, [])
+        try:
+            if detector.two_phase:
+                detections = await detector.validate_async(detections, page_input)
+        except Exception as e:
+            self._record_run(detector, PHASE_VALIDATE, [], time.perf_counter() - start, True)
+            raise self._failure(detector, page_input, e) from e
+        self._record_run(detector, PHASE_VALIDATE, detections, time.perf_counter() - start, False)
+        return detections
+
+    @staticmethod
+    def _failure(detector: Detector, page_input: PageInput, error: Exception) -> RuntimeError:
+        """Log a detector error and wrap it for the job"""
+        message = f"Detector '{detector.name}' failed on page {page_input.page_num + 1}: {error}"
+        logger.error(message)
+        return RuntimeError(message)
+
+    def _record_run(self, detector: Detector, phase: str, detections: List[DetectionResult],
+                    elapsed: float, errored: bool):
+        """Tag detections with their detector and fold the run into its metrics"""
+        for detection in detections:
+            if detection.detector is None:
+                detection.detector = detector.name
+
+        with self._lock:
+            metrics = self.metrics.setdefault(detector.name, DetectorMetrics(detector.cost_class))
+            metrics.pages += int(phase != PHASE_VALIDATE)
+            metrics.seconds += elapsed
+            if phase != PHASE_CANDIDATES:
+                metrics.detections += len(detections)
+            metrics.errors += int(errored)
+
+    @staticmethod
+    def _page_access(detector: Detector, page_input: PageInput):
+        """The page lock for detectors reading the page, if one is set and they do not take it themselves"""
+        if detector.needs_page and not detector.locks_page and page_input.page_lock is not None:
+            return page_input.page_lock
+        return nullcontext()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Worker pool, created on first use"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="detector")
+        return self._pool
+
+    def get_job_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-detector timing and yield for the current job"""
+        with self._lock:
+            return {name: metrics.to_dict() for name, metrics in self.metrics.items()}
@@ -0,0 +1,415 @@
+"""
+Standard PII detectors: regex, checksum, dictionary, NER, image and OCR-region
+"""
+
+import os
+import re
+import asyncio
+import json
+import logging
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
+
+from ..core.config import settings
+from ..models.job import DetectionResult
+from ..utils.images import pil_view
+from .detector_registry import (
+    Detector, PageInput,
+    COST_CHEAP, COST_MODERATE, COST_EXPENSIVE,
+    INPUT_PAGE, INPUT_TEXT, INPUT_WORDS, INPUT_PAGE_CONTEXT, INPUT_RULES
+)
+from .prompt_interpreter import KNOWN_PERSON_NAMES
+from .raster_cache import RasterCacheService
+
+logger = logging.getLogger(__name__)
+
+try:
+    import spacy  # Optional: named-entity detector
+except ImportError:
+    spacy = None
+
+
+class RuleFilteredDetector(Detector):
+    """Detector whose candidates are filtered through the user's redaction rules"""
+
+    # Candidates verified by the detector itself skip the per-category heuristics
+    self_verified = False
+
+    def __init__(self, prompt_interpreter):
+        super().__init__()
+        self.prompt_interpreter = prompt_interpreter
+
+    def validate(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        """Keep candidates the redaction rules ask to hide"""
+        if self.self_verified:
+            decide = self.prompt_interpreter.should_redact_verified
+        else:
+            decide = self.prompt_interpreter.should_redact_detection
+
+        filtered = []
+        for detection in candidates:
+            self._keep_if(decide(detection, page_input.rules, page_input.page_context), detection, filtered)
+        return filtered
+
+    async def validate_async(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        """Async variant of ``validate``; candidates are decided in order, as in ``validate``"""
+        if self.self_verified:
+            decide = self.prompt_interpreter.should_redact_verified_async
+        else:
+            decide = self.prompt_interpreter.should_redact_detection_async
+
+        filtered = []
+        for detection in candidates:
+            self._keep_if(await decide(detection, page_input.rules, page_input.page_context), detection, filtered)
+        return filtered
+
+    def _keep_if(self, redact: bool, detection: DetectionResult, filtered: List[DetectionResult]):
+        """Record one rule decision"""
+        if redact:
+            filtered.append(detection)
+            self.stats.successful_detections += 1
+            logger.info(f"PROMPT-BASED DETECTION: {detection.category} = '{detection.text}'")
+        else:
+            self.stats.rejected_detections += 1
+            logger.debug(f"PROMPT-FILTERED OUT: {detection.category} = '{detection.text}'")
+
+
+class RegexDetector(RuleFilteredDetector):
+    """CADPI pattern detection, validated by the prompt rules (may consult the LLM)"""
+
+    name = "regex"
+    cost_class = COST_EXPENSIVE
+    inputs = frozenset({INPUT_TEXT, INPUT_WORDS, INPUT_PAGE_CONTEXT, INPUT_RULES})
+
+    def __init__(self, pii_detection, prompt_interpreter):
+        super().__init__(prompt_interpreter)
+        self.pii_detection = pii_detection
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        logger.info("Starting prompt-based PII detection")
+
+        detections = self.pii_detection.detect_pii(page_input.full_text, page_input.words, page_input.page_num)
+        logger.info(f"Initial pattern detections: {len(detections)}")
+        return detections
+
+    def validate(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        filtered = super().validate(candidates, page_input)
+        self._log_filtered(filtered)
+        return filtered
+
+    async def validate_async(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        filtered = await super().validate_async(candidates, page_input)
+        self._log_filtered(filtered)
+        return filtered
+
+    def _log_filtered(self, filtered: List[DetectionResult]):
+        logger.info(f"Prompt-based filtering: {len(filtered)} detections match user preferences")
+        logger.info(f"LLM gate: {self.stats.llm_calls_avoided} calls avoided, {self.stats.llm_calls_made} calls made so far")
+
+
+class ChecksumDetector(RuleFilteredDetector):
+    """
+    Numbers whose check digit validates: Aadhaar (Verhoeff) and payment cards (Luhn)
+
+    A passing checksum is strong evidence on its own, so matches skip the
+    length/shape heuristics that generic ID patterns need.
+    """
+
+    name = "checksum"
+    cost_class = COST_CHEAP
+    inputs = frozenset({INPUT_TEXT, INPUT_RULES})
+    self_verified = True
+
+    AADHAAR_PATTERN = re.compile(r'\b([2-9]\d{3}[ ]?\d{4}[ ]?\d{4})\b')
+    CARD_PATTERN = re.compile(r'\b(\d(?:[ -]?\d){12,18})\b')
+
+    _VERHOEFF_D = (
+        (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 2, 3, 4, 0, 6, 7, 8, 9, 5),
+        (2, 3, 4, 0, 1, 7, 8, 9, 5, 6), (3, 4, 0, 1, 2, 8, 9, 5, 6, 7),
+        (4, 0, 1, 2, 3, 9, 5, 6, 7, 8), (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+        (6, 5, 9, 8, 7, 1, 0, 4, 3, 2), (7, 6, 5, 9, 8, 2, 1, 0, 4, 3),
+        (8, 7, 6, 5, 9, 3, 2, 1, 0, 4), (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+    )
+    _VERHOEFF_P = (
+        (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 5, 7, 6, 2, 8, 3, 0, 9, 4),
+        (5, 8, 0, 3, 7, 9, 6, 1, 4, 2), (8, 9, 1, 6, 0, 4, 3, 5, 2, 7),
+        (9, 4, 5, 3, 1, 2, 6, 8, 7, 0), (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+        (2, 7, 9, 3, 8, 0, 6, 4, 1, 5), (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+    )
+
+    @classmethod
+    def verhoeff_valid(cls, digits: str) -> bool:
+        """Verhoeff check (used by Aadhaar numbers)"""
+        check = 0
+        for position, digit in enumerate(reversed(digits)):
+            check = cls._VERHOEFF_D[check][cls._VERHOEFF_P[position % 8][int(digit)]]
+        return check == 0
+
+    @staticmethod
+    def luhn_valid(digits: str) -> bool:
+        """Luhn mod-10 check (payment card numbers)"""
+        total = 0
+        for position, digit in enumerate(reversed(digits)):
+            value = int(digit)
+            if position % 2:
+                value *= 2
+                if value > 9:
+                    value -= 9
+            total += value
+        return total % 10 == 0
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        text = page_input.full_text
+        candidates = []
+        claimed = []
+
+        for match in self.AADHAAR_PATTERN.finditer(text):
+            digits = re.sub(r'\D', '', match.group(1))
+            if self.verhoeff_valid(digits):
+                candidates.append(self._detection(match, 'aadhaar', page_input.page_num))
+                claimed.append(match.span(1))
+
+        for match in self.CARD_PATTERN.finditer(text):
+            digits = re.sub(r'\D', '', match.group(1))
+            start, end = match.span(1)
+            if any(start < c_end and c_start < end for c_start, c_end in claimed):
+                continue
+            if 13 <= len(digits) <= 19 and self.luhn_valid(digits):
+                candidates.append(self._detection(match, 'payment_card', page_input.page_num))
+
+        return candidates
+
+    @staticmethod
+    def _detection(match, kind: str, page_num: int) -> DetectionResult:
+        return DetectionResult(
+            text=match.group(1),
+            category='identification_numbers',
+            confidence=0.97,
+            method=f'CHECKSUM_{kind.upper()}',
+            page_num=page_num,
+            offset=match.start(1)
+        )
+
+
+class DictionaryDetector(RuleFilteredDetector):
+    """
+    Exact matches against known PII terms per category
+
+    Terms come from a JSON file mapping category -> list of terms; without one
+    the built-in known person names are used.
+    """
+
+    name = "dictionary"
+    cost_class = COST_CHEAP
+    inputs = frozenset({INPUT_TEXT, INPUT_RULES})
+    self_verified = True
+
+    def __init__(self, prompt_interpreter, path: str = None):
+        super().__init__(prompt_interpreter)
+        self.path = path or settings.DETECTOR_DICTIONARY_PATH
+        self.patterns = self._load_patterns()
+
+    def _load_patterns(self) -> Dict[str, re.Pattern]:
+        """One compiled alternation per category, longest terms first"""
+        terms = {'person_names': sorted(KNOWN_PERSON_NAMES)}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as handle:
+                    terms = json.load(handle)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load detector dictionary {self.path}: {e}")
+
+        patterns = {}
+        for category, words in terms.items():
+            words = sorted({w.strip() for w in words if w.strip()}, key=len, reverse=True)
+            if words:
+                alternation = '|'.join(re.escape(w) for w in words)
+                patterns[category] = re.compile(rf'\b({alternation})\b', re.IGNORECASE)
+        return patterns
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        candidates = []
+        for category, pattern in self.patterns.items():
+            for match in pattern.finditer(page_input.full_text):
+                candidates.append(DetectionResult(
+                    text=match.group(1),
+                    category=category,
+                    confidence=0.95,
+                    method='DICTIONARY',
+                    page_num=page_input.page_num,
+                    offset=match.start(1)
+                ))
+        return candidates
+
+
+class NERDetector(RuleFilteredDetector):
+    """spaCy named entities (optional; inactive when spaCy or the model is missing)"""
+
+    name = "ner"
+    cost_class = COST_EXPENSIVE
+    inputs = frozenset({INPUT_TEXT, INPUT_PAGE_CONTEXT, INPUT_RULES})
+
+    LABEL_CATEGORIES = {
+        'PERSON': 'person_names',
+        'GPE': 'addresses',
+        'LOC': 'addresses',
+        'FAC': 'addresses',
+        'DATE': 'dates',
+    }
+
+    def __init__(self, prompt_interpreter, model: str = None):
+        super().__init__(prompt_interpreter)
+        self.model = model or settings.NER_MODEL
+        self._nlp = None
+        self._unavailable = spacy is None
+        self._load_lock = threading.Lock()
+
+    def _get_nlp(self):
+        """Load the spaCy pipeline once; None if it cannot be loaded"""
+        if self._nlp is None and not self._unavailable:
+            with self._load_lock:
+                if self._nlp is None and not self._unavailable:
+                    try:
+                        self._nlp = spacy.load(self.model, disable=['parser', 'lemmatizer'])
+                    except OSError as e:
+                        logger.warning(f"NER detector disabled: cannot load spaCy model '{self.model}': {e}")
+                        self._unavailable = True
+        return self._nlp
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        nlp = self._get_nlp()
+        if nlp is None:
+            return []
+
+        candidates = []
+        for entity in nlp(page_input.full_text).ents:
+            category = self.LABEL_CATEGORIES.get(entity.label_)
+            text = entity.text.strip()
+            if category and text:
+                candidates.append(DetectionResult(
+                    text=text,
+                    category=category,
+                    confidence=0.75,
+                    method=f'NER_{entity.label_}',
+                    page_num=page_input.page_num,
+                    offset=entity.start_char
+                ))
+        return candidates
+
+
+class ImageDetector(Detector):
+    """
+    Embedded photos and signatures, classified by placement geometry
+
+    With face verification on, candidates are confirmed by the face checks
+    queued while they were found; validation waits on those checks, so it
+    runs in a worker thread (never on the event loop).
+    """
+
+    name = "image"
+    cost_class = COST_MODERATE
+    inputs = frozenset({INPUT_PAGE})
+
+    def __init__(self, image_detection):
+        super().__init__()
+        self.image_detection = image_detection
+
+    def start_job(self):
+        self.image_detection.start_document()
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        return self.image_detection.detect_images(page_input.page)
+
+    def validate(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        return self.image_detection.verify_faces(page_input.page_num, candidates)
+
+    async def validate_async(self, candidates: List[DetectionResult], page_input: PageInput) -> List[DetectionResult]:
+        if not self.image_detection.face_checks.get(page_input.page_num):
+            return candidates
+        return await asyncio.to_thread(self.validate, candidates, page_input)
+
+
+class OCRRegionDetector(RuleFilteredDetector):
+    """
+    PII inside embedded images (e.g. scanned ID cards pasted into a form)
+
+    Each sufficiently large image region is rendered, OCR'd and run through
+    the regex patterns; matches are located with the OCR word boxes, then
+    validated against the redaction rules. Only listing and rendering the
+    regions holds the page lock; Tesseract runs without it, so other pages'
+    MuPDF work is not held up by OCR.
+    """
+
+    name = "ocr_region"
+    cost_class = COST_EXPENSIVE
+    inputs = frozenset({INPUT_PAGE, INPUT_RULES})
+    locks_page = True
+
+    def __init__(self, pii_detection, prompt_interpreter, coordinate_mapper, min_area: float = None,
+                 raster_cache: RasterCacheService = None):
+        super().__init__(prompt_interpreter)
+        self.pii_detection = pii_detection
+        self.coordinate_mapper = coordinate_mapper
+        self.raster_cache = raster_cache if raster_cache is not None else RasterCacheService()
+        self.min_area = min_area if min_area is not None else settings.OCR_REGION_MIN_AREA
+        self._unavailable = False
+
+    def find_candidates(self, page_input: PageInput) -> List[DetectionResult]:
+        page = page_input.page
+        page_lock = page_input.page_lock
+        detections = []
+        if self._unavailable:
+            return detections
+        with page_lock or nullcontext():
+            rects = [rect for img_info in page.get_images() for rect in page.get_image_rects(img_info[0])
+                     if rect.width * rect.height >= self.min_area]
+        for rect in rects:
+            if self._unavailable:
+                break
+            words, text = self._ocr_region(page, rect, page_lock)
+            if not text.strip():
+                continue
+
+            for detection in self.pii_detection.detect_pii(text, words, page_input.page_num):
+                coords = self.coordinate_mapper.find_coordinates(detection.text, words, detection.category)
+                if coords:
+                    detection.coordinates = coords
+                    detection.method = 'OCR_REGION'
+                    detections.append(detection)
+        return detections
+
+    def _ocr_region(self, page, rect, page_lock=None) -> Tuple[List, str]:
+        """OCR one page region (rendered under ``page_lock``); words are returned in page coordinates"""
+        try:
+            import pytesseract
+            # Large images are OCR'd at a reduced scale (as region redaction renders them)
+            scale = self.raster_cache.fit_scale(rect, settings.PDF_SCALE_FACTOR)
+            # Cached: region redaction of the same image reuses the raster
+            pix = self.raster_cache.get(page, scale, clip=rect, page_lock=page_lock)
+            image = pil_view(pix)
+            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        except (ImportError, EnvironmentError) as e:
+            # pytesseract missing, or its TesseractNotFoundError (an EnvironmentError)
+            logger.warning(f"Tesseract not available, OCR-region detector inactive: {e}")
+            self._unavailable = True
+            return [], ""
+
+        words, lines, current_line, line_key = [], [], [], None
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            if not word or float(data["conf"][i]) <= settings.OCR_CONFIDENCE_THRESHOLD:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if key != line_key and current_line:
+                lines.append(' '.join(current_line))
+                current_line = []
+            line_key = key
+            current_line.append(word)
+
+            x0 = rect.x0 + data["left"][i] / scale
+            y0 = rect.y0 + data["top"][i] / scale
+            words.append([x0, y0, x0 + data["width"][i] / scale, y0 + data["height"][i] / scale, word])
+        if current_line:
+            lines.append(' '.join(current_line))
+        return words, '\n'.join(lines)
@@ -0,0 +1,140 @@
+"""
+Face Verifier Service: OpenCV cascade face checks confirming embedded photos
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..core.config import settings
+from .job_context import JobLocal
+
+logger = logging.getLogger(__name__)
+
+# cv2.imdecode reductions (JPEG decodes at the reduced size directly)
+_REDUCED_GRAYSCALE = ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                      (2, cv2.IMREAD_REDUCED_GRAYSCALE_2), (1, cv2.IMREAD_GRAYSCALE))
+
+
+class FaceVerifierService:
+    """
+    Finds faces in embedded images with an OpenCV Haar or LBP cascade
+
+    Images are decoded in grayscale at reduced resolution (at most
+    ``FACE_VERIFY_MAX_SIDE`` pixels a side) and checked on a small thread
+    pool; OpenCV releases the GIL, so checks queued while one page is
+    examined run while the next pages are. Results are kept per xref for the
+    document, so an image repeated across pages is checked once. Optional:
+    inactive when disabled, when the installed OpenCV has no cascade
+    classifier or when the cascade file is missing.
+    """
+
+    results = JobLocal()
+
+    def __init__(self, enabled: bool = None, cascade: str = None):
+        self.enabled = settings.FACE_VERIFICATION if enabled is None else enabled
+        self.cascade_path = self._cascade_path(cascade or settings.FACE_CASCADE)
+        self.max_side = settings.FACE_VERIFY_MAX_SIDE
+        self.timeout = settings.FACE_VERIFY_TIMEOUT_S
+        self.results: Dict[int, Future] = {}
+        self._pool = None
+        self._lock = threading.Lock()
+        self._local = threading.local()  # one classifier per worker thread: detectMultiScale is not re-entrant
+        if self.enabled and not hasattr(cv2, 'CascadeClassifier'):
+            logger.warning("Face verification disabled: this OpenCV build has no CascadeClassifier")
+            self.enabled = False
+        elif self.enabled and not os.path.isfile(self.cascade_path):
+            logger.warning(f"Face verification disabled: cascade file not found: {self.cascade_path}")
+            self.enabled = False
+        logger.info(f"Face Verifier Service initialized ({'on' if self.enabled else 'off'})")
+
+    @staticmethod
+    def _cascade_path(cascade: str) -> str:
+        """A cascade file path, or the name of one bundled with opencv-python"""
+        if os.path.isabs(cascade) or os.path.exists(cascade):
+            return cascade
+        bundled = getattr(getattr(cv2, 'data', None), 'haarcascades', '')
+        return os.path.join(bundled, cascade)
+
+    def start_document(self):
+        """Forget the previous document's results (xrefs are per document)"""
+        self.results = {}
+
+    def submit(self, doc, xref: int) -> Optional[Future]:
+        """
+        Queue a face check of one image, or return the one already queued
+
+        The image's stored bytes are read here (the caller holds the MuPDF
+        lock); decoding and detection run on the pool.
+
+        Args:
+            doc: PyMuPDF document holding the image
+            xref: Image xref
+
+        Returns:
+            Future of the faces found (see ``find_faces``), or None if verification is off
+        """
+        if not self.enabled:
+            return None
+        future = self.results.get(xref)
+        if future is None:
+            try:
+                image = doc.extract_image(xref)
+            except Exception as e:
+                logger.debug(f"Cannot extract image {xref} for face verification: {e}")
+                image = None
+            if image:
+                future = self._get_pool().submit(self.find_faces, image['image'], image['width'], image['height'])
+            else:
+                future = Future()
+                future.set_exception(ValueError(f"image {xref} could not be extracted"))
+            self.results[xref] = future
+        return future
+
+    def find_faces(self, data: bytes, width: int, height: int) -> List[Tuple[float, float, float, float]]:
+        """
+        Detect faces in an encoded image
+
+        Args:
+            data: Image file bytes (JPEG, PNG, ...)
+            width: Full image width
+            height: Full image height
+
+        Returns:
+            Face boxes as fractions of the image size (x0, y0, x1, y1), top-left origin
+        """
+        # Largest decode-time reduction that keeps the image at least max_side on its long side
+        flag = next(flag for factor, flag in _REDUCED_GRAYSCALE if max(width, height) // factor >= self.max_side
+                    or factor == 1)
+        gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+        if gray is None:
+            raise ValueError("undecodable image")
+        longest = max(gray.shape[:2])
+        if longest > self.max_side:
+            ratio = self.max_side / longest
+            gray = cv2.resize(gray, (max(1, int(gray.shape[1] * ratio)), max(1, int(gray.shape[0] * ratio))),
+                              interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(gray)
+        minimum = max(20, min(gray.shape[:2]) // 8)
+        faces = self._classifier().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(minimum, minimum))
+        rows, columns = gray.shape[:2]
+        return [(x / columns, y / rows, (x + w) / columns, (y + h) / rows) for x, y, w, h in faces]
+
+    def _classifier(self):
+        """This thread's cascade classifier"""
+        classifier = getattr(self._local, 'classifier', None)
+        if classifier is None:
+            classifier = self._local.classifier = cv2.CascadeClassifier(self.cascade_path)
+        return classifier
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Worker pool, created on first use"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=settings.FACE_VERIFY_WORKERS, thread_name_prefix="face")
+            return self._pool
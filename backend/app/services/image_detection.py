@@ -2,18 +2,50 @@
 Image Detection Service for detecting images in PDF documents
 """
 
+import time
 import logging
-from typing import List, Dict, Optional
+from dataclasses import replace
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple
+
+import fitz
+
+from ..core.config import settings
+from ..models.job import DetectionResult
+from .face_verifier import FaceVerifierService
+from .image_hash_index import ImageHashIndexService, KnownImage, VERDICT_PII, image_hashes
+from .job_context import JobLocal
 
 logger = logging.getLogger(__name__)
 
 class ImageDetectionService:
     """Service for detecting images in PDF documents"""
     
-    def __init__(self):
+    # (xref, placed width, placed height) -> image type or None, for the current document
+    classifications = JobLocal()
+    # page number -> (candidate, face check, placement transform, classified as a photo by geometry)
+    face_checks = JobLocal()
+    # xref -> known image entry or None, for the current document
+    known_images = JobLocal()
+    
+    def __init__(self, face_verifier: FaceVerifierService = None, hash_index: ImageHashIndexService = None):
         self.setup_image_classification()
+        self.face_verifier = face_verifier or FaceVerifierService()
+        if hash_index is None and settings.IMAGE_HASH_INDEX_ENABLED:
+            hash_index = ImageHashIndexService()
+        self.hash_index = hash_index
+        self.classifications: Dict[Tuple[int, float, float], Optional[str]] = {}
+        self.face_checks: Dict[int, List[Tuple[DetectionResult, Future, Tuple, bool]]] = {}
+        self.known_images: Dict[int, Optional[KnownImage]] = {}
         logger.info("Image Detection Service initialized")
     
+    def start_document(self):
+        """Forget the previous document's image classifications, face checks and known images"""
+        self.classifications = {}
+        self.face_checks = {}
+        self.known_images = {}
+        self.face_verifier.start_document()
+    
     def setup_image_classification(self):
         """Setup image classification rules"""
         self.image_classification_rules = {
@@ -38,72 +70,167 @@ class ImageDetectionService:
         }
         logger.debug("Image classification rules configured")
     
-    def detect_images(self, page) -> List[Dict]:
+    def detect_images(self, page) -> List[DetectionResult]:
         """
-        Detect images in a PDF page with comprehensive analysis
+        Detect images in a PDF page by their placement geometry
+        
+        One ``get_image_info`` call lists every placement on the page with its
+        xref. Classifications are remembered per xref and placed size for the
+        whole document, so a logo repeated on every page is classified once.
+        Images in the known-image index are looked up first (hashed once per
+        xref): non-PII ones are skipped, PII ones reported without further
+        checks. With face verification on, photos and large unclassified
+        images are also queued for a face check, settled by ``verify_faces``.
         
         Args:
             page: PyMuPDF page object
             
         Returns:
-            List of image detection dictionaries
+            List of image DetectionResult records
         """
-        logger.info("Starting detailed image detection")
-        
-        # Method 1: Direct image extraction
-        images = page.get_images()
-        logger.info(f"Direct extraction: Found {len(images)} images")
+        try:
+            placements = page.get_image_info(xrefs=True)
+        except Exception as e:
+            logger.error(f"Error listing images on page {page.number + 1}: {e}")
+            return []
         
         image_detections = []
+        face_checks = []
+        indexes: Dict[int, int] = {}  # xref -> image index on this page, in drawing order
         
-        for img_index, img_info in enumerate(images):
-            logger.info(f"Processing image {img_index + 1}/{len(images)}")
+        for placement in placements:
+            xref = placement['xref']
+            if not xref:
+                continue  # inline image: no xref, never listed as a page image
+            img_index = indexes.setdefault(xref, len(indexes))
+            
+            x0, y0, x1, y1 = placement['bbox']
+            width = x1 - x0
+            height = y1 - y0
+            
+            known = self.lookup_known_image(page.parent, xref)
+            if known is not None:
+                if known.verdict == VERDICT_PII:
+                    image_detections.append(DetectionResult(
+                        text=f'IMAGE_{img_index}_{known.image_type}',
+                        category=f'image_{known.image_type}',
+                        coordinates=[x0, y0, x1, y1],
+                        confidence=1.0,
+                        method='IMAGE_HASH',
+                        page_num=page.number,
+                        image_type=known.image_type,
+                        dimensions=f"{width:.1f}x{height:.1f}"
+                    ))
+                continue
+            
+            key = (xref, round(width, 1), round(height, 1))
+            if key in self.classifications:
+                img_type = self.classifications[key]
+            else:
+                aspect_ratio = width / height if height > 0 else 1
+                img_type = self.classifications[key] = self.classify_image(width, height, aspect_ratio, img_index)
+            
+            # Large images might be photos the geometry rules cannot size
+            large = not img_type and self.face_verifier.enabled and width * height >= settings.FACE_VERIFY_MIN_AREA
+            if img_type or large:
+                detection = DetectionResult(
+                    text=f'IMAGE_{img_index}_{img_type or "photo"}',
+                    category=f'image_{img_type or "photo"}',
+                    coordinates=[x0, y0, x1, y1],
+                    confidence=0.8,
+                    method='IMAGE_ANALYSIS',
+                    page_num=page.number,
+                    image_type=img_type or 'photo',
+                    dimensions=f"{width:.1f}x{height:.1f}"
+                )
+                image_detections.append(detection)
+                if img_type == 'photo' or large:
+                    future = self.face_verifier.submit(page.parent, xref)
+                    if future is not None:
+                        face_checks.append((detection, future, placement['transform'], not large))
+        
+        if face_checks:
+            self.face_checks[page.number] = face_checks
+        logger.debug(f"Page {page.number + 1}: {len(placements)} image placements, "
+                     f"{len(image_detections)} PII images")
+        return image_detections
+    
+    def lookup_known_image(self, doc, xref: int) -> Optional[KnownImage]:
+        """
+        Known-image index entry of an image, hashed once per document
+        
+        Nothing is extracted or hashed while the index is empty.
+        
+        Args:
+            doc: PyMuPDF document holding the image (the caller holds the MuPDF lock)
+            xref: Image xref
             
+        Returns:
+            Matching entry, or None if the image is not known
+        """
+        if not self.hash_index:
+            return None
+        if xref not in self.known_images:
+            known = None
             try:
-                xref = img_info[0]
-                logger.debug(f"Image XREF: {xref}")
-                
-                img_rects = page.get_image_rects(xref)
-                logger.debug(f"Found {len(img_rects)} rectangles for this image")
-                
-                for rect_idx, rect in enumerate(img_rects):
-                    logger.debug(f"Analyzing rectangle {rect_idx + 1}")
-                    
-                    x0, y0, x1, y1 = rect.x0, rect.y0, rect.x1, rect.y1
-                    width = x1 - x0
-                    height = y1 - y0
-                    area = width * height
-                    aspect_ratio = width / height if height > 0 else 1
-                    
-                    logger.debug(f"Dimensions: {width:.1f}x{height:.1f} (area: {area:.1f}, aspect: {aspect_ratio:.2f})")
-                    
-                    # Classify image type
-                    img_type = self.classify_image(width, height, aspect_ratio, img_index)
-                    
-                    if img_type:
-                        coordinates = [x0, y0, x1, y1]
-                        
-                        detection = {
-                            'text': f'IMAGE_{img_index}_{img_type}',
-                            'category': f'image_{img_type}',
-                            'coordinates': coordinates,
-                            'confidence': 0.8,
-                            'method': 'IMAGE_ANALYSIS',
-                            'image_type': img_type,
-                            'dimensions': f"{width:.1f}x{height:.1f}"
-                        }
-                        
-                        image_detections.append(detection)
-                        
-                        logger.info(f"VALID {img_type.upper()}: {width:.1f}x{height:.1f} at {coordinates}")
-                    else:
-                        logger.debug("Not classified as PII image")
-                    
+                hashes = image_hashes(doc.extract_image(xref)['image'])
+                known = self.hash_index.lookup(hashes) if hashes else None
             except Exception as e:
-                logger.error(f"Error processing image {img_index}: {e}")
+                logger.debug(f"Cannot hash image {xref}: {e}")
+            self.known_images[xref] = known
+            if known:
+                logger.debug(f"Image {xref} is known {known.verdict}" + (f": {known.label}" if known.label else ""))
+        return self.known_images[xref]
+    
+    def verify_faces(self, page_num: int, detections: List[DetectionResult]) -> List[DetectionResult]:
+        """
+        Settle the face checks queued for a page's image detections
         
-        logger.info(f"Image detection complete: {len(image_detections)} PII images found")
-        return image_detections
+        Geometry photos without a face are dropped as false positives. A large
+        image with faces is replaced by one detection per face, so only the
+        faces are redacted, and dropped without any. Checks not finished
+        within ``FACE_VERIFY_TIMEOUT_S`` (or failed) keep photos and drop
+        large images, as if verification were off.
+        
+        Args:
+            page_num: Page number (0-based)
+            detections: Image detections of the page
+            
+        Returns:
+            Verified image detections
+        """
+        checks = {id(detection): check for detection, *check in self.face_checks.pop(page_num, [])}
+        if not checks:
+            return detections
+        
+        deadline = time.monotonic() + self.face_verifier.timeout
+        verified = []
+        for detection in detections:
+            if id(detection) not in checks:
+                verified.append(detection)
+                continue
+            future, transform, geometry_photo = checks[id(detection)]
+            try:
+                faces = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                logger.debug(f"Face check of {detection.text} on page {page_num + 1} unavailable: {e}")
+                if geometry_photo:
+                    verified.append(detection)
+                continue
+            
+            if geometry_photo:
+                if faces:
+                    verified.append(detection)
+                else:
+                    logger.debug(f"{detection.text} on page {page_num + 1} has no face, not redacted")
+                continue
+            matrix = fitz.Matrix(transform)
+            for face in faces:
+                # Face box in image space, mapped through the placement (handles rotation)
+                rect = fitz.Rect(face) * matrix
+                verified.append(replace(detection, coordinates=[rect.x0, rect.y0, rect.x1, rect.y1],
+                                        dimensions=f"{rect.width:.1f}x{rect.height:.1f}"))
+        return verified
     
     def classify_image(self, width: float, height: float, aspect_ratio: float, img_index: int) -> Optional[str]:
         """
@@ -118,18 +245,14 @@ class ImageDetectionService:
         Returns:
             Image type string or None
         """
-        logger.debug(f"Classifying image {img_index}: {width:.1f}x{height:.1f} (aspect: {aspect_ratio:.2f})")
-        
         for img_type, rules in self.image_classification_rules.items():
-            logger.debug(f"Testing {img_type} rules")
-            
             width_ok = rules['min_width'] <= width <= rules['max_width']
             height_ok = rules['min_height'] <= height <= rules['max_height']
             aspect_ok = rules['min_aspect'] <= aspect_ratio <= rules['max_aspect']
             
             if width_ok and height_ok and aspect_ok:
-                logger.info(f"CLASSIFIED as {img_type}: {rules['description']}")
+                logger.debug(f"Image {img_index} ({width:.1f}x{height:.1f}) classified as {img_type}: "
+                             f"{rules['description']}")
                 return img_type
         
-        logger.debug("No classification match")
         return None
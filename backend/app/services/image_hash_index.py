@@ -0,0 +1,298 @@
+"""
+Image Hash Index Service: persistent perceptual hashes of images known to be PII or not
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+import cv2
+import fitz
+import numpy as np
+
+from ..core.config import settings
+from .page_pipeline import mupdf_lock
+
+logger = logging.getLogger(__name__)
+
+# What the operator marked an image as
+VERDICT_NON_PII = "non_pii"  # never redacted (logos, seals, letterheads)
+VERDICT_PII = "pii"  # always redacted, with the stored image type
+
+VERDICTS = (VERDICT_NON_PII, VERDICT_PII)
+
+HASH_BANDS = 8  # dHash bytes indexed separately: any hash within 7 bits shares at least one
+HASH_DECODE_MIN_SIDE = 64  # pixels; smaller decodes make the hashes depend on the reduction used
+_REDUCED_GRAYSCALE = (cv2.IMREAD_REDUCED_GRAYSCALE_8, cv2.IMREAD_REDUCED_GRAYSCALE_4,
+                      cv2.IMREAD_REDUCED_GRAYSCALE_2, cv2.IMREAD_GRAYSCALE)
+
+
+class KnownImage(NamedTuple):
+    """Index entry; hashes are 16-digit hex strings"""
+    dhash: str
+    ahash: str
+    verdict: str
+    image_type: Optional[str]
+    label: str
+
+
+def image_hashes(data: bytes) -> Optional[Tuple[str, str]]:
+    """
+    Perceptual hashes of an encoded image
+
+    dHash compares horizontally adjacent pixels of a 9x8 thumbnail, aHash
+    each pixel of an 8x8 one with its mean; both survive rescaling and
+    re-encoding. Large JPEGs are decoded at a reduced size directly.
+
+    Args:
+        data: Image file bytes (JPEG, PNG, ...)
+
+    Returns:
+        (dHash, aHash) as hex strings, or None if the image cannot be decoded
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    gray = None
+    for flag in _REDUCED_GRAYSCALE:
+        gray = cv2.imdecode(buffer, flag)
+        if gray is None or min(gray.shape[:2]) >= HASH_DECODE_MIN_SIDE:
+            break
+    if gray is None:
+        return None
+    wide = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    square = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return _hex(wide[:, 1:] > wide[:, :-1]), _hex(square > square.mean())
+
+
+def _hex(bits: np.ndarray) -> str:
+    return f"{int(''.join('1' if bit else '0' for bit in bits.flat), 2):016x}"
+
+
+def _distance(first: str, second: str) -> int:
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+
+def _bands(dhash: str) -> List[Tuple[int, str]]:
+    """(position, byte) pairs of a hash, the keys of the band index"""
+    return [(band, dhash[band * 2:band * 2 + 2]) for band in range(HASH_BANDS)]
+
+
+class ImageHashIndexService:
+    """
+    SQLite (WAL mode) index of images the operator marked as non-PII or PII
+
+    A rescaled or re-encoded copy of an image rarely has exactly the same
+    hashes, so an image matches an entry when its dHash and aHash differ from
+    the entry's in at most ``IMAGE_HASH_MAX_DISTANCE`` (at most 7) bits
+    together; two different QR codes, for instance, are further apart.
+    Entries are held in memory under each byte of their dHash: a dHash within
+    7 bits of an entry's shares at least one byte with it, so a lookup is
+    ``HASH_BANDS`` dict probes plus a distance check on the few entries found.
+    Updates are written through to the database and visible to the next lookup.
+    The database is opened on first use, not when the service is created.
+    """
+
+    def __init__(self, path: str = None, max_distance: int = None):
+        self.path = path or settings.IMAGE_HASH_INDEX_PATH
+        max_distance = max_distance if max_distance is not None else settings.IMAGE_HASH_MAX_DISTANCE
+        self.max_distance = min(max_distance, HASH_BANDS - 1)  # beyond this, band lookups could miss matches
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        # (dHash -> entry, (band, byte) -> dHashes), swapped whole so lookups see one consistent snapshot;
+        # None until the database is opened on first use
+        self._index: Optional[Tuple[Dict[str, KnownImage], Dict[Tuple[int, str], FrozenSet[str]]]] = None
+        logger.info(f"Image Hash Index Service initialized ({self.path}, opened on first use)")
+
+    def _snapshot(self) -> Tuple[Dict[str, KnownImage], Dict[Tuple[int, str], FrozenSet[str]]]:
+        """Current (entries, band index), opening the database the first time"""
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._open()
+                index = self._index
+        return index
+
+    def _open(self):
+        """Create or open the database and load its entries (caller holds the lock)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS known_images (
+                dhash TEXT PRIMARY KEY,
+                ahash TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                image_type TEXT,
+                label TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._publish({
+            row[0]: KnownImage(*row)
+            for row in self._conn.execute("SELECT dhash, ahash, verdict, image_type, label FROM known_images")
+        })
+        logger.info(f"Image hash index opened at {self.path} ({len(self._index[0])} images)")
+
+    @property
+    def entries(self) -> Dict[str, KnownImage]:
+        """dHash -> known image"""
+        return self._snapshot()[0]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, hashes: Tuple[str, str]) -> Optional[KnownImage]:
+        """
+        Find a known image
+
+        Args:
+            hashes: (dHash, aHash) from ``image_hashes``
+
+        Returns:
+            Matching entry, or None
+        """
+        dhash, ahash = hashes
+        entries, bands = self._snapshot()
+        entry, best = None, self.max_distance + 1
+        candidates = set().union(*(bands.get(key, ()) for key in _bands(dhash)))
+        for candidate in map(entries.get, candidates):
+            distance = _distance(candidate.dhash, dhash) + _distance(candidate.ahash, ahash)
+            if distance < best:
+                entry, best = candidate, distance
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def add(self, data: bytes, verdict: str, image_type: str = None, label: str = "") -> KnownImage:
+        """
+        Mark an image as known, replacing any entry with the same dHash
+
+        Args:
+            data: Image file bytes
+            verdict: VERDICT_NON_PII or VERDICT_PII
+            image_type: Image type reported for PII images (default 'photo')
+            label: Operator's note, e.g. "IPU seal"
+
+        Returns:
+            Stored entry
+
+        Raises:
+            ValueError: Unknown verdict or undecodable image
+        """
+        if verdict not in VERDICTS:
+            raise ValueError(f"Unknown image verdict: {verdict}")
+        hashes = image_hashes(data)
+        if hashes is None:
+            raise ValueError("Image could not be decoded")
+        entry = KnownImage(*hashes, verdict, (image_type or 'photo') if verdict == VERDICT_PII else None, label)
+        self._snapshot()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO known_images (dhash, ahash, verdict, image_type, label, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*entry, time.time())
+            )
+            self._conn.commit()
+            self._publish({**self.entries, entry.dhash: entry})
+        logger.info(f"Known image {entry.dhash} marked {verdict}" + (f" ({label})" if label else ""))
+        return entry
+
+    def add_document_images(self, pdf_bytes: bytes, verdict: str, image_type: str = None, label: str = "",
+                            page_num: int = None) -> List[KnownImage]:
+        """
+        Mark every image embedded in a PDF (or in one of its pages) as known
+
+        Lets the operator submit a letterhead or a sample document as it is
+        uploaded, instead of cutting the images out.
+
+        Args:
+            pdf_bytes: PDF file bytes
+            verdict: VERDICT_NON_PII or VERDICT_PII
+            image_type: Image type reported for PII images
+            label: Operator's note
+            page_num: Only this page (0-based)
+
+        Returns:
+            Stored entries, one per distinct decodable image
+
+        Raises:
+            ValueError: Unknown verdict, unreadable PDF or page out of range
+        """
+        if verdict not in VERDICTS:
+            raise ValueError(f"Unknown image verdict: {verdict}")
+        with mupdf_lock:
+            try:
+                doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+            except Exception as e:
+                raise ValueError(f"PDF could not be opened: {e}")
+            try:
+                if page_num is not None and not 0 <= page_num < len(doc):
+                    raise ValueError(f"Page {page_num + 1} out of range (1-{len(doc)})")
+                pages = [doc[page_num]] if page_num is not None else doc
+                xrefs = dict.fromkeys(image[0] for page in pages for image in page.get_images())
+                images = [doc.extract_image(xref)['image'] for xref in xrefs]
+            finally:
+                doc.close()
+        entries = {}
+        for data in images:
+            try:
+                entry = self.add(data, verdict, image_type, label)
+            except ValueError as e:
+                logger.debug(f"Skipping embedded image: {e}")
+                continue
+            entries[entry.dhash] = entry  # identical images stored under several xrefs count once
+        return list(entries.values())
+
+    def remove(self, dhash: str) -> bool:
+        """
+        Forget a known image
+
+        Args:
+            dhash: Entry's dHash
+
+        Returns:
+            Whether an entry was removed
+        """
+        self._snapshot()
+        with self._lock:
+            if dhash not in self.entries:
+                return False
+            self._conn.execute("DELETE FROM known_images WHERE dhash = ?", (dhash,))
+            self._conn.commit()
+            self._publish({key: entry for key, entry in self.entries.items() if key != dhash})
+        return True
+
+    def _publish(self, entries: Dict[str, KnownImage]):
+        """Swap in new entries with a rebuilt band index (lookups never see a dict being changed)"""
+        bands: Dict[Tuple[int, str], set] = {}
+        for dhash in entries:
+            for key in _bands(dhash):
+                bands.setdefault(key, set()).add(dhash)
+        self._index = (entries, {key: frozenset(hashes) for key, hashes in bands.items()})
+
+    def list_entries(self) -> List[Dict]:
+        """Every known image"""
+        return [entry._asdict() for entry in self.entries.values()]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Index size and lookup hit/miss counters since startup"""
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
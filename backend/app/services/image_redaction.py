@@ -0,0 +1,99 @@
+"""
+Image Redaction Service: batched OpenCV blur, pixelation and fill on page pixel arrays
+"""
+
+import math
+import logging
+from typing import Sequence
+
+import cv2
+import numpy as np
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Region modes
+MODE_GAUSSIAN = "gaussian"  # Gaussian-like blur (the historical look), via stack blur
+MODE_BOX = "box"  # box blur, cheaper than Gaussian at large kernels
+MODE_PIXELATE = "pixelate"  # downscale then upscale: coarse blocks, cheapest and hardest to undo
+MODE_FILL = "fill"  # solid fill (text is always filled)
+
+REDACTION_MODES = (MODE_GAUSSIAN, MODE_BOX, MODE_PIXELATE, MODE_FILL)
+
+
+class ImageRedactionService:
+    """
+    Apply all redaction regions of a page to its pixel array in one call
+
+    Works in place on a writable (H, W, C) uint8 array, typically a rendered
+    page's pixels, so no PIL image or per-region copy is made. Boxes are
+    clipped to the image together; each region is filtered on its own, as if
+    cropped, so blurring never pulls in pixels from around the region. OpenCV
+    releases the GIL, so pages render in parallel on the pipeline's workers.
+    """
+
+    def __init__(self, mode: str = None, blur_sigma: float = None, box_kernel: int = None, pixel_block: int = None):
+        self.mode = mode or settings.IMAGE_REDACTION_MODE
+        if self.mode not in REDACTION_MODES:
+            raise ValueError(f"Unknown image redaction mode: {self.mode}")
+        self.blur_sigma = blur_sigma if blur_sigma is not None else settings.IMAGE_REDACTION_BLUR_SIGMA
+        self.box_kernel = box_kernel if box_kernel is not None else settings.IMAGE_REDACTION_BOX_KERNEL
+        self.pixel_block = pixel_block if pixel_block is not None else settings.IMAGE_REDACTION_PIXEL_BLOCK
+        # Stack blur kernel covering +/- 3 sigma; cost does not grow with the kernel
+        self.blur_kernel = 2 * int(math.ceil(3 * self.blur_sigma)) + 1
+        self.fill_value = 0  # black; a scalar fill is far cheaper than a per-channel one
+        logger.info(f"Image Redaction Service initialized ({self.mode} for images)")
+
+    def redact_regions(self, pixels: np.ndarray, boxes, modes: Sequence[str]) -> int:
+        """
+        Redact regions of one page in place
+
+        Args:
+            pixels: Writable (H, W, C) uint8 pixel array, modified in place
+            boxes: (N, 4) integer pixel boxes x0, y0, x1, y1 (end exclusive)
+            modes: Mode per box (one of REDACTION_MODES), applied in order
+
+        Returns:
+            Number of regions that overlapped the image
+        """
+        if not pixels.flags.writeable:
+            # e.g. a view of a pixmap's samples, read-only before PyMuPDF 1.24
+            raise ValueError("Image redaction needs a writable pixel array")
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        if not len(boxes):
+            return 0
+        height, width = pixels.shape[:2]
+        boxes[:, 0::2] = np.clip(boxes[:, 0::2], 0, width)
+        boxes[:, 1::2] = np.clip(boxes[:, 1::2], 0, height)
+        visible = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+
+        applied = 0
+        for (x0, y0, x1, y1), mode, show in zip(boxes.tolist(), modes, visible.tolist()):
+            if not show:
+                continue
+            region = pixels[y0:y1, x0:x1]
+            try:
+                self._apply(region, mode)
+            except cv2.error as e:
+                logger.warning(f"{mode} redaction failed, using fill: {e}")
+                region[...] = self.fill_value
+            applied += 1
+        return applied
+
+    def _apply(self, region: np.ndarray, mode: str):
+        """Redact one region view in place"""
+        if mode == MODE_FILL:
+            region[...] = self.fill_value
+        elif mode == MODE_GAUSSIAN:
+            region[...] = cv2.stackBlur(region, (self.blur_kernel, self.blur_kernel))
+        elif mode == MODE_BOX:
+            kernel = max(1, min(self.box_kernel, region.shape[0], region.shape[1]))
+            region[...] = cv2.blur(region, (kernel, kernel))
+        elif mode == MODE_PIXELATE:
+            height, width = region.shape[:2]
+            small = cv2.resize(region, (max(1, width // self.pixel_block), max(1, height // self.pixel_block)),
+                               interpolation=cv2.INTER_AREA)
+            region[...] = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
+        else:
+            raise ValueError(f"Unknown image redaction mode: {mode}")
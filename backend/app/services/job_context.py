@@ -0,0 +1,57 @@
+"""
+Job Context: per-job service state for jobs processed concurrently in one process
+"""
+
+import logging
+import contextvars
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# (id(service), attribute) -> value for the job running in the current context
+_job_state = contextvars.ContextVar("job_state", default=None)
+
+
+class JobLocal:
+    """
+    Service attribute holding per-job state (stats, budgets, per-document counters)
+
+    Outside a job scope the value lives on the instance, as a plain attribute
+    would. Inside ``job_scope()`` reads and writes go to that job's own slot,
+    so concurrent jobs sharing one service instance keep separate state.
+    asyncio tasks and ``asyncio.to_thread`` inherit the scope; work handed to
+    other thread pools must be run with ``contextvars.copy_context().run``.
+    """
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        state = _job_state.get()
+        if state is not None:
+            key = (id(instance), self.name)
+            if key in state:
+                return state[key]
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, instance, value):
+        state = _job_state.get()
+        if state is not None:
+            state[(id(instance), self.name)] = value
+        else:
+            instance.__dict__[self.name] = value
+
+
+@contextmanager
+def job_scope():
+    """Give the job run in this context its own copy of every JobLocal attribute it assigns"""
+    token = _job_state.set({})
+    try:
+        yield
+    finally:
+        _job_state.reset(token)
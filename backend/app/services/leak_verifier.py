@@ -0,0 +1,163 @@
+"""
+Leak Verifier Service: checks that redacted values are gone from the output PDF
+"""
+
+import re
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+
+from ..core.config import settings
+from ..models.job import DetectionResult
+from .page_pipeline import mupdf_lock
+from .render_pool import RenderPool
+
+logger = logging.getLogger(__name__)
+
+# What a leak does to the job
+LEAK_CHECK_OFF = "off"  # no verification
+LEAK_CHECK_FLAG = "flag"  # report the leaking pages; the job still succeeds
+LEAK_CHECK_FAIL = "fail"  # fail the job and delete the output
+
+LEAK_CHECK_MODES = (LEAK_CHECK_OFF, LEAK_CHECK_FLAG, LEAK_CHECK_FAIL)
+
+
+def _normalize(value: str) -> str:
+    """Comparison form of a value: case-folded, whitespace collapsed"""
+    return ' '.join(value.split()).casefold()
+
+
+def _scan_pages(doc, page_numbers: List[int], pattern_source: str) -> List[Tuple[int, str]]:
+    """
+    Find redacted values in the text of some output pages
+
+    Module-level so render workers can run it on their own copy of the output.
+
+    Returns:
+        (page number, normalized matched value) per match
+    """
+    pattern = re.compile(pattern_source, re.IGNORECASE)
+    found = []
+    for page_num in page_numbers:
+        text = doc[page_num].get_text()
+        found.extend((page_num, _normalize(match.group())) for match in pattern.finditer(text))
+    return found
+
+
+class LeakVerifierService:
+    """
+    Re-reads the redacted PDF and looks for every redacted value in one pass
+
+    Values become one compiled alternation (longest first, tolerant of line
+    breaks between words), so each page's text is scanned once however many
+    values there are. A value redacted anywhere counts as leaked on any page
+    that still shows it. With a render pool the pages are scanned in the
+    worker processes, split into one contiguous chunk per process.
+    """
+
+    def __init__(self, mode: str = None, render_pool: RenderPool = None):
+        self.mode = mode or settings.LEAK_CHECK_MODE
+        if self.mode not in LEAK_CHECK_MODES:
+            raise ValueError(f"Unknown leak check mode: {self.mode}")
+        self.min_chars = settings.LEAK_CHECK_MIN_CHARS
+        self.render_pool = render_pool or RenderPool()
+        logger.info(f"Leak Verifier Service initialized ({self.mode})")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether outputs are verified at all"""
+        return self.mode != LEAK_CHECK_OFF
+
+    def build_pattern(self, detections: List[DetectionResult]) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        One pattern matching every redacted text value
+
+        Image detections carry descriptions, not page text, and values shorter
+        than ``LEAK_CHECK_MIN_CHARS`` would match ordinary text; both are skipped.
+
+        Args:
+            detections: Redacted detections
+
+        Returns:
+            Tuple of (pattern source, or None if nothing to check, and
+            normalized value -> category)
+        """
+        categories = {}
+        for detection in detections:
+            if detection.category.startswith('image_') or not detection.text:
+                continue
+            value = _normalize(detection.text)
+            if len(value) >= self.min_chars:
+                categories.setdefault(value, detection.category)
+        if not categories:
+            return None, categories
+
+        alternatives = (r'\s+'.join(re.escape(word) for word in value.split())
+                        for value in sorted(categories, key=len, reverse=True))
+        return rf"(?<!\w)(?:{'|'.join(alternatives)})(?!\w)", categories
+
+    def verify(self, output_path: str, detections: List[DetectionResult]) -> Dict:
+        """
+        Check a saved redacted PDF for values that should have been removed
+
+        Args:
+            output_path: Redacted PDF on disk
+            detections: Detections that were redacted
+
+        Returns:
+            Report: whether the output is clean, leaks per page and category
+            (values themselves are never reported), pages checked and time taken
+        """
+        start = time.perf_counter()
+        pattern_source, categories = self.build_pattern(detections)
+        with mupdf_lock:
+            doc = fitz.open(output_path)
+            page_count = len(doc)
+        try:
+            found = self._scan(doc, output_path, page_count, pattern_source) if pattern_source else []
+        finally:
+            with mupdf_lock:
+                doc.close()
+
+        leaks: Dict[Tuple[int, str], int] = {}
+        for page_num, value in found:
+            key = (page_num, categories.get(value, 'unknown'))
+            leaks[key] = leaks.get(key, 0) + 1
+        report = {
+            'clean': not leaks,
+            'mode': self.mode,
+            'values_checked': len(categories),
+            'pages_checked': page_count,
+            'leaked_pages': sorted({page_num + 1 for page_num, _ in leaks}),
+            'leaks': [{'page': page_num + 1, 'category': category, 'count': count}
+                      for (page_num, category), count in sorted(leaks.items())],
+            'seconds': round(time.perf_counter() - start, 4)
+        }
+        if leaks:
+            logger.warning(f"Leak check: redacted values still present on pages {report['leaked_pages']}")
+        else:
+            logger.info(f"Leak check passed: {len(categories)} values, {page_count} pages in {report['seconds']}s")
+        return report
+
+    def _scan(self, doc, output_path: str, page_count: int, pattern_source: str) -> List[Tuple[int, str]]:
+        """Scan every page, in the render workers when there are any"""
+        if self.render_pool.accepts(doc):
+            chunk = -(-page_count // self.render_pool.processes)
+            futures = [
+                self.render_pool.submit_pages(
+                    _scan_pages, output_path, range(first, min(first + chunk, page_count)), pattern_source)
+                for first in range(0, page_count, chunk)
+            ]
+            try:
+                return [match for future in futures for match in future.result()]
+            except Exception as e:
+                logger.warning(f"Leak check workers failed, checking in-process: {e}")
+
+        # One page per lock hold, so other jobs' MuPDF work interleaves
+        found = []
+        for page_num in range(page_count):
+            with mupdf_lock:
+                found.extend(_scan_pages(doc, [page_num], pattern_source))
+        return found
@@ -2,25 +2,66 @@
 LLM Agent Service using GROQ API for intelligent PII validation
 """
 
-import requests
+import time
+import asyncio
 import logging
-from typing import Tuple, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Tuple, Optional
 
 from ..core.config import settings
+from ..models.job import ProcessingStats
+from ..models.page import PageContext
+from .verdict_classifier import VerdictLog, LocalVerdictClassifier
+from .verdict_store import VerdictStoreService
+from .llm_resilience import CircuitBreaker, LLMCallBudget, backoff_with_jitter
+from .llm_transport import create_transport
+from .job_context import JobLocal
 
 logger = logging.getLogger(__name__)
 
+# Bump when a prompt template changes so stored verdicts from the old wording are not reused
+PROMPT_TEMPLATE_VERSION = "v3"
+
+# Shared pool for hedged requests (a hedge is at most one extra in-flight call)
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
 class LLMAgentService:
     """LLM service for intelligent PII validation using GROQ"""
     
+    # Per job, so concurrent async jobs keep their own stats and time budget
+    stats = JobLocal()
+    call_budget = JobLocal()
+    
     def __init__(self):
         self.api_key = settings.GROQ_API_KEY
         self.base_url = settings.GROQ_BASE_URL
         self.model = settings.GROQ_MODEL
         self.timeout = settings.GROQ_TIMEOUT
+        self.stats = ProcessingStats()  # Rebound to the active job's stats by the processor
+        
+        # Call policies: fail fast when the API is down, cap time per job
+        self.circuit_breaker = CircuitBreaker(settings.GROQ_BREAKER_FAILURE_THRESHOLD, settings.GROQ_BREAKER_RESET_TIMEOUT)
+        self.call_budget = LLMCallBudget(settings.GROQ_JOB_TIME_BUDGET)
+        self.max_retries = settings.GROQ_MAX_RETRIES
+        self.hedge_delay = settings.GROQ_HEDGE_DELAY
+        
+        # Live by default; record/replay make LLM-dependent runs reproducible offline
+        self.transport = create_transport()
+        
+        # Persistent verdict store is consulted before any network call
+        self.verdict_store = VerdictStoreService() if settings.VERDICT_STORE_ENABLED else None
+        
+        # Verdict log feeds offline training of the local classifier
+        self.verdict_log = VerdictLog(settings.LLM_VERDICT_LOG_PATH) if settings.LLM_VERDICT_LOG_ENABLED else None
+        self.local_classifier = None
+        self.local_threshold = settings.LOCAL_CLASSIFIER_THRESHOLD
+        if settings.LOCAL_CLASSIFIER_ENABLED:
+            self.local_classifier = LocalVerdictClassifier.load_if_exists(settings.LOCAL_CLASSIFIER_PATH)
         logger.info("LLM Agent Service initialized")
     
-    def analyze_with_agent(self, text: str, full_context: str, category: str) -> bool:
+    def analyze_with_agent(self, text: str, full_context: str, category: str,
+                           page_context: Optional[PageContext] = None, offset: Optional[int] = None) -> bool:
         """
         Intelligently determine if text should NOT be redacted using adaptive GROQ analysis
         
@@ -28,15 +69,17 @@ class LLMAgentService:
             text: Text to analyze
             full_context: Surrounding context
             category: PII category
+            page_context: Optional precomputed page context (avoids re-scanning full_context)
+            offset: Optional offset of this candidate in the page text
             
         Returns:
             True if text should be preserved (not redacted)
         """
         try:
             # Generate context-aware prompt based on category
-            prompt = self._generate_adaptive_prompt(text, full_context, category)
+            prompt = self._generate_adaptive_prompt(text, full_context, category, page_context, offset)
             
-            response = self.call_groq_api(prompt, max_tokens=10)
+            response = self.ask_yes_no(prompt, text, category, kind='agent', max_tokens=10)
             
             # Intelligent response parsing
             decision = self._parse_agent_response(response, text, category)
@@ -52,7 +95,8 @@ class LLMAgentService:
             logger.warning(f"GROQ agent failed: {e}")
             return False
     
-    def _generate_adaptive_prompt(self, text: str, full_context: str, category: str) -> str:
+    def _generate_adaptive_prompt(self, text: str, full_context: str, category: str,
+                                  page_context: Optional[PageContext] = None, offset: Optional[int] = None) -> str:
         """
         CAPG (Context-Aware Prompt Generation) Algorithm
         
@@ -61,7 +105,9 @@ class LLMAgentService:
         - Context Window Optimization
         - Decision Boundary Clarification
         """
-        context_window = self.extract_surrounding_context(text, full_context, 120)
+        context_window = self.extract_surrounding_context(
+            text, full_context, settings.LLM_CONTEXT_WINDOW_CHARS, page_context=page_context, offset=offset
+        )
         
         base_prompt = f'TEXT: "{text}"\nCONTEXT: "{context_window}"\n\n'
         
@@ -238,47 +284,320 @@ Answer: YES (if actual PII) or NO (if form label)"""
         except Exception as e:
             return None, f"GROQ error: {e}"
     
+    def ask_yes_no(self, prompt: str, text: str, category: str, kind: str, max_tokens: int = 10) -> str:
+        """
+        Answer a YES/NO validation prompt, without a network call when possible
+        
+        Order: persistent verdict store, then the distilled local classifier
+        (when confident), then the LLM itself.
+        
+        Args:
+            prompt: The prompt to send if the LLM is needed
+            text: Candidate text the prompt is about
+            category: PII category
+            kind: Prompt family ('agent' or 'name'), part of the classifier features
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            Response content ("YES"/"NO" when answered locally, "" on failure)
+        """
+        template = f"{kind}-{PROMPT_TEMPLATE_VERSION}"
+        stored = self.verdict_store.get(text, category, template) if self.verdict_store else None
+        local = self._answer_locally(text, category, kind, stored)
+        if local is not None:
+            return local
+        
+        response = self.call_groq_api(prompt, max_tokens=max_tokens)
+        verdict = self._parse_yes_no(response)
+        if verdict is not None:
+            if self.verdict_store:
+                self.verdict_store.put(text, category, template, response)
+            self._log_verdict(text, category, kind, verdict)
+        return response
+    
+    async def ask_yes_no_async(self, prompt: str, text: str, category: str, kind: str, max_tokens: int = 10) -> str:
+        """
+        Async variant of ``ask_yes_no``: the LLM call is awaited, store lookups run in a thread
+        
+        Args:
+            prompt: The prompt to send if the LLM is needed
+            text: Candidate text the prompt is about
+            category: PII category
+            kind: Prompt family ('agent' or 'name'), part of the classifier features
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            Response content ("YES"/"NO" when answered locally, "" on failure)
+        """
+        template = f"{kind}-{PROMPT_TEMPLATE_VERSION}"
+        stored = None
+        if self.verdict_store:
+            stored = await asyncio.to_thread(self.verdict_store.get, text, category, template)
+        local = self._answer_locally(text, category, kind, stored)
+        if local is not None:
+            return local
+        
+        response = await self.call_groq_api_async(prompt, max_tokens=max_tokens)
+        verdict = self._parse_yes_no(response)
+        if verdict is not None:
+            if self.verdict_store:
+                await asyncio.to_thread(self.verdict_store.put, text, category, template, response)
+            self._log_verdict(text, category, kind, verdict)
+        return response
+    
+    def _answer_locally(self, text: str, category: str, kind: str, stored: Optional[str]) -> Optional[str]:
+        """Stored verdict, else a confident local classifier answer, else None (ask the LLM)"""
+        if stored is not None:
+            self.stats.llm_store_hits += 1
+            self.stats.llm_calls_avoided += 1
+            return stored
+        
+        if self.local_classifier:
+            verdict, confidence = self.local_classifier.predict(text, category, kind)
+            if confidence >= self.local_threshold:
+                self.stats.llm_local_answers += 1
+                self.stats.llm_calls_avoided += 1
+                logger.debug(f"Local classifier answered {'YES' if verdict else 'NO'} for '{text}' ({confidence:.2f})")
+                return "YES" if verdict else "NO"
+        return None
+    
+    @staticmethod
+    def _parse_yes_no(response: str) -> Optional[bool]:
+        """YES/NO verdict in a response, or None if it has neither"""
+        response_upper = response.upper()
+        if 'YES' in response_upper:
+            return True
+        if 'NO' in response_upper:
+            return False
+        return None
+    
+    def _log_verdict(self, text: str, category: str, kind: str, verdict: bool):
+        """Feed an LLM verdict to the local classifier's training log"""
+        if self.verdict_log:
+            self.verdict_log.record(text, category, kind, verdict)
+    
     def call_groq_api(self, prompt: str, max_tokens: int = 10) -> str:
         """
         Helper method to call GROQ API with error handling
         
+        Calls are subject to the circuit breaker and the per-job time budget;
+        when either refuses, "" is returned immediately so callers fall back to
+        their heuristics instead of waiting out a timeout.
+        
         Args:
             prompt: The prompt to send
             max_tokens: Maximum tokens in response
             
         Returns:
-            API response content
+            API response content ("" on failure)
         """
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+        data = self._request_payload(prompt, max_tokens)
+        for attempt in range(self.max_retries + 1):
+            delay = 0.0
+            if attempt:
+                delay = backoff_with_jitter(attempt, settings.GROQ_RETRY_BACKOFF, settings.GROQ_RETRY_BACKOFF_MAX)
+            timeout = self._reserve_call(delay)
+            if not timeout:
+                break
             
-            data = {
-                "model": self.model,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": max_tokens,
-                "temperature": 0.1
-            }
+            sent = time.monotonic()
+            try:
+                if delay:
+                    time.sleep(delay)
+                    self.stats.llm_retries += 1
+                content = self._post_with_hedge(data, timeout - (time.monotonic() - sent))
+            finally:
+                self.call_budget.release(timeout, time.monotonic() - sent)
+            if content is not None:
+                self.circuit_breaker.record_success()
+                return content
             
-            response = requests.post(self.base_url, headers=headers, json=data, timeout=self.timeout)
+            self.stats.llm_failures += 1
+            self.circuit_breaker.record_failure()
+        
+        return ""
+    
+    async def call_groq_api_async(self, prompt: str, max_tokens: int = 10) -> str:
+        """
+        Async variant of ``call_groq_api`` (same budget, breaker, retry and hedging policies)
+        
+        Args:
+            prompt: The prompt to send
+            max_tokens: Maximum tokens in response
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
-                return content.strip()
-            else:
-                logger.warning(f"GROQ API error: {response.status_code} - {response.text[:100]}")
-                return ""
-                
+        Returns:
+            API response content ("" on failure)
+        """
+        data = self._request_payload(prompt, max_tokens)
+        for attempt in range(self.max_retries + 1):
+            delay = 0.0
+            if attempt:
+                delay = backoff_with_jitter(attempt, settings.GROQ_RETRY_BACKOFF, settings.GROQ_RETRY_BACKOFF_MAX)
+            timeout = self._reserve_call(delay)
+            if not timeout:
+                break
+            
+            sent = time.monotonic()
+            try:
+                if delay:
+                    await asyncio.sleep(delay)
+                    self.stats.llm_retries += 1
+                content = await self._post_with_hedge_async(data, timeout - (time.monotonic() - sent))
+            finally:
+                self.call_budget.release(timeout, time.monotonic() - sent)
+            if content is not None:
+                self.circuit_breaker.record_success()
+                return content
+            
+            self.stats.llm_failures += 1
+            self.circuit_breaker.record_failure()
+        
+        return ""
+    
+    def _reserve_call(self, delay: float = 0.0) -> float:
+        """
+        Reserve one attempt (its backoff delay and timeout) from the job budget, then pass the circuit breaker
+        
+        Args:
+            delay: Backoff to sleep before sending
+            
+        Returns:
+            Seconds reserved for the attempt (released by the caller), or 0 when refused
+        """
+        reserved = self.call_budget.reserve(delay + self.timeout)
+        if reserved <= delay:
+            self.call_budget.release(reserved, 0.0)
+            self.stats.llm_budget_exhausted += 1
+            return 0.0
+        
+        if not self.circuit_breaker.allow_request():
+            self.call_budget.release(reserved, 0.0)
+            self.stats.llm_breaker_rejections += 1
+            return 0.0
+        return reserved
+    
+    def _request_payload(self, prompt: str, max_tokens: int) -> Dict:
+        """Chat completion request body"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.1
+        }
+    
+    def _post_with_hedge(self, data: Dict, timeout: float) -> Optional[str]:
+        """
+        Send the request, hedging with a duplicate if the first is slow
+        
+        Args:
+            data: Request payload
+            timeout: Per-request timeout in seconds
+            
+        Returns:
+            Response content, or None if every request failed
+        """
+        if self.hedge_delay is None or self.hedge_delay >= timeout:
+            return self._post_once(data, timeout)
+        
+        # Each request runs in a copy of the job's context, so stats and budget stay with the job
+        pending = {_HEDGE_POOL.submit(contextvars.copy_context().run, self._post_once, data, timeout)}
+        hedged = False
+        while pending:
+            wait_for = self.hedge_delay if not hedged else None
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                content = future.result()
+                if content is not None:
+                    return content
+            if not hedged:
+                # First request is slow (or already failed): race a duplicate
+                hedged = True
+                self.stats.llm_hedges += 1
+                pending.add(_HEDGE_POOL.submit(contextvars.copy_context().run, self._post_once, data, timeout))
+        return None
+    
+    async def _post_with_hedge_async(self, data: Dict, timeout: float) -> Optional[str]:
+        """Async variant of ``_post_with_hedge``; the losing request is cancelled"""
+        if self.hedge_delay is None or self.hedge_delay >= timeout:
+            return await self._post_once_async(data, timeout)
+        
+        pending = {asyncio.ensure_future(self._post_once_async(data, timeout))}
+        hedged = False
+        try:
+            while pending:
+                wait_for = self.hedge_delay if not hedged else None
+                done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    content = task.result()
+                    if content is not None:
+                        return content
+                if not hedged:
+                    hedged = True
+                    self.stats.llm_hedges += 1
+                    pending.add(asyncio.ensure_future(self._post_once_async(data, timeout)))
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _post_once(self, data: Dict, timeout: float) -> Optional[str]:
+        """Single request to the GROQ endpoint through the configured transport; None on any failure"""
+        try:
+            self.stats.llm_calls_made += 1
+            response = self.transport.post(self.base_url, self._headers(), data, timeout)
+            return self._response_content(response)
         except Exception as e:
             logger.warning(f"GROQ API call failed: {e}")
-            return ""
+            return None
     
-    def extract_surrounding_context(self, target_text: str, full_text: str, window_size: int = 100) -> str:
+    async def _post_once_async(self, data: Dict, timeout: float) -> Optional[str]:
+        """Single awaited request through the configured transport; None on any failure"""
+        try:
+            self.stats.llm_calls_made += 1
+            response = await self.transport.post_async(self.base_url, self._headers(), data, timeout)
+            return self._response_content(response)
+        except Exception as e:
+            logger.warning(f"GROQ API call failed: {e}")
+            return None
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    @staticmethod
+    def _response_content(response) -> Optional[str]:
+        """Message content of a successful response, None (logged) otherwise"""
+        if response.status_code == 200:
+            result = response.json()
+            content = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+            return content.strip()
+        logger.warning(f"GROQ API error: {response.status_code} - {response.text[:100]}")
+        return None
+    
+    def start_job(self):
+        """Reset the per-job LLM time budget"""
+        self.call_budget = LLMCallBudget(settings.GROQ_JOB_TIME_BUDGET)
+    
+    def get_metrics(self) -> Dict:
+        """LLM client metrics: circuit breaker state/transitions and verdict store counters"""
+        metrics = {
+            'transport': self.transport.mode,
+            'circuit_breaker': self.circuit_breaker.get_metrics(),
+            'job_budget': {
+                'budget_seconds': self.call_budget.budget_seconds,
+                'spent_seconds': round(self.call_budget.spent, 3)
+            }
+        }
+        if self.verdict_store:
+            metrics['verdict_store'] = self.verdict_store.get_stats()
+        return metrics
+    
+    def extract_surrounding_context(self, target_text: str, full_text: str, window_size: int = 100,
+                                    page_context: Optional[PageContext] = None, offset: Optional[int] = None) -> str:
         """
         Extract surrounding context around target text for better analysis
         
@@ -286,10 +605,16 @@ Answer: YES (if actual PII) or NO (if form label)"""
             target_text: Text to find context for
             full_text: Full document text
             window_size: Size of context window
+            page_context: Optional page context; when given, the window is read from the
+                candidate's actual offset in O(window) and trimmed to the token budget
+            offset: Optional offset of this candidate in the page text
             
         Returns:
             Context string
         """
+        if page_context is not None:
+            return page_context.context_window(target_text, offset, window_size, settings.LLM_CONTEXT_TOKEN_BUDGET)
+        
         try:
             target_pos = full_text.lower().find(target_text.lower())
             if target_pos == -1:
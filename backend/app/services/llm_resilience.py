@@ -0,0 +1,146 @@
+"""
+Resilience policies for LLM calls: circuit breaker and per-job time budget
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    CLOSED: calls flow normally. After ``failure_threshold`` consecutive
+    failures the breaker trips to OPEN and calls are rejected immediately so
+    callers use their heuristic fallback. After ``reset_timeout`` seconds one
+    trial call is let through (HALF_OPEN); success closes the breaker,
+    failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.transitions: Dict[str, int] = {}
+        self.recent_transitions = deque(maxlen=50)
+        self.rejected = 0
+
+    def _transition(self, new_state: str):
+        """Move to a new state and record the transition (lock held)"""
+        if new_state == self.state:
+            return
+        name = f"{self.state}->{new_state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self.recent_transitions.append({'transition': name, 'at': time.time()})
+        logger.warning(f"LLM circuit breaker: {name} after {self.consecutive_failures} consecutive failures")
+        self.state = new_state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Record a failed call, tripping the breaker when the threshold is reached"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current state and transition counters"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'rejected_calls': self.rejected,
+                'transitions': dict(self.transitions),
+                'recent_transitions': list(self.recent_transitions)
+            }
+
+
+class LLMCallBudget:
+    """
+    Total wall-clock time a single job may spend waiting on the LLM
+
+    Time is reserved before a call is sent and the unused part released when
+    it returns, so concurrent calls of one job (pipeline workers, async pages)
+    cannot together wait longer than the budget.
+    """
+
+    def __init__(self, budget_seconds: Optional[float]):
+        self.budget_seconds = budget_seconds
+        self.spent = 0.0
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Seconds neither spent nor reserved (infinite when no budget is configured)"""
+        if self.budget_seconds is None:
+            return float('inf')
+        with self._lock:
+            return max(0.0, self.budget_seconds - self.spent - self.reserved)
+
+    def reserve(self, seconds: float) -> float:
+        """
+        Reserve time for a call before sending it
+
+        Args:
+            seconds: Time the call may take at most (its timeout)
+
+        Returns:
+            Seconds granted: ``seconds`` capped by what is left, 0 when the budget is spent
+        """
+        with self._lock:
+            if self.budget_seconds is not None:
+                seconds = max(0.0, min(seconds, self.budget_seconds - self.spent - self.reserved))
+            self.reserved += seconds
+            return seconds
+
+    def release(self, reserved: float, used: float):
+        """Settle a reservation: charge the time used, return the rest"""
+        with self._lock:
+            self.reserved -= reserved
+            self.spent += min(used, reserved)
+
+
+def backoff_with_jitter(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff delay for a retry attempt (1-based)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
@@ -0,0 +1,249 @@
+"""
+Pluggable HTTP transports for the LLM client: live, record and replay
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Callable
+
+import httpx
+import requests
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransportResponse:
+    """Minimal HTTP response handed back to the LLM client"""
+    status_code: int
+    body: Dict = field(default_factory=dict)
+    text: str = ""
+
+    def json(self) -> Dict:
+        return self.body
+
+
+def request_key(payload: Dict) -> str:
+    """Stable key for a request payload (credentials are never part of it)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def parse_latency_spec(spec: Optional[str], seed: int = 0) -> Optional[Callable[[float], float]]:
+    """
+    Parse an injected latency distribution
+
+    Supported specs (seconds): "none", "recorded", "fixed:0.2", "uniform:0.1,0.4",
+    "normal:0.25,0.05", "lognormal:-1.5,0.4". Sampling is seeded so replays are
+    reproducible.
+
+    Returns:
+        Function mapping the recorded latency to the latency to inject, or None for no delay
+    """
+    if not spec or spec == 'none':
+        return None
+    if spec == 'recorded':
+        return lambda recorded: recorded
+
+    rng = random.Random(seed)
+    kind, _, raw_params = spec.partition(':')
+    params = [float(p) for p in raw_params.split(',') if p]
+    if kind == 'fixed':
+        return lambda recorded: params[0]
+    if kind == 'uniform':
+        return lambda recorded: rng.uniform(params[0], params[1])
+    if kind == 'normal':
+        return lambda recorded: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == 'lognormal':
+        return lambda recorded: rng.lognormvariate(params[0], params[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class LiveTransport:
+    """
+    Send requests to the real endpoint
+
+    ``post`` blocks the calling thread; ``post_async`` is awaited on the event
+    loop through a pooled httpx client, so many in-flight calls need no threads.
+    """
+
+    mode = "live"
+
+    def __init__(self):
+        self._async_client = None
+        self._async_loop = None
+
+    def post(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+        return self._to_response(response)
+
+    async def post_async(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        response = await self._get_async_client().post(url, headers=headers, json=payload, timeout=timeout)
+        return self._to_response(response)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """One connection pool per event loop (clients cannot move between loops)"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=settings.LLM_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_ASYNC_MAX_CONNECTIONS
+            ))
+            self._async_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _to_response(response) -> TransportResponse:
+        """requests and httpx responses share the attributes used here"""
+        try:
+            body = response.json() if response.status_code == 200 else {}
+        except ValueError:
+            body = {}
+        return TransportResponse(response.status_code, body, response.text)
+
+
+class RecordingTransport:
+    """Forward to another transport and append every exchange to a JSONL file"""
+
+    mode = "record"
+
+    def __init__(self, path: str, inner: Optional[LiveTransport] = None):
+        self.path = path
+        self.inner = inner or LiveTransport()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def post(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        start = time.monotonic()
+        try:
+            response = self.inner.post(url, headers, payload, timeout)
+        except requests.Timeout:
+            # Recorded so the replay reproduces the failure (as a timeout-equivalent status)
+            response = TransportResponse(408, {}, "timeout")
+        self._record(payload, response, time.monotonic() - start)
+        return response
+
+    async def post_async(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        start = time.monotonic()
+        try:
+            response = await self.inner.post_async(url, headers, payload, timeout)
+        except httpx.TimeoutException:
+            response = TransportResponse(408, {}, "timeout")
+        self._record(payload, response, time.monotonic() - start)
+        return response
+
+    def _record(self, payload: Dict, response: TransportResponse, latency: float):
+        """Append one exchange to the recording"""
+        entry = {
+            'key': request_key(payload),
+            'status_code': response.status_code,
+            'body': response.body,
+            'text': response.text[:200],
+            'latency': round(latency, 4)
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry) + '\n')
+
+
+class ReplayTransport:
+    """
+    Answer from a recording, never touching the network
+
+    Repeated identical requests are answered in recorded order, so a replayed
+    run sees exactly the responses of the recorded run.
+    """
+
+    mode = "replay"
+
+    def __init__(self, path: str, latency_spec: Optional[str] = None, seed: int = 0):
+        self.path = path
+        self.latency = parse_latency_spec(latency_spec, seed)
+        self.recordings: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.misses = 0
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.recordings.setdefault(entry['key'], []).append(entry)
+        logger.info(f"Replay transport loaded {sum(len(v) for v in self.recordings.values())} recorded LLM responses")
+
+    def post(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        entry = self._next_entry(payload)
+        if entry is None:
+            return TransportResponse(404, {}, "request not in recording")
+
+        if self.latency:
+            delay = self.latency(entry.get('latency', 0.0))
+            if delay > timeout:
+                time.sleep(timeout)
+                raise requests.Timeout(f"Replayed latency {delay:.2f}s exceeds timeout {timeout:.2f}s")
+            time.sleep(delay)
+
+        return TransportResponse(entry['status_code'], entry.get('body', {}), entry.get('text', ''))
+
+    async def post_async(self, url: str, headers: Dict, payload: Dict, timeout: float) -> TransportResponse:
+        entry = self._next_entry(payload)
+        if entry is None:
+            return TransportResponse(404, {}, "request not in recording")
+
+        if self.latency:
+            delay = self.latency(entry.get('latency', 0.0))
+            if delay > timeout:
+                await asyncio.sleep(timeout)
+                raise httpx.ReadTimeout(f"Replayed latency {delay:.2f}s exceeds timeout {timeout:.2f}s")
+            await asyncio.sleep(delay)
+
+        return TransportResponse(entry['status_code'], entry.get('body', {}), entry.get('text', ''))
+
+    def _next_entry(self, payload: Dict) -> Optional[Dict]:
+        """Next recorded response for this request, or None if it was never recorded"""
+        key = request_key(payload)
+        with self._lock:
+            entries = self.recordings.get(key)
+            if not entries:
+                self.misses += 1
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+
+def create_transport(mode: str = None, path: str = None, latency_spec: str = None):
+    """
+    Build the LLM transport selected in settings
+
+    Args:
+        mode: "live", "record" or "replay" (default: settings.LLM_TRANSPORT_MODE)
+        path: Recording file (default: settings.LLM_TRANSPORT_PATH)
+        latency_spec: Injected latency for replay (default: settings.LLM_REPLAY_LATENCY)
+
+    Returns:
+        Transport instance with ``post`` and ``post_async`` methods
+    """
+    mode = mode or settings.LLM_TRANSPORT_MODE
+    path = path or settings.LLM_TRANSPORT_PATH
+    if mode == "live":
+        return LiveTransport()
+    if mode == "record":
+        return RecordingTransport(path)
+    if mode == "replay":
+        return ReplayTransport(path, latency_spec if latency_spec is not None else settings.LLM_REPLAY_LATENCY)
+    raise ValueError(f"Unknown LLM transport mode: {mode}")
@@ -2,33 +2,58 @@
 OCR Service for text extraction from images and PDFs
 """
 
-import io
-import fitz
 import pytesseract
 from PIL import Image
 from typing import List, Tuple, Optional
 import logging
 
 from ..core.config import settings
+from ..models.page import WordBox
+from ..utils.images import pil_image
+from .raster_cache import RasterCacheService
 
 logger = logging.getLogger(__name__)
 
 class OCRService:
     """OCR service for text extraction"""
     
-    def __init__(self):
+    def __init__(self, raster_cache: RasterCacheService = None):
         self.confidence_threshold = settings.OCR_CONFIDENCE_THRESHOLD
+        self.raster_cache = raster_cache if raster_cache is not None else RasterCacheService()
         logger.info("OCR Service initialized")
     
     def extract_text_from_page(self, page) -> Tuple[List, str]:
         """Extract text from a PDF page using OCR"""
+        img, scale = self.render_page_image(page)
+        if img is None:
+            return [], ""
+        return self.ocr_image(img, scale)
+    
+    def render_page_image(self, page) -> Tuple[Optional[Image.Image], float]:
+        """
+        Rasterize a PDF page for OCR (the only step that touches the document)
+        
+        Pages over the pixel budget at ``PDF_SCALE_FACTOR`` are rendered at
+        the largest scale that fits it.
+        
+        Returns:
+            Tuple of (page image, or None if rendering failed, and its scale)
+        """
+        scale = self.raster_cache.fit_scale(page.rect, settings.PDF_SCALE_FACTOR)
         try:
             logger.debug("Converting PDF page to image for OCR")
-            mat = fitz.Matrix(settings.PDF_SCALE_FACTOR, settings.PDF_SCALE_FACTOR)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("png")
-            img = Image.open(io.BytesIO(img_data))
-            
+            # Cached: redaction reuses the raster instead of rendering the page again
+            pix = self.raster_cache.get(page, scale)
+            # Outlives the pixmap (OCR runs later, outside the page lock): copy, don't encode
+            return pil_image(pix), scale
+        except Exception as e:
+            logger.error(f"OCR failed: {e}")
+            return None, scale
+    
+    def ocr_image(self, img: Image.Image, scale: float = None) -> Tuple[List, str]:
+        """Run Tesseract on a rendered page; word boxes are returned in page coordinates"""
+        scale = scale or settings.PDF_SCALE_FACTOR
+        try:
             logger.debug("Running Tesseract OCR")
             ocr_text = pytesseract.image_to_string(img)
             ocr_data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
@@ -37,11 +62,11 @@ class OCRService:
             for i in range(len(ocr_data["text"])):
                 word = ocr_data["text"][i].strip()
                 if word and ocr_data["conf"][i] > self.confidence_threshold:
-                    x = ocr_data["left"][i] / settings.PDF_SCALE_FACTOR
-                    y = ocr_data["top"][i] / settings.PDF_SCALE_FACTOR
-                    w = ocr_data["width"][i] / settings.PDF_SCALE_FACTOR
-                    h = ocr_data["height"][i] / settings.PDF_SCALE_FACTOR
-                    words.append([x, y, x + w, y + h, word])
+                    x = ocr_data["left"][i] / scale
+                    y = ocr_data["top"][i] / scale
+                    w = ocr_data["width"][i] / scale
+                    h = ocr_data["height"][i] / scale
+                    words.append(WordBox(x, y, x + w, y + h, word))
             
             return words, ocr_text
             
@@ -0,0 +1,206 @@
+"""
+Page Pipeline: staged producer/consumer execution with bounded queues
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# MuPDF is not thread-safe: every stage touching a document or page holds this lock
+mupdf_lock = threading.RLock()
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage
+
+    ``handler`` maps a work item to the item passed downstream. An ``ordered``
+    stage receives items in input order; it runs on a single worker, for steps
+    that must see pages in sequence.
+    """
+    name: str
+    handler: Callable[[Any], Any]
+    workers: int = 1
+    ordered: bool = False
+
+
+@dataclass
+class StageMetrics:
+    """Per-run load of one stage"""
+    workers: int
+    items: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    queue_samples: int = 0
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        capacity = self.workers * wall_seconds
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'busy_seconds': round(self.busy_seconds, 4),
+            'utilisation': round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+            'max_queue_depth': self.max_queue_depth,
+            'mean_queue_depth': round(self.queue_depth_total / self.queue_samples, 2) if self.queue_samples else 0.0
+        }
+
+
+class StagePipeline:
+    """
+    Run work items through a chain of stages, each with its own worker threads
+
+    Stages are connected by bounded queues, so a slow stage applies
+    back-pressure instead of letting finished work pile up, while different
+    items occupy different stages at the same time. Results come back in input
+    order. The first handler error stops the run and is re-raised to the caller.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        self.stages = [
+            Stage(stage.name, stage.handler, 1 if stage.ordered else max(1, stage.workers), stage.ordered)
+            for stage in stages
+        ]
+        self.queue_size = max(1, queue_size)
+        self.metrics: Dict[str, StageMetrics] = {}
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, items: Iterable) -> Iterator:
+        """
+        Feed items through every stage
+
+        Args:
+            items: Work items, consumed lazily by a feeder thread
+
+        Yields:
+            Final stage results, in input order
+        """
+        self.metrics = {stage.name: StageMetrics(stage.workers) for stage in self.stages}
+        self._failed.clear()
+        self._error = None
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        remaining = [stage.workers for stage in self.stages]
+
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), name="pipeline-feed", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(index, queues, remaining),
+                    name=f"pipeline-{stage.name}-{worker}", daemon=True
+                ))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        pending: Dict[int, Any] = {}
+        next_index = 0
+        item = None
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    break
+                index, result = item
+                pending[index] = result
+                while next_index in pending and not self._failed.is_set():
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            # Stop early (error or abandoned iteration): workers drain and discard
+            if item is not _DONE:
+                self._failed.set()
+                while queues[-1].get() is not _DONE:
+                    pass
+            for thread in threads:
+                thread.join()
+            self.wall_seconds = time.perf_counter() - start
+
+        if self._error is not None:
+            raise self._error
+
+    def _feed(self, items: Iterable, inbox: queue.Queue):
+        """Push items into the first stage, then one end marker per worker"""
+        try:
+            for index, item in enumerate(items):
+                if self._failed.is_set():
+                    break
+                inbox.put((index, item))
+        except BaseException as e:
+            self._fail(e)
+        for _ in range(self.stages[0].workers):
+            inbox.put(_DONE)
+
+    def _work(self, index: int, queues: List[queue.Queue], remaining: List[int]):
+        """Worker loop of one stage"""
+        stage = self.stages[index]
+        inbox, outbox = queues[index], queues[index + 1]
+        metrics = self.metrics[stage.name]
+        reorder: Dict[int, Any] = {}
+        next_index = 0
+
+        while True:
+            depth = inbox.qsize()
+            item = inbox.get()
+            if item is _DONE:
+                break
+            with self._lock:
+                metrics.max_queue_depth = max(metrics.max_queue_depth, depth)
+                metrics.queue_depth_total += depth
+                metrics.queue_samples += 1
+
+            if stage.ordered:
+                reorder[item[0]] = item[1]
+                while next_index in reorder:
+                    self._handle(stage, metrics, next_index, reorder.pop(next_index), outbox)
+                    next_index += 1
+            else:
+                self._handle(stage, metrics, item[0], item[1], outbox)
+
+        with self._lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last:
+            following = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            for _ in range(following):
+                outbox.put(_DONE)
+
+    def _handle(self, stage: Stage, metrics: StageMetrics, item_index: int, payload: Any, outbox: queue.Queue):
+        """Run the handler on one item and pass the result downstream"""
+        if self._failed.is_set():
+            return
+        start = time.perf_counter()
+        try:
+            result = stage.handler(payload)
+        except BaseException as e:
+            self._fail(e, stage.name)
+            return
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                metrics.items += 1
+                metrics.busy_seconds += elapsed
+        outbox.put((item_index, result))
+
+    def _fail(self, error: BaseException, stage_name: str = "feed"):
+        """Record the first error and stop the run"""
+        with self._lock:
+            if self._error is None:
+                self._error = error
+                logger.error(f"Pipeline stage '{stage_name}' failed: {error}")
+        self._failed.set()
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage items, utilisation and queue depth of the last run"""
+        return {name: metrics.to_dict(self.wall_seconds) for name, metrics in self.metrics.items()}
@@ -0,0 +1,239 @@
+"""
+Pattern Executor Service: budgeted regex execution with per-pattern profiling
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STARVED_RETRIES = 6  # reruns of a search that timed out without getting the CPU for it
+
+try:
+    import regex as _regex  # Optional: allows a hard timeout inside a single search
+except ImportError:
+    _regex = None
+
+
+@dataclass
+class PatternProfile:
+    """Accumulated execution profile of one detection pattern"""
+    category: str
+    pattern_index: int
+    pattern: str
+    runs: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    max_page: Optional[int] = None
+    matches: int = 0
+    oversized_matches: int = 0
+    budget_hits: int = 0
+    timeouts: int = 0  # pages whose search was cut off by the hard timeout
+    # (page_num, milliseconds, matches) of the most recent runs
+    recent_pages: deque = field(default_factory=lambda: deque(maxlen=20))
+
+    def to_dict(self, slow_ms: float) -> Dict:
+        """Report entry, including the reasons this pattern is flagged (if any)"""
+        flags = []
+        if self.budget_hits:
+            flags.append('budget_exceeded')
+        if self.timeouts:
+            flags.append('timed_out')
+        if self.max_seconds * 1000 >= slow_ms:
+            flags.append('slow')
+        if self.matches >= 10 and self.oversized_matches / self.matches >= 0.25:
+            flags.append('oversized_matches')
+
+        return {
+            'category': self.category,
+            'pattern_index': self.pattern_index,
+            'pattern': self.pattern,
+            'runs': self.runs,
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'mean_ms': round(self.total_seconds * 1000 / self.runs, 3) if self.runs else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 3),
+            'max_page': self.max_page,
+            'matches': self.matches,
+            'oversized_matches': self.oversized_matches,
+            'budget_hits': self.budget_hits,
+            'timeouts': self.timeouts,
+            'recent_pages': [
+                {'page': page, 'ms': round(ms, 3), 'matches': matches}
+                for page, ms, matches in self.recent_pages
+            ],
+            'flags': flags
+        }
+
+
+class PatternExecutorService:
+    """
+    Run detection patterns under a per-pattern, per-page time budget
+
+    Matches are consumed lazily and only regex time is accounted: each
+    search call is timed separately, so callers' validation between matches
+    is excluded. With the optional ``regex`` module installed a single
+    runaway search is interrupted and the pattern stops for the rest of the
+    page, so catastrophic backtracking costs at most the budget; without it
+    the budget is only reported. Either way a pattern whose searches total
+    more than the budget on a page is flagged. Matches longer than
+    ``max_match_chars`` are yielded like any other (validation rejects them)
+    and counted, so patterns that mostly match runaway spans are flagged.
+    """
+
+    def __init__(self, time_budget_ms: float = None, slow_ms: float = None, max_match_chars: int = None):
+        self.time_budget = (time_budget_ms if time_budget_ms is not None else settings.PATTERN_TIME_BUDGET_MS) / 1000.0
+        self.slow_ms = slow_ms if slow_ms is not None else settings.PATTERN_SLOW_MS
+        self.max_match_chars = max_match_chars if max_match_chars is not None else settings.PATTERN_MAX_MATCH_CHARS
+        self.hard_timeout = _regex is not None
+
+        self._compiled: Dict[str, object] = {}
+        self._profiles: Dict[Tuple[str, int], PatternProfile] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Pattern Executor Service initialized (budget {self.time_budget * 1000:.0f}ms per pattern per page, "
+                    f"{'hard per-search timeout' if self.hard_timeout else 'reported only'})")
+
+    def _compile(self, pattern: str):
+        """Compile once per pattern string, with the budgeted engine when available"""
+        compiled = self._compiled.get(pattern)
+        if compiled is None:
+            engine = _regex if self.hard_timeout else re
+            compiled = self._compiled[pattern] = engine.compile(pattern, engine.IGNORECASE)
+        return compiled
+
+    def finditer(self, category: str, pattern_index: int, pattern: str, text: str,
+                 page_num: Optional[int] = None) -> Iterator:
+        """
+        Budgeted, profiled equivalent of ``re.finditer(pattern, text, re.IGNORECASE)``
+
+        Each search call is timed on its own, so neither the caller's work
+        between matches nor time other threads hold the CPU between searches
+        counts against the pattern. A single search running past the budget
+        (``regex`` hard timeout) ends the pattern's run on this page: matches
+        found before it are kept, the rest of the page is not searched, and
+        the timeout is recorded as a budget overrun. A page total over the
+        budget is reported as well.
+
+        Args:
+            category: PII category the pattern belongs to
+            pattern_index: Index of the pattern within its category
+            pattern: Regex source
+            text: Page text
+            page_num: Page number, recorded in the profile
+
+        Yields:
+            Match objects, in order
+        """
+        compiled = self._compile(pattern)
+        timeout = self.time_budget if self.hard_timeout else None
+
+        spent = 0.0
+        matches = 0
+        oversized = 0
+        timed_out = False
+        pos = 0
+        try:
+            while pos <= len(text):
+                start = time.perf_counter()
+                try:
+                    if timeout is not None:
+                        match, timed_out = self._timed_search(compiled, text, pos, timeout)
+                    else:
+                        match = compiled.search(text, pos)
+                finally:
+                    spent += time.perf_counter() - start
+                if match is None:
+                    # After a timeout, searching on would rerun the same backtracking
+                    break
+                # An empty match advances one character, as finditer does
+                pos = match.end() if match.end() > match.start() else match.end() + 1
+
+                matches += 1
+                group = 1 if match.groups() else 0
+                if len((match.group(group) or '').strip()) > self.max_match_chars:
+                    oversized += 1
+                yield match
+        finally:
+            self._record(category, pattern_index, pattern, page_num, spent, matches, oversized,
+                         timed_out or spent > self.time_budget, timed_out)
+
+    @staticmethod
+    def _timed_search(compiled, text: str, pos: int, timeout: float) -> Tuple[Optional[object], bool]:
+        """
+        One search under the hard timeout: (match or None, whether it timed out)
+
+        The timeout is wall-clock and ``regex`` releases the GIL while it
+        searches, so a search starved of the CPU by other threads can hit it
+        having done little work. A timeout only counts once the search has
+        used the budget in CPU time over its attempts; until then it is
+        retried with a doubled timeout (a bounded number of times), so a
+        runaway search stops after about three budgets.
+        """
+        cpu_used = 0.0
+        attempt_timeout = timeout
+        for attempt in range(_STARVED_RETRIES + 1):
+            cpu_start = time.thread_time()
+            try:
+                return compiled.search(text, pos, timeout=attempt_timeout), False
+            except TimeoutError:
+                cpu_used += time.thread_time() - cpu_start
+                if cpu_used >= timeout:
+                    break
+                attempt_timeout *= 2
+        return None, True
+
+    def _record(self, category: str, pattern_index: int, pattern: str, page_num: Optional[int],
+                spent: float, matches: int, oversized: int, exceeded: bool, timed_out: bool = False):
+        """Fold one run into the pattern's profile"""
+        if timed_out:
+            logger.warning(f"Pattern {category}[{pattern_index}] timed out after {self.time_budget * 1000:.0f}ms "
+                           f"on page {page_num}; rest of the page not searched ({matches} matches before it)")
+        elif exceeded:
+            logger.warning(f"Pattern {category}[{pattern_index}] exceeded its {self.time_budget * 1000:.0f}ms budget "
+                           f"on page {page_num} ({spent * 1000:.1f}ms, {matches} matches)")
+        with self._lock:
+            key = (category, pattern_index)
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = PatternProfile(category, pattern_index, pattern)
+                self._profiles[key] = profile
+            profile.runs += 1
+            profile.total_seconds += spent
+            if spent > profile.max_seconds:
+                profile.max_seconds = spent
+                profile.max_page = page_num
+            profile.matches += matches
+            profile.oversized_matches += oversized
+            profile.budget_hits += int(exceeded)
+            profile.timeouts += int(timed_out)
+            profile.recent_pages.append((page_num, spent * 1000, matches))
+
+    def get_report(self) -> Dict:
+        """
+        Per-pattern profile, slowest first, with pathological patterns flagged
+
+        Returns:
+            Dictionary with settings, all pattern profiles and the flagged subset
+        """
+        with self._lock:
+            entries = [profile.to_dict(self.slow_ms) for profile in self._profiles.values()]
+        entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return {
+            'time_budget_ms': self.time_budget * 1000,
+            'slow_threshold_ms': self.slow_ms,
+            'max_match_chars': self.max_match_chars,
+            'hard_timeout': self.hard_timeout,
+            'patterns': entries,
+            'flagged': [entry for entry in entries if entry['flags']]
+        }
+
+    def reset(self):
+        """Clear accumulated profiles"""
+        with self._lock:
+            self._profiles.clear()
@@ -2,11 +2,13 @@
 PII Detection Service with enhanced pattern matching
 """
 
-import re
 import time
 from typing import List, Dict, Tuple, Set, Optional
 import logging
 
+from ..models.job import DetectionResult
+from .pattern_executor import PatternExecutorService
+
 logger = logging.getLogger(__name__)
 
 class PIIDetectionService:
@@ -15,6 +17,7 @@ class PIIDetectionService:
     def __init__(self):
         self.setup_detection_patterns()
         self.setup_exclusion_rules()
+        self.pattern_executor = PatternExecutorService()
         logger.info("PII Detection Service initialized")
     
     def setup_detection_patterns(self):
@@ -247,16 +250,17 @@ class PIIDetectionService:
             'simplifying', 'process'
         }
     
-    def detect_pii(self, text: str, words: List) -> List[Dict]:
+    def detect_pii(self, text: str, words: List, page_num: Optional[int] = None) -> List[DetectionResult]:
         """
         Detect PII in text content
         
         Args:
             text: Full text content
             words: List of word objects with coordinates
+            page_num: Optional page number for pattern profiling
             
         Returns:
-            List of detection dictionaries
+            List of DetectionResult records
         """
         logger.info("Starting comprehensive PII detection")
         
@@ -270,14 +274,13 @@ class PIIDetectionService:
                 logger.debug(f"Pattern {pattern_idx + 1}/{len(patterns)}: {pattern[:60]}...")
                 
                 try:
-                    matches = list(re.finditer(pattern, text, re.IGNORECASE))
-                    
-                    if matches:
-                        logger.debug(f"Found {len(matches)} raw matches")
+                    matches = self.pattern_executor.finditer(category, pattern_idx, pattern, text, page_num)
                     
-                    for match_idx, match in enumerate(matches):
-                        match_text = match.group(1) if match.groups() else match.group()
-                        match_text = match_text.strip()
+                    for match in matches:
+                        group = 1 if match.groups() else 0
+                        raw_text = match.group(group)
+                        match_text = raw_text.strip()
+                        offset = match.start(group) + (len(raw_text) - len(raw_text.lstrip()))
                         
                         logger.debug(f"Analyzing match: '{match_text}'")
                         
@@ -289,13 +292,15 @@ class PIIDetectionService:
                             continue
                         
                         # Create detection
-                        detection = {
-                            'text': match_text,
-                            'category': category,
-                            'pattern_index': pattern_idx,
-                            'confidence': 0.9,
-                            'method': 'PATTERN_MATCH'
-                        }
+                        detection = DetectionResult(
+                            text=match_text,
+                            category=category,
+                            confidence=0.9,
+                            method='PATTERN_MATCH',
+                            page_num=page_num or 0,
+                            pattern_index=pattern_idx,
+                            offset=offset
+                        )
                         
                         all_detections.append(detection)
                         category_detections += 1
@@ -2,43 +2,89 @@
 Main PII Processor Service that orchestrates all other services
 """
 
+import os
 import time
 import fitz
+import asyncio
 import logging
+import functools
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple
 
 from .ocr_service import OCRService
+from .raster_cache import RasterCacheService
 from .pii_detection import PIIDetectionService
 from .llm_agent import LLMAgentService
 from .coordinate_mapper import CoordinateMapperService
 from .redaction_engine import RedactionEngineService
+from .leak_verifier import LeakVerifierService, LEAK_CHECK_FAIL
 from .image_detection import ImageDetectionService
 from .job_manager import JobManagerService
 from .prompt_interpreter import PromptInterpreterService
-from ..models.job import ProcessingStats
+from .candidate_scorer import CandidateScorerService
+from .candidate_cluster import CandidateClusterService
+from .detector_registry import DetectorRegistry, PageInput
+from .page_pipeline import Stage, StagePipeline, mupdf_lock
+from .job_context import JobLocal, job_scope
+from .detectors import (
+    RegexDetector, ChecksumDetector, DictionaryDetector, NERDetector, ImageDetector, OCRRegionDetector
+)
+from ..core.config import settings
+from ..models.job import DetectionResult, ProcessingStats
+from ..models.page import PageWork, to_word_boxes
 
 logger = logging.getLogger(__name__)
 
 class PIIProcessorService:
     """Main service that orchestrates PII detection and redaction"""
     
+    # Per job, so concurrent async jobs on one processor keep their own
+    stats = JobLocal()
+    current_job_id = JobLocal()
+    
     def __init__(self):
         # Initialize all services
-        self.ocr_service = OCRService()
+        self.raster_cache = RasterCacheService()
+        self.ocr_service = OCRService(self.raster_cache)
         self.pii_detection = PIIDetectionService()
         self.llm_agent = LLMAgentService()
         self.coordinate_mapper = CoordinateMapperService()
-        self.redaction_engine = RedactionEngineService()
+        self.redaction_engine = RedactionEngineService(raster_cache=self.raster_cache)
+        self.leak_verifier = LeakVerifierService(render_pool=self.redaction_engine.render_pool)
         self.image_detection = ImageDetectionService()
         self.job_manager = JobManagerService()
-        self.prompt_interpreter = PromptInterpreterService(self.llm_agent)
+        self.candidate_scorer = CandidateScorerService()
+        self.candidate_clusters = CandidateClusterService(self.candidate_scorer)
+        self.prompt_interpreter = PromptInterpreterService(self.llm_agent, self.candidate_scorer, self.candidate_clusters)
+        self.detector_registry = self._build_detector_registry()
         
         # Processing stats
         self.stats = ProcessingStats()
         self.current_job_id = None
         
+        # Blocking MuPDF, Tesseract and file work of async jobs (created on first use)
+        self._executor = None
+        
         logger.info("PII Processor Service initialized with all sub-services")
     
+    def _build_detector_registry(self) -> DetectorRegistry:
+        """Register the standard detectors, enabling those listed in settings"""
+        registry = DetectorRegistry()
+        detectors = [
+            RegexDetector(self.pii_detection, self.prompt_interpreter),
+            ChecksumDetector(self.prompt_interpreter),
+            DictionaryDetector(self.prompt_interpreter),
+            NERDetector(self.prompt_interpreter),
+            ImageDetector(self.image_detection),
+            OCRRegionDetector(self.pii_detection, self.prompt_interpreter, self.coordinate_mapper,
+                              raster_cache=self.raster_cache),
+        ]
+        for detector in detectors:
+            registry.register(detector, enabled=detector.name in settings.DETECTORS_ENABLED)
+        return registry
+    
     def process_document(self, pdf_path: str, output_path: str, job_id: str = None, redaction_prompt: str = "hide all personal information") -> Dict[str, Any]:
         """
         Process document with ultra-detailed logging and comprehensive PII detection
@@ -51,18 +97,7 @@ class PIIProcessorService:
         Returns:
             Processing results dictionary
         """
-        self.current_job_id = job_id
-        self.stats = ProcessingStats()  # Reset stats
-        
-        logger.info("STARTING PROMPT-BASED PII PROCESSING 🚀")
-        logger.info(f"Input file: {pdf_path}")
-        logger.info(f"Output file: {output_path}")
-        logger.info(f"Redaction prompt: '{redaction_prompt}'")
-        
-        # Parse user's redaction preferences
-        redaction_rules = self.prompt_interpreter.parse_redaction_prompt(redaction_prompt)
-        logger.info(f"Parsed redaction rules: {redaction_rules}")
-        
+        redaction_rules = self._start_job(pdf_path, output_path, job_id, redaction_prompt)
         start_time = time.time()
         
         try:
@@ -73,105 +108,418 @@ class PIIProcessorService:
             logger.info("Loading PDF document")
             doc = fitz.open(pdf_path)
             logger.info(f"PDF opened successfully: {len(doc)} pages")
+            self._count_document_words(doc)
             
-            all_detections = []
-            
-            # Process each page
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                logger.info(f"Processing page {page_num + 1}/{len(doc)}")
+            if settings.PIPELINE_MODE == "staged":
+                all_detections, redaction_result, pipeline_metrics = self._process_pages_staged(
+                    doc, redaction_rules, output_path)
+            else:
+                all_detections = self._detect_pages_serial(doc, redaction_rules)
+                pipeline_metrics = None
                 
                 # Update job progress
-                page_progress = 20 + (page_num / len(doc)) * 60  # 20-80% for page processing
-                self._update_job_progress(int(page_progress), f"Processing page {page_num + 1}/{len(doc)}")
-                
-                # Extract text from this page
-                words, full_text, extraction_stats = self._extract_text_comprehensive(page)
-                
-                # Detect PII on this page
-                text_detections = self._detect_pii_with_rules(full_text, words, redaction_rules)
+                self._update_job_progress(85, "Applying redactions")
                 
-                # Detect images on this page
-                image_detections = self.image_detection.detect_images(page)
+                # Apply redaction to create a new multi-page PDF
+                logger.info("Applying redaction to all pages")
+                redaction_result = self.redaction_engine.apply_redactions(doc, all_detections, output_path)
+            
+            logger.info(f"Total detections across all pages: {len(all_detections)}")
+            doc.close()
+            
+            self._verify_output(output_path, all_detections, redaction_result)
+            return self._complete_job(all_detections, redaction_result, settings.PIPELINE_MODE, pipeline_metrics,
+                                      output_path, time.time() - start_time)
+            
+        except Exception as e:
+            return self._fail_job(e)
+    
+    async def process_document_async(self, pdf_path: str, output_path: str, job_id: str = None,
+                                     redaction_prompt: str = "hide all personal information") -> Dict[str, Any]:
+        """
+        Async variant of ``process_document`` for serving many jobs from one process
+        
+        LLM calls are awaited on the event loop; MuPDF, Tesseract and file
+        work run on a small executor shared by all jobs. Each call gets its own
+        job scope (stats, LLM budget, per-document state), so jobs waiting on
+        the LLM can share this processor concurrently without a thread each.
+        
+        Args:
+            pdf_path: Path to input PDF
+            output_path: Path for output PDF
+            job_id: Optional job ID for progress tracking
+            redaction_prompt: User's redaction preferences
+            
+        Returns:
+            Processing results dictionary
+        """
+        with job_scope():
+            redaction_rules = self._start_job(pdf_path, output_path, job_id, redaction_prompt)
+            start_time = time.time()
+            
+            try:
+                self._update_job_progress(10, "Loading PDF document")
+                doc = await self._offload(self._open_document, pdf_path)
+                try:
+                    await self._offload(self._count_document_words, doc)
+                    all_detections, redaction_result = await self._process_pages_async(doc, redaction_rules, output_path)
+                finally:
+                    await self._offload(self._close_document, doc)
+                logger.info(f"Total detections across all pages: {len(all_detections)}")
                 
-                # Add page number and coordinates to detections
-                page_detections = []
-                for detection in text_detections + image_detections:
-                    detection['page_num'] = page_num
-                    
-                    # Find coordinates if not already present
-                    if 'coordinates' not in detection and detection.get('text'):
-                        coords = self.coordinate_mapper.find_coordinates(
-                            detection['text'], words, detection.get('category', 'unknown')
-                        )
-                        if coords:
-                            # Validate coordinates
-                            is_valid, reason = self.coordinate_mapper.validate_coordinates(coords, detection['text'])
-                            if is_valid:
-                                detection['coordinates'] = coords
-                                page_detections.append(detection)
-                                logger.info(f"Added detection: {detection['category']} = '{detection['text']}'")
-                            else:
-                                logger.warning(f"Invalid coordinates for '{detection['text']}': {reason}")
-                        else:
-                            logger.warning(f"No coordinates found for '{detection['text']}'")
-                    elif 'coordinates' in detection:
-                        page_detections.append(detection)
+                await self._offload(self._verify_output, output_path, all_detections, redaction_result)
+                return self._complete_job(all_detections, redaction_result, "async", None,
+                                          output_path, time.time() - start_time)
                 
-                all_detections.extend(page_detections)
-                logger.info(f"Page {page_num + 1}: {len(page_detections)} valid detections")
+            except Exception as e:
+                return self._fail_job(e)
+    
+    def _start_job(self, pdf_path: str, output_path: str, job_id: str, redaction_prompt: str):
+        """Reset per-job state on every sub-service and compile the prompt"""
+        self.current_job_id = job_id
+        self.stats = ProcessingStats()  # Reset stats
+        self.llm_agent.stats = self.stats
+        self.prompt_interpreter.stats = self.stats
+        self.candidate_scorer.start_document()
+        self.candidate_clusters.start_job()
+        self.llm_agent.start_job()
+        self.detector_registry.start_job(self.stats)
+        self.raster_cache.start_job(self.stats)
+        
+        logger.info("STARTING PROMPT-BASED PII PROCESSING 🚀")
+        logger.info(f"Input file: {pdf_path}")
+        logger.info(f"Output file: {output_path}")
+        logger.info(f"Redaction prompt: '{redaction_prompt}'")
+        
+        # Parse user's redaction preferences
+        redaction_rules = self.prompt_interpreter.compile_redaction_prompt(redaction_prompt)
+        logger.info(f"Parsed redaction rules: {redaction_rules}")
+        return redaction_rules
+    
+    def _complete_job(self, all_detections: List[DetectionResult], redaction_result: Dict, mode: str,
+                      pipeline_metrics: Dict, output_path: str, processing_time: float) -> Dict[str, Any]:
+        """Build the results, mark the job completed and log the summary"""
+        self.raster_cache.clear()
+        image_detection_count = sum(1 for d in all_detections if d.category.startswith('image_'))
+        results = {
+            'success': True,
+            'total_detections': len(all_detections),
+            'text_detections': len(all_detections) - image_detection_count,
+            'image_detections': image_detection_count,
+            'processing_time': processing_time,
+            'stats': self.stats.__dict__,
+            'llm_clusters': self.candidate_clusters.audit(),
+            'detectors': self.detector_registry.get_job_metrics(),
+            'pipeline': {'mode': mode, 'stages': pipeline_metrics},
+            'output_file': output_path,
+            'redaction_result': redaction_result
+        }
+        
+        # Update job completion
+        self._update_job_progress(100, "Processing completed successfully")
+        if self.current_job_id:
+            self.job_manager.mark_job_completed(self.current_job_id, results)
+        
+        logger.info("COMPREHENSIVE PROCESSING SUMMARY")
+        logger.info(f"Total processing time: {processing_time:.2f} seconds")
+        logger.info(f"Total detections: {len(all_detections)}")
+        
+        return results
+    
+    def _verify_output(self, output_path: str, all_detections: List[DetectionResult], redaction_result: Dict):
+        """
+        Check the saved output for redacted values and add the report to the redaction result
+        
+        In ``fail`` mode a leak deletes the output and raises, failing the job.
+        """
+        if not self.leak_verifier.enabled or not redaction_result.get('success'):
+            return
+        self._update_job_progress(95, "Verifying redactions")
+        report = self.leak_verifier.verify(output_path, all_detections)
+        redaction_result['verification'] = report
+        if not report['clean'] and self.leak_verifier.mode == LEAK_CHECK_FAIL:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise RuntimeError(f"Redacted values still present on pages {report['leaked_pages']}; output deleted")
+    
+    def _fail_job(self, error: Exception) -> Dict[str, Any]:
+        """Mark the job failed"""
+        self.raster_cache.clear()
+        logger.error(f"CRITICAL ERROR: {error}")
+        if self.current_job_id:
+            self.job_manager.mark_job_failed(self.current_job_id, str(error))
+        return {'success': False, 'error': str(error), 'detectors': self.detector_registry.get_job_metrics()}
+    
+    def _detect_pages_serial(self, doc, redaction_rules) -> List[DetectionResult]:
+        """
+        Detect and locate PII one page at a time (redaction follows separately)
+        
+        Args:
+            doc: Open PyMuPDF document
+            redaction_rules: Compiled redaction rules
             
-            logger.info(f"Total detections across all pages: {len(all_detections)}")
+        Returns:
+            Located detections for all pages
+        """
+        all_detections = []
+        
+        # Process each page
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            logger.info(f"Processing page {page_num + 1}/{len(doc)}")
             
             # Update job progress
-            self._update_job_progress(85, "Applying redactions")
+            page_progress = 20 + (page_num / len(doc)) * 60  # 20-80% for page processing
+            self._update_job_progress(int(page_progress), f"Processing page {page_num + 1}/{len(doc)}")
             
-            # Apply redaction to create a new multi-page PDF
-            logger.info("Applying redaction to all pages")
-            redaction_result = self.redaction_engine.apply_redactions(doc, all_detections, output_path)
+            # Extract text from this page
+            words, full_text, text_dict, extraction_stats = self._extract_text_comprehensive(page)
+            page_context = self.candidate_scorer.build_page_context(page_num, full_text, words, text_dict)
             
-            doc.close()
+            # Run the enabled detectors (text and image) on this page
+            detections = self.detector_registry.run_page(PageInput(
+                page_num=page_num, page=page, full_text=full_text, words=words,
+                page_context=page_context, rules=redaction_rules
+            ))
             
-            processing_time = time.time() - start_time
+            # Add page number and coordinates to detections
+            for detection in detections:
+                detection.page_num = page_num
+            page_detections = self.coordinate_mapper.locate_detections(detections, words, page.rect)
             
-            # Final results
-            results = {
-                'success': True,
-                'total_detections': len(all_detections),
-                'text_detections': len([d for d in all_detections if not d.get('category', '').startswith('image_')]),
-                'image_detections': len([d for d in all_detections if d.get('category', '').startswith('image_')]),
-                'processing_time': processing_time,
-                'stats': self.stats.__dict__,
-                'output_file': output_path,
-                'redaction_result': redaction_result
-            }
+            all_detections.extend(page_detections)
+            logger.info(f"Page {page_num + 1}: {len(page_detections)} valid detections")
+        
+        return all_detections
+    
+    def _process_pages_staged(self, doc, redaction_rules, output_path: str) -> Tuple[List[DetectionResult], Dict, Dict]:
+        """
+        Detect and redact pages in a staged pipeline
+        
+        extract -> ocr -> detect -> validate -> render, connected by bounded
+        queues and each with its own workers, so one page can render while the
+        next waits on the LLM. MuPDF calls are serialized by ``mupdf_lock``;
+        page contexts are built in page order. Output pages are appended in
+        page order as they complete.
+        
+        Args:
+            doc: Open PyMuPDF document
+            redaction_rules: Compiled redaction rules
+            output_path: Path to save the redacted document
             
-            # Update job completion
-            self._update_job_progress(100, "Processing completed successfully")
-            if self.current_job_id:
-                self.job_manager.mark_job_completed(self.current_job_id, results)
+        Returns:
+            Tuple of (located detections, redaction result, per-stage metrics)
+        """
+        page_count = len(doc)
+        pipeline = StagePipeline([
+            Stage("extract", lambda work: self._stage_extract(doc, work)),
+            Stage("ocr", self._stage_ocr, settings.PIPELINE_OCR_WORKERS),
+            Stage("detect", lambda work: self._stage_detect(work, redaction_rules), ordered=True),
+            Stage("validate", self._stage_validate, settings.PIPELINE_VALIDATE_WORKERS),
+            # Render threads only wait on the render pool's processes when it is on
+            Stage("render", self._stage_render,
+                  max(settings.PIPELINE_RENDER_WORKERS, self.redaction_engine.render_pool.processes)),
+        ], queue_size=settings.PIPELINE_QUEUE_SIZE)
+        
+        new_doc = self.redaction_engine.new_output()
+        all_detections = []
+        redaction_count = 0
+        try:
+            for work in pipeline.run(PageWork(page_num) for page_num in range(page_count)):
+                self._sink_page(new_doc, work, page_count)
+                all_detections.extend(work.detections)
+                redaction_count += work.redactions
             
-            logger.info("COMPREHENSIVE PROCESSING SUMMARY")
-            logger.info(f"Total processing time: {processing_time:.2f} seconds")
-            logger.info(f"Total detections: {len(all_detections)}")
+            redaction_result = self._save_output(new_doc, output_path, all_detections, redaction_count, page_count)
+        finally:
+            self._close_document(new_doc)
+        
+        return all_detections, redaction_result, pipeline.get_metrics()
+    
+    async def _process_pages_async(self, doc, redaction_rules, output_path: str) -> Tuple[List[DetectionResult], Dict]:
+        """
+        Detect and redact pages, awaiting the LLM instead of blocking on it
+        
+        Candidates are found page by page in order (OCR'd pages add to the
+        document word counts as they are reached); validation, coordinate mapping and rendering of up to
+        ``ASYNC_PAGES_IN_FLIGHT`` pages overlap. Output pages are appended in
+        page order.
+        
+        Args:
+            doc: Open PyMuPDF document
+            redaction_rules: Compiled redaction rules
+            output_path: Path to save the redacted document
             
-            return results
+        Returns:
+            Tuple of (located detections, redaction result)
+        """
+        page_count = await self._offload(len, doc)
+        new_doc = await self._offload(self.redaction_engine.new_output)
+        all_detections = []
+        redaction_count = 0
+        in_flight = deque()
+        
+        async def collect(task):
+            nonlocal redaction_count
+            work = await task
+            await self._offload(self._sink_page, new_doc, work, page_count)
+            all_detections.extend(work.detections)
+            redaction_count += work.redactions
+        
+        try:
+            for page_num in range(page_count):
+                work = await self._offload(self._stage_extract, doc, PageWork(page_num))
+                if work.ocr_image is not None:
+                    work = await self._offload(self._stage_ocr, work)
+                work = await self._offload(self._stage_detect, work, redaction_rules)
+                in_flight.append(asyncio.ensure_future(self._finish_page_async(work)))
+                if len(in_flight) >= settings.ASYNC_PAGES_IN_FLIGHT:
+                    await collect(in_flight.popleft())
+            while in_flight:
+                await collect(in_flight.popleft())
             
-        except Exception as e:
-            logger.error(f"CRITICAL ERROR: {e}")
-            if self.current_job_id:
-                self.job_manager.mark_job_failed(self.current_job_id, str(e))
-            return {'success': False, 'error': str(e)}
+            redaction_result = await self._offload(
+                self._save_output, new_doc, output_path, all_detections, redaction_count, page_count)
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await self._offload(self._close_document, new_doc)
+        
+        return all_detections, redaction_result
+    
+    async def _finish_page_async(self, work: PageWork) -> PageWork:
+        """Awaited validation, then coordinate mapping and rendering on the executor"""
+        detections = await self.detector_registry.validate_page_async(work.page_input, work.candidates)
+        work = await self._offload(self._locate_page, work, detections)
+        return await self._offload(self._stage_render, work)
+    
+    async def _offload(self, func, *args):
+        """Run blocking work on the shared executor, inside the calling job's context"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=settings.ASYNC_EXECUTOR_WORKERS, thread_name_prefix="job-io")
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(context.run, func, *args))
+    
+    def _count_document_words(self, doc):
+        """Pre-pass: document-wide word counts for the candidate scorer, from each page's text layer"""
+        for page_num in range(len(doc)):
+            with mupdf_lock:
+                words = doc[page_num].get_text("words")
+            if words:
+                self.candidate_scorer.count_page_words(page_num, words)
+    
+    def _open_document(self, pdf_path: str):
+        """Open the input PDF"""
+        logger.info("Loading PDF document")
+        with mupdf_lock:
+            doc = fitz.open(pdf_path)
+        logger.info(f"PDF opened successfully: {len(doc)} pages")
+        return doc
+    
+    @staticmethod
+    def _close_document(doc):
+        """Close a PyMuPDF document if still open"""
+        with mupdf_lock:
+            if not doc.is_closed:
+                doc.close()
+    
+    def _sink_page(self, new_doc, work: PageWork, page_count: int):
+        """Append a finished page to the output document (pages arrive in order)"""
+        with mupdf_lock:
+            self.redaction_engine.append_page(new_doc, work.page, work.rendered)
+            work.page = None
+        self._update_job_progress(20 + int((work.page_num + 1) / page_count * 65),
+                                  f"Processed page {work.page_num + 1}/{page_count}")
+    
+    def _save_output(self, new_doc, output_path: str, all_detections: List[DetectionResult],
+                     redaction_count: int, page_count: int) -> Dict:
+        """Save the redacted document, unless nothing was detected"""
+        if not all_detections:
+            logger.warning("No detections to redact")
+            return {"success": False, "message": "No detections to redact"}
+        with mupdf_lock:
+            return self.redaction_engine.save_redacted_document(new_doc, output_path, redaction_count, page_count)
+    
+    def _stage_extract(self, doc, work: PageWork) -> PageWork:
+        """Pipeline stage: load the page and its text layer (rasterized for OCR if it has none)"""
+        with mupdf_lock:
+            work.page = doc[work.page_num]
+            work.page_rect = work.page.rect
+            logger.info(f"Processing page {work.page_num + 1}/{len(doc)}")
+            work.words, work.full_text, work.text_dict, work.extraction_stats = self._extract_text_layer(work.page)
+            if len(work.words) == 0 and len(work.full_text) == 0:
+                logger.info("Method 4: OCR for scanned document")
+                work.ocr_image, work.ocr_scale = self.ocr_service.render_page_image(work.page)
+        return work
+    
+    def _stage_ocr(self, work: PageWork) -> PageWork:
+        """Pipeline stage: Tesseract for pages without a text layer"""
+        if work.ocr_image is not None:
+            work.words, work.full_text = self.ocr_service.ocr_image(work.ocr_image, work.ocr_scale)
+            work.ocr_image = None
+            self._record_ocr(work.extraction_stats, work.words, work.full_text)
+        return work
+    
+    def _stage_detect(self, work: PageWork, redaction_rules) -> PageWork:
+        """Pipeline stage (page order): page context and detector candidates"""
+        page_context = self.candidate_scorer.build_page_context(
+            work.page_num, work.full_text, work.words, work.text_dict)
+        work.page_input = PageInput(
+            page_num=work.page_num, page=work.page, full_text=work.full_text, words=work.words,
+            page_context=page_context, rules=redaction_rules, page_lock=mupdf_lock
+        )
+        work.candidates = self.detector_registry.find_page_candidates(work.page_input)
+        return work
+    
+    def _stage_validate(self, work: PageWork) -> PageWork:
+        """Pipeline stage: rule/LLM validation, then coordinate mapping"""
+        detections = self.detector_registry.validate_page(work.page_input, work.candidates)
+        return self._locate_page(work, detections)
+    
+    def _locate_page(self, work: PageWork, detections: List[DetectionResult]) -> PageWork:
+        """Number and locate a page's validated detections"""
+        for detection in detections:
+            detection.page_num = work.page_num
+        work.detections = self.coordinate_mapper.locate_detections(detections, work.words, work.page_rect)
+        work.page_input = None
+        work.candidates = {}
+        logger.info(f"Page {work.page_num + 1}: {len(work.detections)} valid detections")
+        return work
+    
+    def _stage_render(self, work: PageWork) -> PageWork:
+        """Pipeline stage: draw the page's redactions (pages without any are copied later)"""
+        if work.detections:
+            work.rendered, work.redactions = self.redaction_engine.render_page(work.page, work.detections, mupdf_lock)
+            logger.info(f"Page {work.page_num + 1}: Applied {work.redactions} redactions")
+        return work
     
-    def _extract_text_comprehensive(self, page) -> Tuple[List, str, Dict]:
+    def _extract_text_comprehensive(self, page) -> Tuple[List, str, Dict, Dict]:
         """Extract text with multiple methods and comprehensive logging"""
+        words, full_text, text_dict, extraction_results = self._extract_text_layer(page)
+        
+        # Method 4: OCR for scanned documents
+        if len(words) == 0 and len(full_text) == 0:
+            logger.info("Method 4: OCR for scanned document")
+            words, full_text = self.ocr_service.extract_text_from_page(page)
+            self._record_ocr(extraction_results, words, full_text)
+        
+        # Log sample text for debugging
+        sample_text = full_text[:200].replace('\n', ' ').strip()
+        logger.debug(f"Sample text: '{sample_text}...'")
+        
+        logger.debug("Text extraction complete")
+        return words, full_text, text_dict, extraction_results
+    
+    def _extract_text_layer(self, page) -> Tuple[List, str, Dict, Dict]:
+        """Extract the page's own text (words, plain text and span dictionary)"""
         logger.debug("Starting comprehensive text extraction")
         
         extraction_results = {}
         
         # Method 1: Word-level extraction
         logger.debug("Method 1: Word-level extraction")
-        words = page.get_text("words")
+        words = to_word_boxes(page.get_text("words"))
         extraction_results['words'] = len(words)
         self.stats.raw_text_extractions += 1
         logger.debug(f"Extracted {len(words)} words")
@@ -188,36 +536,28 @@ class PIIProcessorService:
         extraction_results['blocks'] = len(text_dict.get('blocks', []))
         logger.debug(f"Extracted {extraction_results['blocks']} text blocks")
         
-        # Method 4: OCR for scanned documents
-        if len(words) == 0 and len(full_text) == 0:
-            logger.info("Method 4: OCR for scanned document")
-            words, full_text = self.ocr_service.extract_text_from_page(page)
-            extraction_results['words'] = len(words)
-            extraction_results['characters'] = len(full_text)
-            extraction_results['ocr_used'] = True
-            logger.info(f"OCR extracted {len(words)} words, {len(full_text)} characters")
-        else:
-            extraction_results['ocr_used'] = False
-        
-        # Log sample text for debugging
-        sample_text = full_text[:200].replace('\n', ' ').strip()
-        logger.debug(f"Sample text: '{sample_text}...'")
-        
-        logger.debug("Text extraction complete")
-        return words, full_text, extraction_results
+        extraction_results['ocr_used'] = False
+        return words, full_text, text_dict, extraction_results
     
-    def _detect_pii_comprehensive(self, text: str, words: List) -> List[Dict]:
+    def _record_ocr(self, extraction_results: Dict, words: List, full_text: str):
+        """Note OCR output in the page's extraction stats"""
+        extraction_results['words'] = len(words)
+        extraction_results['characters'] = len(full_text)
+        extraction_results['ocr_used'] = True
+        logger.info(f"OCR extracted {len(words)} words, {len(full_text)} characters")
+    
+    def _detect_pii_comprehensive(self, text: str, words: List, page_context=None) -> List[DetectionResult]:
         """Comprehensive PII detection with AI validation"""
         logger.info("Starting comprehensive PII detection")
         
         # Get initial detections
-        detections = self.pii_detection.detect_pii(text, words)
+        detections = self.pii_detection.detect_pii(text, words, page_context.page_num if page_context else None)
         
         # Validate each detection with intelligent pattern + LLM analysis
         validated_detections = []
         for detection in detections:
-            match_text = detection['text']
-            category = detection['category']
+            match_text = detection.text
+            category = detection.category
             
             # Step 1: Pattern-based validation (fallback for obvious cases)
             is_obvious_pii = self._is_obvious_personal_info(match_text, category)
@@ -230,7 +570,9 @@ class PIIProcessorService:
                 continue
             
             # Step 2: LLM analysis for ambiguous cases
-            should_redact = not self.llm_agent.analyze_with_agent(match_text, text, category)
+            should_redact = not self.llm_agent.analyze_with_agent(
+                match_text, text, category, page_context=page_context, offset=detection.offset
+            )
             
             if should_redact:
                 validated_detections.append(detection)
@@ -243,30 +585,6 @@ class PIIProcessorService:
         logger.info(f"PII detection summary: {len(validated_detections)} validated detections")
         return validated_detections
     
-    def _detect_pii_with_rules(self, text: str, words: List, redaction_rules) -> List[Dict]:
-        """PII detection with prompt-based filtering"""
-        logger.info("Starting prompt-based PII detection")
-        
-        # Get initial detections from all patterns
-        detections = self.pii_detection.detect_pii(text, words)
-        logger.info(f"Initial pattern detections: {len(detections)}")
-        
-        # Filter detections based on user's redaction rules
-        filtered_detections = []
-        for detection in detections:
-            should_redact = self.prompt_interpreter.should_redact_detection(detection, redaction_rules)
-            
-            if should_redact:
-                filtered_detections.append(detection)
-                self.stats.successful_detections += 1
-                logger.info(f"PROMPT-BASED DETECTION: {detection['category']} = '{detection['text']}'")
-            else:
-                self.stats.rejected_detections += 1
-                logger.debug(f"PROMPT-FILTERED OUT: {detection['category']} = '{detection['text']}'")
-        
-        logger.info(f"Prompt-based filtering: {len(filtered_detections)} detections match user preferences")
-        return filtered_detections
-    
     def _is_obvious_personal_info(self, text: str, category: str) -> bool:
         """
         Pattern-based detection for obvious personal information
@@ -4,11 +4,84 @@ Prompt Interpreter Service for intelligent redaction based on user prompts
 
 import re
 import logging
-from typing import Dict, List, Set, Optional
-from dataclasses import dataclass
+import functools
+from typing import Dict, List, Set, Optional, Tuple, FrozenSet, Union
+from dataclasses import dataclass, field
+
+from ..core.config import settings
+from ..models.job import DetectionResult, ProcessingStats
+from ..models.page import PageContext
+from .job_context import JobLocal
 
 logger = logging.getLogger(__name__)
 
+# Person-name check outcome meaning only the LLM can decide
+_ASK_LLM = object()
+
+# Decision table actions
+ACTION_REDACT = "redact"  # always redact
+ACTION_KEEP = "keep"  # never redact
+ACTION_VERIFY = "verify"  # redact if the category's validity check passes
+ACTION_MATCH_NAMES = "match_names"  # redact only names listed in the prompt
+ACTION_MATCH_NAMES_OR_VERIFY = "match_names_or_verify"  # listed names, else the name check
+
+# Category -> RedactionRules flag enabling it
+RULE_CATEGORY_FLAGS = (
+    ('addresses', 'hide_addresses'),
+    ('phone_numbers', 'hide_phone_numbers'),
+    ('email_addresses', 'hide_emails'),
+    ('identification_numbers', 'hide_id_numbers'),
+    ('dates', 'hide_dates'),
+)
+
+# Field labels and generic terms that are never person names
+NAME_FIELD_LABELS = frozenset({
+    'name', 'father', 'mother', 'student', 'candidate', 'person',
+    'information', 'personal', 'order', 'date', 'time', 'amount',
+    'address', 'line', 'state', 'district', 'gender', 'nationality',
+    'category', 'program', 'course', 'tech', 'engineering', 'science',
+    'computer', 'electronics', 'mechanical', 'communication', 'civil',
+    'education', 'qualification', 'examination', 'school', 'board',
+    'year', 'month', 'roll', 'marks', 'cgpa', 'percentage', 'bank',
+    'account', 'branch', 'code', 'ifsc', 'choices', 'preferences',
+    'type', 'campus', 'declaration', 'undertaking', 'signature',
+    'printed', 'failure', 'entrance', 'program', 'liable', 'the',
+    'all', 'are', 'have', 'yes', 'no', 'male', 'female', 'indian',
+    'registered', 'emergency', 'communication', 'location', 'institute',
+    'permanent', 'pin', 'zip', 'pincode', 'govt', 'high', 'open',
+    'rural', 'technology', 'technical', 'others', 'equivalent',
+    'new', 'west', 'blood', 'group', 'defence', 'kashmiri', 'migrant',
+    'scheduled', 'caste', 'skill', 'nct'
+})
+
+# Known personal names seen on sample forms
+KNOWN_PERSON_NAMES = frozenset({'ashish', 'arun', 'kumar', 'sangeeta', 'kumari'})
+
+# Common place names and institutions excluded from ALL CAPS name detection
+NAME_PLACE_EXCLUSIONS = frozenset({
+    'delhi', 'mumbai', 'bangalore', 'kolkata', 'chennai', 'hyderabad',
+    'pune', 'ahmedabad', 'jaipur', 'surat', 'lucknow', 'kanpur',
+    'nagpur', 'indore', 'thane', 'bhopal', 'visakhapatnam', 'pimpri',
+    'patna', 'vadodara', 'ghaziabad', 'ludhiana', 'agra', 'nashik',
+    'faridabad', 'meerut', 'rajkot', 'kalyan', 'vasai', 'varanasi',
+    'srinagar', 'aurangabad', 'dhanbad', 'amritsar', 'navi', 'allahabad',
+    'ranchi', 'howrah', 'coimbatore', 'jabalpur', 'gwalior', 'vijayawada',
+    'jodhpur', 'madurai', 'raipur', 'kota', 'guwahati', 'chandigarh',
+    'solapur', 'hubballi', 'tiruchirappalli', 'tiruppur', 'moradabad',
+    'mysore', 'bareilly', 'gurgaon', 'aligarh', 'jalandhar', 'bhubaneswar',
+    'salem', 'warangal', 'guntur', 'bhiwandi', 'saharanpur', 'gorakhpur',
+    'bikaner', 'amravati', 'noida', 'jamshedpur', 'bhilai', 'cuttack',
+    'firozabad', 'kochi', 'nellore', 'bhavnagar', 'dehradun', 'durgapur',
+    'asansol', 'rourkela', 'nanded', 'kolhapur', 'ajmer', 'akola',
+    'gulbarga', 'jamnagar', 'ujjain', 'loni', 'siliguri', 'jhansi',
+    'ulhasnagar', 'jammu', 'sangli', 'mangalore', 'erode', 'belgaum',
+    'ambattur', 'tirunelveli', 'malegaon', 'gaya', 'jalgaon', 'udaipur',
+    'maheshtala', 'bseb', 'bihar', 'dseu', 'okhla', 'patori', 'darbhanga',
+    'kolhanta', 'bakkarwala', 'nangloi', 'najafgarh', 'loknayak', 'puram',
+    'rohini', 'sector', 'pant', 'maharaja', 'agrasen', 'union', 'bank',
+    'india', 'chhotu', 'ram', 'rural'
+})
+
 
 @dataclass
 class RedactionRules:
@@ -29,13 +102,55 @@ class RedactionRules:
             self.hide_specific_names = set()
         if self.categories_to_hide is None:
             self.categories_to_hide = set()
+    
+    def compile(self) -> 'RedactionDecisionTable':
+        """Compile the rule flags into a frozen category -> action table"""
+        if self.hide_all:
+            return RedactionDecisionTable(actions=(), default_action=ACTION_REDACT)
+        
+        actions = [('photos', ACTION_REDACT)]
+        if self.hide_specific_names:
+            names_action = ACTION_MATCH_NAMES_OR_VERIFY if self.hide_names else ACTION_MATCH_NAMES
+        else:
+            names_action = ACTION_VERIFY if self.hide_names else ACTION_KEEP
+        actions.append(('person_names', names_action))
+        for category, flag in RULE_CATEGORY_FLAGS:
+            actions.append((category, ACTION_VERIFY if getattr(self, flag) else ACTION_KEEP))
+        
+        return RedactionDecisionTable(
+            actions=tuple(actions),
+            specific_names=frozenset(name.lower() for name in self.hide_specific_names)
+        )
+
+
+@dataclass(frozen=True)
+class RedactionDecisionTable:
+    """Compiled, hashable redaction rules: per-detection filtering is a dict lookup"""
+    actions: Tuple[Tuple[str, str], ...]
+    specific_names: FrozenSet[str] = frozenset()
+    default_action: str = ACTION_KEEP
+    _lookup: Dict[str, str] = field(default=None, init=False, repr=False, compare=False, hash=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, '_lookup', dict(self.actions))
+    
+    def action_for(self, category: str) -> str:
+        """Action for a detection category"""
+        return self._lookup.get(category, self.default_action)
 
 
 class PromptInterpreterService:
     """Service to interpret user redaction prompts and create filtering rules"""
     
-    def __init__(self, llm_agent=None):
+    stats = JobLocal()
+    
+    def __init__(self, llm_agent=None, candidate_scorer=None, candidate_clusters=None):
         self.llm_agent = llm_agent  # Optional LLM agent for intelligent validation
+        self.candidate_scorer = candidate_scorer  # Optional local gate in front of the LLM
+        self.candidate_clusters = candidate_clusters  # Optional verdict sharing across similar candidates
+        self.stats = ProcessingStats()  # Rebound to the active job's stats by the processor
+        # Parsed prompts are memoized on the normalized prompt text
+        self._compile_cached = functools.lru_cache(maxsize=settings.PROMPT_CACHE_SIZE)(self._compile_normalized_prompt)
         self.name_patterns = [
             r'\bnames?\b',
             r'\bpersonal names?\b',
@@ -82,6 +197,15 @@ class PromptInterpreterService:
             r'\bdate(?:s)?\s+of\s+birth\b'
         ]
         
+        # Validity checks applied by ACTION_VERIFY (person names take page context, handled separately)
+        self._verifiers = {
+            'addresses': self._is_actual_address_info,
+            'phone_numbers': self._is_actual_phone_number,
+            'email_addresses': self._is_actual_email,
+            'identification_numbers': self._is_actual_id_number,
+            'dates': self._is_actual_personal_date,
+        }
+        
         logger.info("Prompt Interpreter Service initialized")
     
     def parse_redaction_prompt(self, prompt: str) -> RedactionRules:
@@ -157,6 +281,34 @@ class PromptInterpreterService:
         
         return rules
     
+    def compile_redaction_prompt(self, prompt: str) -> RedactionDecisionTable:
+        """
+        Parse a prompt into a frozen decision table, memoized per normalized prompt
+        
+        Args:
+            prompt: User's natural language redaction request
+            
+        Returns:
+            RedactionDecisionTable (hashable, safe to share and to use as a cache key)
+        """
+        return self._compile_cached(self.normalize_prompt(prompt))
+    
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Lowercase and collapse whitespace so equivalent prompts share a cache entry"""
+        return ' '.join(prompt.lower().split())
+    
+    def _compile_normalized_prompt(self, normalized_prompt: str) -> RedactionDecisionTable:
+        """Uncached parse + compile (wrapped by the LRU in __init__)"""
+        table = self.parse_redaction_prompt(normalized_prompt).compile()
+        logger.info(f"Compiled redaction decision table: {table}")
+        return table
+    
+    def get_cache_info(self) -> Dict[str, int]:
+        """Prompt cache hit/miss counters"""
+        info = self._compile_cached.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+    
     def _parse_specific_items(self, items_text: str) -> RedactionRules:
         """Parse specific items when user says 'hide only X'"""
         rules = RedactionRules()
@@ -188,146 +340,231 @@ class PromptInterpreterService:
                 return True
         return False
     
-    def should_redact_detection(self, detection: Dict, rules: RedactionRules) -> bool:
+    def should_redact_detection(self, detection: DetectionResult, rules: Union[RedactionDecisionTable, RedactionRules],
+                                page_context: Optional[PageContext] = None) -> bool:
         """
         Intelligent detection filtering based on rules and context
         
         Args:
-            detection: PII detection dictionary
-            rules: Parsed redaction rules
+            detection: PII detection
+            rules: Compiled decision table (RedactionRules are compiled on the fly)
+            page_context: Optional page context used by the local LLM gate
             
         Returns:
             True if detection should be redacted
         """
-        category = detection.get('category', '')
-        text = detection.get('text', '').strip()
-        text_lower = text.lower()
-        
-        # Always hide photos for now
-        if category == 'photos':
-            return True
-        
-        # Hide all mode
-        if rules.hide_all:
+        decision = self._rule_decision(detection, rules)
+        if decision is not None:
+            return decision
+        
+        text = detection.text.strip()
+        if detection.category == 'person_names':
+            return self._is_actual_person_name(text, page_context, self._stripped_offset(detection))
+        verifier = self._verifiers.get(detection.category)
+        return verifier(text) if verifier else False
+    
+    async def should_redact_detection_async(self, detection: DetectionResult,
+                                            rules: Union[RedactionDecisionTable, RedactionRules],
+                                            page_context: Optional[PageContext] = None) -> bool:
+        """Async variant of ``should_redact_detection``: an LLM name check is awaited"""
+        decision = self._rule_decision(detection, rules)
+        if decision is not None:
+            return decision
+        
+        text = detection.text.strip()
+        if detection.category == 'person_names':
+            return await self._is_actual_person_name_async(text, page_context, self._stripped_offset(detection))
+        verifier = self._verifiers.get(detection.category)
+        return verifier(text) if verifier else False
+    
+    def _rule_decision(self, detection: DetectionResult,
+                       rules: Union[RedactionDecisionTable, RedactionRules]) -> Optional[bool]:
+        """Decision from the rules alone, or None when the category's validity check decides"""
+        if isinstance(rules, RedactionRules):
+            rules = rules.compile()
+        
+        action = rules.action_for(detection.category)
+        if action == ACTION_REDACT:
             return True
+        if action == ACTION_KEEP:
+            return False
         
-        # Check specific names first
-        if rules.hide_specific_names and category == 'person_names':
-            for specific_name in rules.hide_specific_names:
-                if specific_name.lower() in text_lower:
+        if action in (ACTION_MATCH_NAMES, ACTION_MATCH_NAMES_OR_VERIFY):
+            text = detection.text.strip()
+            text_lower = text.lower()
+            for specific_name in rules.specific_names:
+                if specific_name in text_lower:
                     logger.debug(f"Hiding specific name: {text}")
                     return True
-            # If we have specific names to hide, don't hide other names unless hide_names is also True
-            if rules.hide_specific_names and not rules.hide_names:
+            # Listed names only, unless the prompt also asked for names in general
+            if action == ACTION_MATCH_NAMES:
                 return False
+        return None
+    
+    def should_redact_verified(self, detection: DetectionResult, rules: Union[RedactionDecisionTable, RedactionRules],
+                               page_context: Optional[PageContext] = None) -> bool:
+        """
+        Filtering for detections their detector already verified (checksum, dictionary)
         
-        # Smart filtering for person names
-        if category == 'person_names' and rules.hide_names:
-            return self._is_actual_person_name(text)
-        
-        # Other categories with smart filtering
-        if category == 'addresses' and rules.hide_addresses:
-            return self._is_actual_address_info(text)
-        if category == 'phone_numbers' and rules.hide_phone_numbers:
-            return self._is_actual_phone_number(text)
-        if category == 'email_addresses' and rules.hide_emails:
-            return self._is_actual_email(text)
-        if category == 'identification_numbers' and rules.hide_id_numbers:
-            return self._is_actual_id_number(text)
-        if category == 'dates' and rules.hide_dates:
-            return self._is_actual_personal_date(text)
+        Only the category rules apply; the per-category validity heuristics and
+        LLM checks are skipped. Listed-name prompts still match on the names.
         
-        return False
+        Args:
+            detection: PII detection
+            rules: Compiled decision table (RedactionRules are compiled on the fly)
+            page_context: Optional page context
+            
+        Returns:
+            True if detection should be redacted
+        """
+        if isinstance(rules, RedactionRules):
+            rules = rules.compile()
+        
+        action = rules.action_for(detection.category)
+        if action in (ACTION_REDACT, ACTION_VERIFY):
+            return True
+        if action == ACTION_KEEP:
+            return False
+        return self.should_redact_detection(detection, rules, page_context)
     
-    def _is_actual_person_name(self, text: str) -> bool:
+    async def should_redact_verified_async(self, detection: DetectionResult,
+                                           rules: Union[RedactionDecisionTable, RedactionRules],
+                                           page_context: Optional[PageContext] = None) -> bool:
+        """Async variant of ``should_redact_verified``"""
+        if isinstance(rules, RedactionRules):
+            rules = rules.compile()
+        
+        action = rules.action_for(detection.category)
+        if action in (ACTION_REDACT, ACTION_VERIFY):
+            return True
+        if action == ACTION_KEEP:
+            return False
+        return await self.should_redact_detection_async(detection, rules, page_context)
+    
+    @staticmethod
+    def _stripped_offset(detection: DetectionResult) -> Optional[int]:
+        """Page-text offset of the stripped detection text, if the detection has one"""
+        if detection.offset is None:
+            return None
+        return detection.offset + len(detection.text) - len(detection.text.lstrip())
+    
+    def _is_actual_person_name(self, text: str, page_context: Optional[PageContext] = None,
+                               offset: Optional[int] = None) -> bool:
         """Check if text is an actual person name, not a field label"""
-        text_lower = text.lower().strip()
+        decision, cluster_key = self._check_person_name(text, page_context)
+        if decision is not _ASK_LLM:
+            return decision
+        try:
+            is_name = self._ask_llm_if_name(text, self._name_context(text, page_context, offset))
+        except Exception as e:
+            logger.debug(f"LLM validation failed for '{text}': {e}")
+            is_name = None
+        return self._settle_person_name(cluster_key, is_name)
+    
+    async def _is_actual_person_name_async(self, text: str, page_context: Optional[PageContext] = None,
+                                           offset: Optional[int] = None) -> bool:
+        """Async variant of ``_is_actual_person_name``"""
+        decision, cluster_key = self._check_person_name(text, page_context)
+        if decision is not _ASK_LLM:
+            return decision
+        try:
+            is_name = await self._ask_llm_if_name_async(text, self._name_context(text, page_context, offset))
+        except Exception as e:
+            logger.debug(f"LLM validation failed for '{text}': {e}")
+            is_name = None
+        return self._settle_person_name(cluster_key, is_name)
+    
+    def _check_person_name(self, text: str, page_context: Optional[PageContext]) -> Tuple[object, Optional[tuple]]:
+        """
+        Person-name check up to the LLM call
         
-        # Skip obvious field labels and generic terms
-        field_labels = {
-            'name', 'father', 'mother', 'student', 'candidate', 'person',
-            'information', 'personal', 'order', 'date', 'time', 'amount',
-            'address', 'line', 'state', 'district', 'gender', 'nationality',
-            'category', 'program', 'course', 'tech', 'engineering', 'science',
-            'computer', 'electronics', 'mechanical', 'communication', 'civil',
-            'education', 'qualification', 'examination', 'school', 'board',
-            'year', 'month', 'roll', 'marks', 'cgpa', 'percentage', 'bank',
-            'account', 'branch', 'code', 'ifsc', 'choices', 'preferences',
-            'type', 'campus', 'declaration', 'undertaking', 'signature',
-            'printed', 'failure', 'entrance', 'program', 'liable', 'the',
-            'all', 'are', 'have', 'yes', 'no', 'male', 'female', 'indian',
-            'registered', 'emergency', 'communication', 'location', 'institute',
-            'permanent', 'pin', 'zip', 'pincode', 'govt', 'high', 'open',
-            'rural', 'technology', 'technical', 'others', 'equivalent',
-            'new', 'west', 'blood', 'group', 'defence', 'kashmiri', 'migrant',
-            'scheduled', 'caste', 'skill', 'nct'
-        }
+        Returns:
+            (decision, None), or (_ASK_LLM, cluster key) when only the LLM can decide
+        """
+        text_lower = text.lower().strip()
         
         # Skip if it's a field label
-        if text_lower in field_labels:
-            return False
+        if text_lower in NAME_FIELD_LABELS:
+            return False, None
         
         # Skip very short words (likely abbreviations)
         if len(text) <= 2:
-            return False
+            return False, None
         
         # Skip if it contains common non-name patterns
         if any(word in text_lower for word in ['code', 'number', 'id', 'fee', 'total']):
-            return False
+            return False, None
         
         # Check if it looks like an actual name
         # Names are usually capitalized and alphabetic
         if (len(text) >= 3 and 
             text[0].isupper() and 
             text.isalpha() and 
-            text_lower not in field_labels):
+            text_lower not in NAME_FIELD_LABELS):
             
             # Additional check: is it a known personal name pattern?
-            known_names = {'ashish', 'arun', 'kumar', 'sangeeta', 'kumari'}
-            if text_lower in known_names:
-                return True
+            if text_lower in KNOWN_PERSON_NAMES:
+                return True, None
             
             # Check if it's in ALL CAPS (common for names in forms)
             if text.isupper() and len(text) >= 3:
                 # But exclude common place names and institutions
-                place_names = {
-                    'delhi', 'mumbai', 'bangalore', 'kolkata', 'chennai', 'hyderabad',
-                    'pune', 'ahmedabad', 'jaipur', 'surat', 'lucknow', 'kanpur',
-                    'nagpur', 'indore', 'thane', 'bhopal', 'visakhapatnam', 'pimpri',
-                    'patna', 'vadodara', 'ghaziabad', 'ludhiana', 'agra', 'nashik',
-                    'faridabad', 'meerut', 'rajkot', 'kalyan', 'vasai', 'varanasi',
-                    'srinagar', 'aurangabad', 'dhanbad', 'amritsar', 'navi', 'allahabad',
-                    'ranchi', 'howrah', 'coimbatore', 'jabalpur', 'gwalior', 'vijayawada',
-                    'jodhpur', 'madurai', 'raipur', 'kota', 'guwahati', 'chandigarh',
-                    'solapur', 'hubballi', 'tiruchirappalli', 'tiruppur', 'moradabad',
-                    'mysore', 'bareilly', 'gurgaon', 'aligarh', 'jalandhar', 'bhubaneswar',
-                    'salem', 'warangal', 'guntur', 'bhiwandi', 'saharanpur', 'gorakhpur',
-                    'bikaner', 'amravati', 'noida', 'jamshedpur', 'bhilai', 'cuttack',
-                    'firozabad', 'kochi', 'nellore', 'bhavnagar', 'dehradun', 'durgapur',
-                    'asansol', 'rourkela', 'nanded', 'kolhapur', 'ajmer', 'akola',
-                    'gulbarga', 'jamnagar', 'ujjain', 'loni', 'siliguri', 'jhansi',
-                    'ulhasnagar', 'jammu', 'sangli', 'mangalore', 'erode', 'belgaum',
-                    'ambattur', 'tirunelveli', 'malegaon', 'gaya', 'jalgaon', 'udaipur',
-                    'maheshtala', 'bseb', 'bihar', 'dseu', 'okhla', 'patori', 'darbhanga',
-                    'kolhanta', 'bakkarwala', 'nangloi', 'najafgarh', 'loknayak', 'puram',
-                    'rohini', 'sector', 'pant', 'maharaja', 'agrasen', 'union', 'bank',
-                    'india', 'chhotu', 'ram', 'rural'
-                }
-                
-                if text_lower not in place_names:
+                if text_lower not in NAME_PLACE_EXCLUSIONS:
                     # Use LLM for intelligent validation if available
                     if self.llm_agent:
-                        try:
-                            is_name = self._ask_llm_if_name(text)
-                            if is_name is not None:
-                                return is_name
-                        except Exception as e:
-                            logger.debug(f"LLM validation failed for '{text}': {e}")
+                        # Cheap local score settles confident cases without a round trip
+                        gated = self._gate_candidate(text, 'person_names', page_context)
+                        if gated is not None:
+                            return gated, None
+                        
+                        # Same shape after the same label: reuse the sampled verdict
+                        cluster_key = None
+                        if self.candidate_clusters:
+                            cluster_key = self.candidate_clusters.cluster_key(text, 'person_names', page_context)
+                            shared = self.candidate_clusters.shared_verdict(cluster_key)
+                            if shared is not None:
+                                self.stats.llm_calls_avoided += 1
+                                self.stats.llm_cluster_shared += 1
+                                return shared, None
+                        return _ASK_LLM, cluster_key
                     
                     # Default heuristic: if it's ALL CAPS and not in exclusion list, likely a name
-                    return True
+                    return True, None
         
-        return False
+        return False, None
+    
+    def _name_context(self, text: str, page_context: Optional[PageContext], offset: Optional[int]) -> Optional[str]:
+        """Bounded page text around a name candidate for the LLM prompt (None without a page)"""
+        if page_context is None:
+            return None
+        return self.llm_agent.extract_surrounding_context(
+            text, page_context.full_text, settings.LLM_CONTEXT_WINDOW_CHARS, page_context=page_context, offset=offset)
+    
+    def _settle_person_name(self, cluster_key: Optional[tuple], is_name: Optional[bool]) -> bool:
+        """Final person-name decision from the LLM answer (None: no usable answer)"""
+        if is_name is None:
+            # Default heuristic: if it's ALL CAPS and not in exclusion list, likely a name
+            return True
+        if self.candidate_clusters:
+            self.candidate_clusters.record(cluster_key, is_name)
+        return is_name
+    
+    def _gate_candidate(self, text: str, category: str, page_context: Optional[PageContext]) -> Optional[bool]:
+        """Run the local scorer gate and record whether an LLM call was avoided"""
+        if not self.candidate_scorer:
+            return None
+        
+        decision = self.candidate_scorer.gate(text, category, page_context)
+        if decision is None:
+            return None
+        
+        self.stats.llm_calls_avoided += 1
+        if decision:
+            self.stats.llm_gate_redacted += 1
+        else:
+            self.stats.llm_gate_kept += 1
+        logger.debug(f"LLM gate decided '{text}' ({category}) locally: {'redact' if decision else 'keep'}")
+        return decision
     
     def _is_actual_address_info(self, text: str) -> bool:
         """Check if text is actual address information"""
@@ -381,12 +618,38 @@ class PromptInterpreterService:
                     pass
         return False
     
-    def _ask_llm_if_name(self, text: str) -> Optional[bool]:
+    def _ask_llm_if_name(self, text: str, context: Optional[str] = None) -> Optional[bool]:
         """Use LLM to intelligently determine if text is a person's name"""
         if not self.llm_agent:
             return None
         
-        prompt = f"""Is "{text}" a PERSON'S NAME?
+        try:
+            response = self.llm_agent.ask_yes_no(self._name_prompt(text, context), text, 'person_names', kind='name', max_tokens=5)
+            return self._parse_name_response(text, response)
+        except Exception as e:
+            logger.debug(f"LLM call failed for name validation: {e}")
+        
+        return None
+    
+    async def _ask_llm_if_name_async(self, text: str, context: Optional[str] = None) -> Optional[bool]:
+        """Async variant of ``_ask_llm_if_name``"""
+        if not self.llm_agent:
+            return None
+        
+        try:
+            response = await self.llm_agent.ask_yes_no_async(
+                self._name_prompt(text, context), text, 'person_names', kind='name', max_tokens=5)
+            return self._parse_name_response(text, response)
+        except Exception as e:
+            logger.debug(f"LLM call failed for name validation: {e}")
+        
+        return None
+    
+    @staticmethod
+    def _name_prompt(text: str, context: Optional[str] = None) -> str:
+        """YES/NO prompt asking whether text is a person's name, with the page text around it if known"""
+        base_prompt = f'TEXT: "{text}"\nCONTEXT: "{context}"\n\n' if context else ''
+        return base_prompt + f"""Is "{text}" a PERSON'S NAME?
 
 Consider these examples:
 - "ASHISH" → YES (person's name)
@@ -399,16 +662,14 @@ Consider these examples:
 - "ORDER" → NO (form field)
 
 Answer: YES or NO"""
-        
-        try:
-            response = self.llm_agent.call_groq_api(prompt, max_tokens=5)
-            if response and 'YES' in response.upper():
-                logger.debug(f"LLM confirms '{text}' is a person name")
-                return True
-            elif response and 'NO' in response.upper():
-                logger.debug(f"LLM confirms '{text}' is NOT a person name")
-                return False
-        except Exception as e:
-            logger.debug(f"LLM call failed for name validation: {e}")
-        
+    
+    @staticmethod
+    def _parse_name_response(text: str, response: str) -> Optional[bool]:
+        """Name verdict in an LLM response, None if it has none"""
+        if response and 'YES' in response.upper():
+            logger.debug(f"LLM confirms '{text}' is a person name")
+            return True
+        elif response and 'NO' in response.upper():
+            logger.debug(f"LLM confirms '{text}' is NOT a person name")
+            return False
         return None
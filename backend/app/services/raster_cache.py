@@ -0,0 +1,214 @@
+"""
+Raster Cache Service: per-job page pixmaps shared by OCR, detectors and redaction
+"""
+
+import math
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+import fitz
+
+from ..core.config import settings
+from ..models.job import ProcessingStats
+from .job_context import JobLocal
+
+logger = logging.getLogger(__name__)
+
+COLORSPACE_RGB = "rgb"  # every stage renders RGB without alpha
+MIN_BAND_HEIGHT = 256  # pixels; pages too wide for bands this tall are split into columns too
+
+
+class RasterCacheService:
+    """
+    Bounded LRU of rendered pixmaps for the current job
+
+    A scanned page is rendered for OCR and then again, at the same scale, for
+    redaction; image regions are rendered by the OCR-region detector and again
+    by region redaction. Stages ask this cache instead of calling
+    ``get_pixmap`` so each raster is produced once per job. Entries are keyed
+    by (page number, scale, colorspace, clip) and evicted least recently used
+    first once their samples exceed ``RASTER_CACHE_MB``.
+
+    Readers that only look at the pixels ``get`` a shared pixmap; the
+    redaction engine ``take``s it, removing the entry, because it draws on
+    the pixels in place. Each job (one document) has its own entries.
+
+    No single raster may exceed ``RENDER_MAX_PIXELS``: callers render
+    oversized areas at ``fit_scale`` or in the clips given by ``tiles``, so a
+    poster or a long receipt cannot allocate hundreds of megabytes at once.
+    The largest raster held for any page is reported in the job stats.
+    """
+
+    entries = JobLocal()
+    stats = JobLocal()
+
+    def __init__(self, max_bytes: int = None, max_pixels: int = None):
+        self.max_bytes = settings.RASTER_CACHE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.max_pixels = settings.RENDER_MAX_PIXELS if max_pixels is None else max_pixels
+        self._lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = ProcessingStats()
+        logger.info(f"Raster Cache Service initialized ({self.max_bytes // (1024 * 1024)} MB per job)")
+
+    def start_job(self, stats: ProcessingStats):
+        """Give the job an empty cache and bind its stats"""
+        self.entries = OrderedDict()
+        self.stats = stats
+
+    def clear(self):
+        """Drop every raster of the current job"""
+        with self._lock:
+            self.entries = OrderedDict()
+
+    def fit_scale(self, rect, scale: float) -> float:
+        """
+        Scale at which an area stays within the pixel budget
+
+        Args:
+            rect: Area to render, in page coordinates
+            scale: Preferred scale
+
+        Returns:
+            ``scale``, or the largest smaller scale fitting ``RENDER_MAX_PIXELS``
+        """
+        pixels = rect.width * rect.height * scale * scale
+        if not self.max_pixels or pixels <= self.max_pixels:
+            return scale
+        with self._lock:
+            self.stats.rasters_downscaled += 1
+        # Rounded down so the pixmap's rounded-out edges stay within budget
+        return math.floor(scale * math.sqrt(self.max_pixels / pixels) * 1000) / 1000
+
+    def tiles(self, rect, scale: float) -> List[fitz.Rect]:
+        """
+        Clips covering an area whose rasters each stay within the pixel budget
+
+        Tiles are full-width bands (a poster or a long receipt becomes a few
+        strips) unless the page is too wide for bands ``MIN_BAND_HEIGHT``
+        pixels tall, then a grid. Tile edges fall on whole device pixels, so
+        tile rasters abut exactly.
+
+        Args:
+            rect: Area to render, in page coordinates
+            scale: Rendering scale
+
+        Returns:
+            ``[rect]`` if it fits, otherwise the tile clips in reading order
+        """
+        x0, y0 = math.floor(rect.x0 * scale), math.floor(rect.y0 * scale)
+        x1, y1 = math.ceil(rect.x1 * scale), math.ceil(rect.y1 * scale)
+        width, height = x1 - x0, y1 - y0
+        if not self.max_pixels or width * height <= self.max_pixels:
+            return [fitz.Rect(rect)]
+        # One pixel of slack per side for edges rounded out by MuPDF
+        columns = math.ceil(width * (MIN_BAND_HEIGHT + 1) / self.max_pixels)
+        tile_width = math.ceil(width / columns)
+        rows = math.ceil(height / max(1, self.max_pixels // (tile_width + 1) - 1))
+        tile_height = math.ceil(height / rows)
+        clips = []
+        for top in range(y0, y1, tile_height):
+            for left in range(x0, x1, tile_width):
+                clips.append(fitz.Rect(
+                    left / scale, top / scale, min(left + tile_width, x1) / scale, min(top + tile_height, y1) / scale
+                ) & rect)
+        return clips
+
+    def note_page(self, tiles: List, scale: float):
+        """Record a page rasterized in the given tiles (possibly in another process) in the job's stats"""
+        largest = max(math.ceil(tile.width * scale) * math.ceil(tile.height * scale) * 3 for tile in tiles)
+        with self._lock:
+            self.stats.pages_tiled += int(len(tiles) > 1)
+            self.stats.peak_page_raster_bytes = max(self.stats.peak_page_raster_bytes, largest)
+
+    @staticmethod
+    def _key(page, scale: float, clip=None) -> Tuple:
+        clip_key = tuple(round(value, 3) for value in clip) if clip is not None else None
+        return page.number, scale, COLORSPACE_RGB, clip_key
+
+    def contains(self, page, scale: float, clip=None) -> bool:
+        """Whether a raster of this page (or region) is cached"""
+        with self._lock:
+            return self._key(page, scale, clip) in self.entries
+
+    def get(self, page, scale: float, clip=None, page_lock=None) -> fitz.Pixmap:
+        """
+        Shared pixmap of a page or region, rendered and cached on a miss
+
+        The pixmap may be handed to other stages: do not modify its pixels.
+
+        Args:
+            page: PyMuPDF page
+            scale: Rasterization scale
+            clip: Optional region of the page, in page coordinates
+            page_lock: Optional lock held while rendering (MuPDF is not thread-safe)
+
+        Returns:
+            RGB pixmap without alpha
+        """
+        key = self._key(page, scale, clip)
+        pix = self._lookup(key, remove=False)
+        if pix is None:
+            pix = self._render(page, scale, clip, page_lock)
+            self._store(key, pix)
+        return pix
+
+    def take(self, page, scale: float, clip=None, page_lock=None) -> fitz.Pixmap:
+        """
+        Pixmap of a page or region for exclusive use, removing it from the cache
+
+        Rendered on a miss, without caching it.
+
+        Args:
+            page: PyMuPDF page
+            scale: Rasterization scale
+            clip: Optional region of the page, in page coordinates
+            page_lock: Optional lock held while rendering
+
+        Returns:
+            RGB pixmap without alpha, owned by the caller
+        """
+        pix = self._lookup(self._key(page, scale, clip), remove=True)
+        if pix is None:
+            pix = self._render(page, scale, clip, page_lock)
+        return pix
+
+    def discard_page(self, page_num: int):
+        """Drop every raster of a page that no stage needs any more"""
+        with self._lock:
+            for key in [key for key in self.entries if key[0] == page_num]:
+                del self.entries[key]
+
+    def _lookup(self, key: Tuple, remove: bool) -> Optional[fitz.Pixmap]:
+        """Cached pixmap for a key (counting the hit or miss), or None"""
+        with self._lock:
+            pix = self.entries.pop(key, None) if remove else self.entries.get(key)
+            if pix is None:
+                self.stats.raster_cache_misses += 1
+                return None
+            if not remove:
+                self.entries.move_to_end(key)
+            self.stats.raster_cache_hits += 1
+            return pix
+
+    def _store(self, key: Tuple, pix: fitz.Pixmap):
+        """Cache a pixmap, evicting the least recently used ones over the byte budget"""
+        size = pix.stride * pix.height
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self.entries[key] = pix
+            total = sum(entry.stride * entry.height for entry in self.entries.values())
+            while total > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                total -= evicted.stride * evicted.height
+                self.stats.raster_cache_evictions += 1
+
+    def _render(self, page, scale: float, clip, page_lock) -> fitz.Pixmap:
+        with page_lock or nullcontext():
+            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, alpha=False)
+        with self._lock:
+            self.stats.peak_page_raster_bytes = max(self.stats.peak_page_raster_bytes, pix.stride * pix.height)
+        return pix
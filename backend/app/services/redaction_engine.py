@@ -2,32 +2,144 @@
 Redaction Engine Service for applying redactions to PDF documents
 """
 
-import io
 import os
 import time
 import fitz
-from PIL import Image, ImageDraw, ImageFilter
-from typing import List, Dict
+import inspect
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import logging
 
 from ..core.config import settings
+from ..models.job import DetectionResult
+from ..utils.images import (EncodedImage, ENCODING_AUTO, ENCODING_FLATE, ENCODING_JPEG, encode_flate,
+                            encode_jpeg, insert_encoded_image, photo_fraction, writable_pixels)
+from .image_redaction import ImageRedactionService, MODE_FILL
+from .raster_cache import RasterCacheService
+from .render_pool import RenderPool
 
 logger = logging.getLogger(__name__)
 
+RENDER_PAGE = "page"
+RENDER_REGIONS = "regions"
+
+# Document.save options per PDF_SAVE_PROFILE
+SAVE_PROFILES = {
+    "fast": {},  # no cleanup: quickest save, largest file
+    "balanced": {"garbage": 1, "deflate": True},  # drop unused objects, compress streams
+    "compact": {"garbage": 3, "deflate": True, "deflate_images": True, "deflate_fonts": True, "use_objstms": True},
+    "web": {"garbage": 3, "deflate": True, "linear": True},  # linearized: first page displays before the download ends
+}
+
+# Options the installed PyMuPDF accepts (object streams and separate widget copying are 1.24+)
+_SAVE_OPTIONS = set(inspect.signature(fitz.Document.save).parameters)
+_INSERT_PDF_OPTIONS = set(inspect.signature(fitz.Document.insert_pdf).parameters)
+
+
+@dataclass
+class RegionRedaction:
+    """
+    Redactions of one page kept as vector content plus small raster patches
+    
+    ``scrub`` lists (rect, fill) areas whose text and image pixels are removed
+    from the copied page (fill None leaves the background); ``patches`` are
+    (rect, encoded image) pairs laid over scrubbed areas afterwards.
+    """
+    scrub: List[Tuple[Any, Optional[Tuple[float, float, float]]]] = field(default_factory=list)
+    patches: List[Tuple[Any, EncodedImage]] = field(default_factory=list)
+
+
+@dataclass
+class TiledPage:
+    """
+    Redacted page over the pixel budget, rendered and encoded tile by tile
+    
+    ``tiles`` are (rect, encoded image) pairs; each image is laid at its rect
+    (page coordinates, as a tuple so it pickles from render workers).
+    """
+    tiles: List[Tuple[Tuple[float, float, float, float], EncodedImage]] = field(default_factory=list)
+
+
+class OutputDocument:
+    """
+    Redacted PDF assembled in page order
+    
+    Unredacted pages are not copied as they arrive: consecutive ones form a
+    run that is copied with a single ``insert_pdf`` call when the run ends, so
+    the run's pages share one copy of their fonts and images and stay
+    ordinary pages instead of being wrapped as Form XObjects.
+    """
+    
+    def __init__(self):
+        self.doc = fitz.open()
+        self.copied_runs = 0
+        self.image_xrefs: Dict[Tuple, int] = {}  # identical page images are stored once
+        self._run: Optional[List] = None  # [source document, first page, last page]
+    
+    def copy_page(self, page):
+        """Queue an unchanged source page, extending the current run when it follows on"""
+        run = self._run
+        if run is not None and run[0] is page.parent and run[2] + 1 == page.number:
+            run[2] = page.number
+            return
+        self.flush()
+        self._run = [page.parent, page.number, page.number]
+    
+    def flush(self):
+        """Copy the pending run of unchanged pages"""
+        if self._run is None:
+            return
+        source, first, last = self._run
+        self._run = None
+        _copy_pdf_pages(self.doc, source, first, last)
+        self.copied_runs += 1
+    
+    @property
+    def is_closed(self) -> bool:
+        return self.doc.is_closed
+    
+    def close(self):
+        self._run = None
+        self.doc.close()
+
+
+def _copy_pdf_pages(new_doc, source, first: int, last: int):
+    """Copy a page range as vector content, without links, annotations or form fields"""
+    options = {"links": False, "annots": False}
+    if "widgets" in _INSERT_PDF_OPTIONS:
+        options["widgets"] = False
+    new_doc.insert_pdf(source, from_page=first, to_page=last, **options)
+
+
 class RedactionEngineService:
     """Service for applying redactions to PDF documents"""
     
-    def __init__(self):
-        self.scale_factor = settings.PDF_SCALE_FACTOR
-        logger.info("Redaction Engine Service initialized")
+    def __init__(self, scale_factor: float = None, image_redaction: ImageRedactionService = None,
+                 render_pool: RenderPool = None, raster_cache: RasterCacheService = None):
+        self.scale_factor = scale_factor or settings.PDF_SCALE_FACTOR
+        self.render_mode = settings.REDACTION_RENDER_MODE
+        self.image_redaction = image_redaction or ImageRedactionService()
+        self.render_pool = render_pool or RenderPool()
+        self.raster_cache = raster_cache if raster_cache is not None else RasterCacheService()
+        self.save_profile = settings.PDF_SAVE_PROFILE
+        if self.save_profile not in SAVE_PROFILES:
+            raise ValueError(f"Unknown PDF save profile: {self.save_profile}")
+        self.page_encoding = settings.PAGE_ENCODING
+        if self.page_encoding not in (ENCODING_AUTO, ENCODING_FLATE, ENCODING_JPEG):
+            raise ValueError(f"Unknown page encoding: {self.page_encoding}")
+        self._linear_supported = True  # MuPDF 1.26+ dropped linearization; found out on first use
+        logger.info(f"Redaction Engine Service initialized ({self.render_mode} rendering, {self.save_profile} saves"
+                    f"{f', {self.render_pool.processes} render processes' if self.render_pool.processes else ''})")
     
-    def apply_redactions(self, doc, detections: List[Dict], output_path: str) -> Dict:
+    def apply_redactions(self, doc, detections: List[DetectionResult], output_path: str) -> Dict:
         """
         Apply redactions to a multi-page PDF document
         
         Args:
             doc: PyMuPDF document object
-            detections: List of detection dictionaries
+            detections: Located detections (DetectionResult records)
             output_path: Path to save redacted document
             
         Returns:
@@ -40,140 +152,359 @@ class RedactionEngineService:
             return {"success": False, "message": "No detections to redact"}
         
         # Create a new PDF document for the redacted output
-        new_doc = fitz.open()
+        new_doc = self.new_output()
         redaction_count = 0
         
+        detections_by_page: Dict[int, List[DetectionResult]] = {}
+        for detection in detections:
+            detections_by_page.setdefault(detection.page_num, []).append(detection)
+        
         try:
             # Process each page
-            for page_num in range(len(doc)):
-                page = doc[page_num]
+            for page, page_detections, rendered, redacted_page_count in self._rendered_pages(doc, detections_by_page):
+                page_num = page.number
                 logger.info(f"Processing page {page_num + 1}/{len(doc)} for redaction")
                 
-                # Get detections for this page only
-                page_detections = [d for d in detections if d.get('page_num', 0) == page_num]
-                
                 if page_detections:
                     logger.info(f"Found {len(page_detections)} detections for page {page_num + 1}")
                     
                     # Apply redactions to this page
-                    redacted_page_count = self._redact_page(page, page_detections, new_doc)
+                    self.append_page(new_doc, page, rendered)
                     redaction_count += redacted_page_count
                     
                     logger.info(f"Page {page_num + 1}: Applied {redacted_page_count} redactions")
                 else:
                     # No redactions needed for this page, copy original
-                    new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-                    new_page.show_pdf_page(page.rect, doc, page_num)
+                    self.append_page(new_doc, page, None)
                     logger.info(f"Page {page_num + 1}: No redactions needed, copied original")
             
-            # Save the new multi-page PDF
-            new_doc.save(output_path)
-            new_doc.close()
-            
-            logger.info(f"Applied {redaction_count} total redactions across {len(doc)} pages")
-            logger.info(f"Saved multi-page redacted PDF to: {output_path}")
-            
-            return {
-                "success": True,
-                "total_redactions": redaction_count,
-                "pages_processed": len(doc),
-                "output_path": output_path
-            }
+            return self.save_redacted_document(new_doc, output_path, redaction_count, len(doc))
             
         except Exception as e:
             logger.error(f"Redaction failed: {e}")
             new_doc.close()
             return {"success": False, "error": str(e)}
     
-    def _redact_page(self, page, page_detections: List[Dict], new_doc) -> int:
+    def _rendered_pages(self, doc, detections_by_page: Dict[int, List[DetectionResult]]) -> Iterator[Tuple]:
         """
-        Apply redactions to a single page
+        Render every page with detections, yielding pages in order
+        
+        With a render pool, pages are submitted to the workers a bounded window
+        ahead of the page being assembled; pages already rasterized in this
+        process (for OCR) are redacted here from the cached raster.
+        
+        Yields:
+            Tuples of (page, page detections, rendered page or None, redactions applied)
+        """
+        pooled = self.render_mode != RENDER_REGIONS and self.render_pool.accepts(doc)
+        ahead = 2 * self.render_pool.processes if pooled else 0
+        window = deque()
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            page_detections = detections_by_page.get(page_num, [])
+            future = self._submit_page(page, page_detections) if pooled and page_detections \
+                and not self.raster_cache.contains(page, self.scale_factor) else None
+            window.append((page, page_detections, future))
+            while len(window) > ahead:
+                yield self._finish_render(*window.popleft())
+        while window:
+            yield self._finish_render(*window.popleft())
+    
+    def _finish_render(self, page, page_detections: List[DetectionResult], future) -> Tuple:
+        """Render result of one page of ``_rendered_pages``"""
+        if not page_detections:
+            return page, page_detections, None, 0
+        if future is None:
+            return (page, page_detections) + self.render_page(page, page_detections)
+        return (page, page_detections) + self._pool_result(future, page, page_detections)
+    
+    def render_page(self, page, page_detections: List[DetectionResult], page_lock=None) -> Tuple[Any, int]:
+        """
+        Rasterize a page (or, in regions mode, only its redacted image areas) and apply its redactions
+        
+        Only the rasterization touches the document; drawing and encoding run
+        without ``page_lock``, so pages can be rendered concurrently. A raster
+        cached by an earlier stage is used instead of rendering again.
         
         Args:
             page: PyMuPDF page object
             page_detections: Detections for this page
-            new_doc: New document to add redacted page to
+            page_lock: Optional lock held while reading the page (MuPDF is not thread-safe)
             
         Returns:
-            Number of redactions applied
+            Tuple of (EncodedImage of the redacted page, a TiledPage if it is
+            over the pixel budget, or a RegionRedaction in regions mode, and
+            the number of redactions applied)
         """
-        # Convert page to high-resolution image
-        mat = fitz.Matrix(self.scale_factor, self.scale_factor)
-        pix = page.get_pixmap(matrix=mat)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        if self.render_mode == RENDER_REGIONS:
+            return self.render_regions(page, page_detections, page_lock)
+        if self.render_pool.accepts(page.parent) and not self.raster_cache.contains(page, self.scale_factor):
+            return self._pool_result(self._submit_page(page, page_detections), page, page_detections, page_lock)
+        return self.rasterize_page(page, page_detections, page_lock)
+    
+    def _submit_page(self, page, page_detections: List[DetectionResult]):
+        """Queue a page for rasterization in the render pool"""
+        return self.render_pool.submit(page, page_detections, self.scale_factor, self.image_redaction)
+    
+    def _pool_result(self, future, page, page_detections: List[DetectionResult],
+                     page_lock=None) -> Tuple[Any, int]:
+        """A render worker's result; the page is rendered in-process if the worker failed"""
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning(f"Render worker failed on page {page.number + 1}, rendering in-process: {e}")
+            return self.rasterize_page(page, page_detections, page_lock)
+        # The worker's raster stats stay in the worker; record its tiles here
+        with page_lock or nullcontext():
+            page_rect = page.rect
+        self.raster_cache.note_page(self.raster_cache.tiles(page_rect, self.scale_factor), self.scale_factor)
+        return result
+    
+    def rasterize_page(self, page, page_detections: List[DetectionResult],
+                       page_lock=None) -> Tuple[Any, int]:
+        """
+        Rasterize a page in this process and apply its redactions
         
-        # Apply redactions to this page
-        draw = ImageDraw.Draw(img)
-        redaction_count = 0
+        A page over ``RENDER_MAX_PIXELS`` at the rendering scale is rendered,
+        redacted and encoded one clipped tile at a time, so only one tile's
+        pixels are held at once; the tiles are laid side by side on the
+        output page at full resolution.
         
-        for detection in page_detections:
-            coords = detection.get('coordinates', [])
-            if coords and len(coords) >= 4:
-                redaction_count += self._apply_single_redaction(img, draw, detection, coords)
+        Args:
+            page: PyMuPDF page object
+            page_detections: Detections for this page
+            page_lock: Optional lock held while reading the page
+            
+        Returns:
+            Tuple of (EncodedImage of the redacted page, or a TiledPage, and the
+            number of redactions applied)
+        """
+        with page_lock or nullcontext():
+            page_rect = page.rect
+        tiles = self.raster_cache.tiles(page_rect, self.scale_factor)
+        self.raster_cache.note_page(tiles, self.scale_factor)
+        boxes, modes = self._page_regions(page_detections)
+        if len(tiles) > 1:
+            return self._rasterize_tiles(page, tiles, boxes, modes, page_lock), len(boxes)
         
-        # Convert redacted image back to PDF page
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG', quality=95)
-        img_bytes.seek(0)
+        # High-resolution raster, reused if OCR already rendered the page
+        pix = self.raster_cache.take(page, self.scale_factor, page_lock=page_lock)
         
-        # Create new page from redacted image
-        new_page = new_doc.new_page(width=page.rect.width, height=page.rect.height)
-        new_page.insert_image(page.rect, stream=img_bytes.getvalue())
+        # Apply all of the page's redactions in one batch, in place on the page's pixels
+        pixels = writable_pixels(pix)
+        self.image_redaction.redact_regions(pixels, boxes, modes)
         
-        return redaction_count
+        # Encode once, straight from the pixels, in the page's final PDF encoding
+        return self.encode_image(pixels), len(boxes)
+    
+    def _rasterize_tiles(self, page, tiles: List, boxes: List[List[int]], modes: List[str], page_lock=None) -> TiledPage:
+        """Render, redact and encode a page tile by tile (boxes are in whole-page pixels)"""
+        inverse = ~fitz.Matrix(self.scale_factor, self.scale_factor)
+        tiled = TiledPage()
+        for clip in tiles:
+            pix = self.raster_cache.take(page, self.scale_factor, clip=clip, page_lock=page_lock)
+            pixels = writable_pixels(pix)
+            # Regions are clipped to the tile; those outside it vanish
+            self.image_redaction.redact_regions(
+                pixels, [[x0 - pix.x, y0 - pix.y, x1 - pix.x, y1 - pix.y] for x0, y0, x1, y1 in boxes], modes)
+            tiled.tiles.append((tuple(fitz.Rect(pix.irect) * inverse), self.encode_image(pixels)))
+        logger.info(f"Page {page.number + 1}: rendered in {len(tiles)} tiles (over {self.raster_cache.max_pixels} pixels)")
+        return tiled
     
-    def _apply_single_redaction(self, img: Image.Image, draw: ImageDraw.Draw, detection: Dict, coords: List[float]) -> int:
+    def encode_image(self, pixels) -> EncodedImage:
         """
-        Apply a single redaction to an image
+        Encode redacted pixels for the output PDF
+        
+        In ``auto`` mode, photo-heavy images (scans, photos) become JPEG and
+        everything else lossless Flate, which is smaller for text and boxes.
         
         Args:
-            img: PIL Image object
-            draw: ImageDraw object
-            detection: Detection dictionary
-            coords: Coordinates for redaction
+            pixels: (H, W, 3) RGB pixels, as drawn on (``writable_pixels``)
             
         Returns:
-            1 if redaction applied, 0 if failed
+            EncodedImage ready for ``insert_encoded_image``
         """
-        try:
-            # Scale coordinates for the high-resolution image
-            x1, y1, x2, y2 = coords[:4]
-            x1, y1, x2, y2 = int(x1 * self.scale_factor), int(y1 * self.scale_factor), int(x2 * self.scale_factor), int(y2 * self.scale_factor)
-            
-            detection_type = detection.get('category', detection.get('type', 'unknown'))
-            detection_text = detection.get('text', detection.get('match_text', 'content'))
-            
-            logger.debug(f"Applying redaction: {detection_type} = '{detection_text}' at [{x1}, {y1}, {x2}, {y2}]")
-            
-            if 'image' in detection_type or 'photo' in detection_type or 'signature' in detection_type:
-                # Blur images
-                try:
-                    region = img.crop((x1, y1, x2, y2))
-                    blurred = region.filter(ImageFilter.GaussianBlur(radius=10))
-                    img.paste(blurred, (x1, y1))
-                    logger.debug(f"BLURRED {detection_type}: '{detection_text}'")
-                except Exception as e:
-                    logger.warning(f"Blur failed, using blackout: {e}")
-                    draw.rectangle([x1, y1, x2, y2], fill='black')
-                    logger.debug(f"BLACKED OUT {detection_type}: '{detection_text}'")
+        encoding = self.page_encoding
+        if encoding == ENCODING_AUTO:
+            fraction = photo_fraction(pixels)
+            encoding = ENCODING_JPEG if fraction >= settings.PAGE_JPEG_MIN_PHOTO_FRACTION else ENCODING_FLATE
+        if encoding == ENCODING_JPEG:
+            return encode_jpeg(pixels, settings.PAGE_JPEG_QUALITY)
+        return encode_flate(pixels, settings.PAGE_FLATE_LEVEL)
+    
+    def _page_regions(self, page_detections: List[DetectionResult]) -> Tuple[List[List[int]], List[str]]:
+        """Pixel boxes (scaled to the rendered page) and redaction modes, in detection order"""
+        boxes, modes = [], []
+        for detection in page_detections:
+            coords = detection.coordinates
+            if not coords or len(coords) < 4:
+                continue
+            x1, y1, x2, y2 = (int(c * self.scale_factor) for c in coords[:4])
+            if self._is_image_category(detection.category):
+                boxes.append([x1, y1, x2, y2])
+                modes.append(self.image_redaction.mode)
+                logger.debug(f"BLURRED {detection.category}: '{detection.text}' at [{x1}, {y1}, {x2}, {y2}]")
             else:
-                # Black out text
-                draw.rectangle([x1, y1, x2, y2], fill='black')
-                logger.debug(f"BLACKED OUT {detection_type}: '{detection_text}'")
+                # Black boxes include their end pixels
+                boxes.append([x1, y1, x2 + 1, y2 + 1])
+                modes.append(MODE_FILL)
+                logger.debug(f"BLACKED OUT {detection.category}: '{detection.text}' at [{x1}, {y1}, {x2}, {y2}]")
+        return boxes, modes
+    
+    def render_regions(self, page, page_detections: List[DetectionResult], page_lock=None) -> Tuple[RegionRedaction, int]:
+        """
+        Plan a page's redactions without rasterizing the page
+        
+        Text areas become filled scrub areas on the vector page. Image areas
+        (photos, signatures) are rendered alone via ``get_pixmap(clip=...)``,
+        blurred in place and laid back over their scrubbed area, so the cost
+        follows the redacted area rather than the page size. An area over the
+        pixel budget is rendered at a reduced scale.
+        
+        Args:
+            page: PyMuPDF page object
+            page_detections: Detections for this page
+            page_lock: Optional lock held while reading the page
             
-            return 1
+        Returns:
+            Tuple of (RegionRedaction, number of redactions applied)
+        """
+        regions = RegionRedaction()
+        redaction_count = 0
+        
+        for detection in page_detections:
+            coords = detection.coordinates
+            if not coords or len(coords) < 4:
+                continue
+            rect = fitz.Rect(coords[:4]) & page.rect
+            if rect.is_empty:
+                continue
             
+            if self._is_image_category(detection.category):
+                scale = self.raster_cache.fit_scale(rect, self.scale_factor)
+                pix = self.raster_cache.take(page, scale, clip=rect, page_lock=page_lock)
+                pixels = writable_pixels(pix)
+                self.image_redaction.redact_regions(
+                    pixels, [[0, 0, pix.width, pix.height]], [self.image_redaction.mode])
+                # The patch covers whole device pixels; scrub exactly what it covers
+                patch_rect = fitz.Rect(pix.irect) * ~fitz.Matrix(scale, scale)
+                regions.scrub.append((patch_rect, None))
+                regions.patches.append((patch_rect, self.encode_image(pixels)))
+                logger.debug(f"BLURRED {detection.category}: '{detection.text}'")
+            else:
+                regions.scrub.append((rect, (0, 0, 0)))
+                logger.debug(f"BLACKED OUT {detection.category}: '{detection.text}'")
+            redaction_count += 1
+        
+        return regions, redaction_count
+    
+    @staticmethod
+    def _is_image_category(category: str) -> bool:
+        """Photos and signatures are blurred; everything else is blacked out"""
+        return 'image' in category or 'photo' in category or 'signature' in category
+    
+    @staticmethod
+    def new_output() -> OutputDocument:
+        """Empty output document for ``append_page`` and ``save_redacted_document``"""
+        return OutputDocument()
+    
+    def append_page(self, new_doc: OutputDocument, page, rendered: Any):
+        """
+        Add one output page: the rendered redacted image, or a copy of the original
+        
+        Args:
+            new_doc: Output document (pages must be appended in order)
+            page: Source PyMuPDF page
+            rendered: EncodedImage, TiledPage or RegionRedaction from ``render_page``, or None to
+                copy the page unchanged (in a run with its unchanged neighbours)
+        """
+        # The page is final; no stage needs its rasters any more
+        self.raster_cache.discard_page(page.number)
+        if rendered is None:
+            new_doc.copy_page(page)
+            return
+        
+        new_doc.flush()
+        if isinstance(rendered, RegionRedaction):
+            self._append_region_page(new_doc.doc, page, rendered)
+        elif isinstance(rendered, TiledPage):
+            new_page = new_doc.doc.new_page(width=page.rect.width, height=page.rect.height)
+            for rect, image in rendered.tiles:
+                insert_encoded_image(new_page, fitz.Rect(rect), image, new_doc.image_xrefs)
+        else:
+            new_page = new_doc.doc.new_page(width=page.rect.width, height=page.rect.height)
+            insert_encoded_image(new_page, page.rect, rendered, new_doc.image_xrefs)
+    
+    def _append_region_page(self, new_doc, page, regions: RegionRedaction):
+        """
+        Copy the page as vector content, remove what lies under its redactions, then add the patches
+        
+        The scrub deletes the underlying text and image pixels, so redacted
+        content cannot be recovered from the output. Annotations and form
+        fields are not copied, as with the rasterized pages.
+        """
+        _copy_pdf_pages(new_doc, page.parent, page.number, page.number)
+        new_page = new_doc[-1]
+        for rect, fill in regions.scrub:
+            new_page.add_redact_annot(rect, fill=fill, cross_out=False)
+        new_page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_PIXELS)
+        for rect, image in regions.patches:
+            insert_encoded_image(new_page, rect, image)
+    
+    def save_redacted_document(self, new_doc: OutputDocument, output_path: str, redaction_count: int,
+                               page_count: int) -> Dict:
+        """
+        Save (with the configured save profile) and close the output document
+        
+        Returns:
+            Dictionary with redaction results, output size and save time
+        """
+        new_doc.flush()
+        
+        # Save the new multi-page PDF
+        start = time.perf_counter()
+        self._save(new_doc.doc, output_path)
+        save_seconds = time.perf_counter() - start
+        new_doc.close()
+        output_bytes = os.path.getsize(output_path)
+        
+        logger.info(f"Applied {redaction_count} total redactions across {page_count} pages")
+        logger.info(f"Saved multi-page redacted PDF to: {output_path} "
+                    f"({output_bytes / 1024:.0f} KB, {self.save_profile} profile, {save_seconds:.2f}s)")
+        
+        return {
+            "success": True,
+            "total_redactions": redaction_count,
+            "pages_processed": page_count,
+            "output_path": output_path,
+            "output_bytes": output_bytes,
+            "save_seconds": round(save_seconds, 4),
+            "save_profile": self.save_profile,
+            "copied_page_runs": new_doc.copied_runs
+        }
+    
+    def _save(self, doc, output_path: str):
+        """Save with the profile's options, leaving out those the installed PyMuPDF lacks"""
+        options = {k: v for k, v in SAVE_PROFILES[self.save_profile].items() if k in _SAVE_OPTIONS}
+        if not self._linear_supported:
+            options.pop("linear", None)
+        try:
+            doc.save(output_path, **options)
         except Exception as e:
-            logger.error(f"Failed to apply redaction: {e}")
-            return 0
+            if not options.get("linear"):
+                raise
+            self._linear_supported = False
+            logger.warning(f"Linearized save failed, saving without linearization: {e}")
+            options.pop("linear")
+            doc.save(output_path, **options)
     
-    def apply_single_page_redaction(self, page, detections: List[Dict], output_path: str):
+    def apply_single_page_redaction(self, page, detections: List[DetectionResult], output_path: str):
         """
         Apply redaction to a single page document (legacy method for compatibility)
         
         Args:
             page: PyMuPDF page object
-            detections: List of detection dictionaries
+            detections: Located detections (DetectionResult records)
             output_path: Path to save redacted document
         """
         logger.info("Starting single page redaction process")
@@ -186,20 +517,18 @@ class RedactionEngineService:
         logger.info("Converting PDF page to high-resolution image")
         mat = fitz.Matrix(self.scale_factor, self.scale_factor)
         pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        img = Image.open(io.BytesIO(img_data))
-        draw = ImageDraw.Draw(img)
         
-        logger.info(f"Image size: {img.width}x{img.height}")
+        logger.info(f"Image size: {pix.width}x{pix.height}")
         
         redaction_count = 0
+        boxes, modes = [], []
         
         for idx, detection in enumerate(detections):
             logger.info(f"Processing redaction {idx + 1}/{len(detections)}")
             
-            text = detection['text']
-            category = detection['category']
-            coordinates = detection['coordinates']
+            text = detection.text
+            category = detection.category
+            coordinates = detection.coordinates
             
             logger.debug(f"Target: {category} = '{text}'")
             logger.debug(f"Original coordinates: {coordinates}")
@@ -209,47 +538,35 @@ class RedactionEngineService:
             scaled_coords = [
                 max(0, int(x0 * self.scale_factor)),
                 max(0, int(y0 * self.scale_factor)),
-                min(img.width, int(x1 * self.scale_factor)),
-                min(img.height, int(y1 * self.scale_factor))
+                min(pix.width, int(x1 * self.scale_factor)),
+                min(pix.height, int(y1 * self.scale_factor))
             ]
             
             logger.debug(f"Scaled coordinates: {scaled_coords}")
             
             # Apply redaction based on category
-            if category.startswith('image_'):
-                logger.debug("Applying image redaction")
-                try:
-                    if category == 'image_photo' or category == 'image_signature':
-                        # Blur for photos and signatures
-                        region = img.crop(scaled_coords)
-                        blurred = region.filter(ImageFilter.GaussianBlur(radius=12))
-                        img.paste(blurred, scaled_coords)
-                        logger.info(f"BLURRED {category}: '{text}'")
-                    else:
-                        # Black out for other images
-                        draw.rectangle(scaled_coords, fill=(0, 0, 0))
-                        logger.info(f"BLACKED OUT {category}: '{text}'")
-                except Exception as e:
-                    logger.error(f"Image redaction failed: {e}")
-                    # Fallback to black rectangle
-                    draw.rectangle(scaled_coords, fill=(0, 0, 0))
-                    logger.info(f"FALLBACK BLACKOUT: '{text}'")
+            if category in ('image_photo', 'image_signature'):
+                # Blur (or pixelate) photos and signatures
+                boxes.append(scaled_coords)
+                modes.append(self.image_redaction.mode)
+                logger.info(f"BLURRED {category}: '{text}'")
             else:
-                # Text redaction - always black out
-                logger.debug("Applying text redaction")
-                draw.rectangle(scaled_coords, fill=(0, 0, 0))
+                # Black out text and other images, end pixels included
+                x0s, y0s, x1s, y1s = scaled_coords
+                boxes.append([x0s, y0s, x1s + 1, y1s + 1])
+                modes.append(MODE_FILL)
                 logger.info(f"BLACKED OUT {category}: '{text}'")
             
             redaction_count += 1
             time.sleep(0.05)
         
+        # Apply every region in one batch (failed blurs fall back to black fill)
+        pixels = writable_pixels(pix)
+        self.image_redaction.redact_regions(pixels, boxes, modes)
+        
         # Save result
         logger.info("Saving redacted document")
         
-        # Convert PIL image back to PDF using PyMuPDF
-        temp_img_path = output_path.replace('.pdf', '_temp.png')
-        img.save(temp_img_path, format='PNG', quality=95)
-        
         # Create new PDF with the redacted image
         new_doc = fitz.open()
         page_width = 595  # A4 width in points
@@ -258,15 +575,11 @@ class RedactionEngineService:
         
         # Insert the redacted image
         img_rect = fitz.Rect(0, 0, page_width, page_height)
-        new_page.insert_image(img_rect, filename=temp_img_path)
+        insert_encoded_image(new_page, img_rect, self.encode_image(pixels))
         
         # Save the PDF
         new_doc.save(output_path)
         new_doc.close()
         
-        # Clean up temp image
-        if os.path.exists(temp_img_path):
-            os.remove(temp_img_path)
-        
         logger.info(f"Applied {redaction_count} total redactions")
         logger.info(f"Saved to: {output_path}")
\ No newline at end of file
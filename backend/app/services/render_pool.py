@@ -0,0 +1,128 @@
+"""
+Render Pool: redacted page rasterization in worker processes
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import fitz
+
+from ..core.config import settings
+from ..models.job import DetectionResult
+from .image_redaction import ImageRedactionService
+from .page_pipeline import mupdf_lock
+
+logger = logging.getLogger(__name__)
+
+# Worker process state: engines by configuration, recently used source documents
+_worker_engines: Dict[tuple, object] = {}
+_worker_documents: "OrderedDict[tuple, fitz.Document]" = OrderedDict()
+_WORKER_DOCUMENTS_KEPT = 4
+
+
+def _worker_document(source: tuple):
+    """Open a source PDF in this worker, reusing it while the file is unchanged"""
+    doc = _worker_documents.get(source)
+    if doc is None:
+        doc = _worker_documents[source] = fitz.open(source[0])
+        while len(_worker_documents) > _WORKER_DOCUMENTS_KEPT:
+            _worker_documents.popitem(last=False)[1].close()
+    _worker_documents.move_to_end(source)
+    return doc
+
+
+def _render_in_worker(source: tuple, page_num: int, page_detections: List[DetectionResult],
+                      scale_factor: float, image_redaction: ImageRedactionService) -> Tuple[Any, int]:
+    """Worker side of ``RenderPool.submit``: rasterize, redact and encode one page"""
+    # Imported here: the engine module imports this one
+    from .redaction_engine import RedactionEngineService
+    key = (scale_factor, image_redaction.mode, image_redaction.blur_sigma,
+           image_redaction.box_kernel, image_redaction.pixel_block)
+    engine = _worker_engines.get(key)
+    if engine is None:
+        engine = _worker_engines[key] = RedactionEngineService(
+            scale_factor=scale_factor, image_redaction=image_redaction, render_pool=RenderPool(processes=0))
+    return engine.rasterize_page(_worker_document(source)[page_num], page_detections)
+
+
+def _run_on_pages(func: Callable, source: tuple, page_numbers: List[int], args: tuple):
+    """Worker side of ``RenderPool.submit_pages``"""
+    return func(_worker_document(source), page_numbers, *args)
+
+
+class RenderPool:
+    """
+    Process pool rasterizing redacted pages outside the main process
+
+    In-process, every rasterization holds ``mupdf_lock``, so page rendering
+    cannot use more than one core. Workers open the source PDF themselves and
+    receive only a page number and its detections; the encoded page images
+    they return are inserted exactly as in-process renders are, so output is
+    byte-identical. Documents that are not files on disk render in-process.
+    """
+
+    def __init__(self, processes: int = None):
+        self.processes = settings.RENDER_PROCESSES if processes is None else processes
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def accepts(self, doc) -> bool:
+        """Whether a worker can render pages of this document"""
+        return self.processes > 0 and bool(doc.name) and os.path.isfile(doc.name)
+
+    def submit(self, page, page_detections: List[DetectionResult], scale_factor: float,
+               image_redaction: ImageRedactionService) -> Future:
+        """
+        Queue one page for rendering in a worker
+
+        Args:
+            page: PyMuPDF page of a document on disk
+            page_detections: Detections for this page
+            scale_factor: Rasterization scale
+            image_redaction: Image redaction settings to apply
+
+        Returns:
+            Future of (EncodedImage of the redacted page, or a TiledPage of one over
+            the pixel budget, and the number of redactions applied)
+        """
+        return self._get_pool().submit(
+            _render_in_worker, self._source(page.parent.name), page.number, list(page_detections),
+            scale_factor, image_redaction)
+
+    def submit_pages(self, func: Callable, path: str, page_numbers: List[int], *args) -> Future:
+        """
+        Queue other read-only page work on a PDF file in a worker
+
+        Args:
+            func: Module-level function called as ``func(document, page_numbers, *args)``
+            path: PDF file the worker opens itself
+            page_numbers: Pages to work on
+            *args: Further picklable arguments
+
+        Returns:
+            Future of the function's result
+        """
+        return self._get_pool().submit(_run_on_pages, func, self._source(path), list(page_numbers), args)
+
+    @staticmethod
+    def _source(path: str) -> tuple:
+        """Worker document key: the file and its version, so a rewritten file is reopened"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Worker pool, created on first use"""
+        with self._lock:
+            if self._pool is None:
+                # Forked workers start on the first submit; holding the lock keeps
+                # every other thread out of MuPDF while they are forked
+                with mupdf_lock:
+                    self._pool = ProcessPoolExecutor(max_workers=self.processes)
+                    self._pool.submit(os.getpid)
+                logger.info(f"Render pool started ({self.processes} processes)")
+            return self._pool
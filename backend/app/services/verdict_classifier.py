@@ -0,0 +1,207 @@
+"""
+Local verdict classifier distilled from recorded LLM YES/NO answers
+"""
+
+import os
+import json
+import time
+import zlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_verdict_text(text: str) -> str:
+    """Normalize candidate text the same way for logging, training and lookup"""
+    return ' '.join(text.split()).casefold()
+
+
+class VerdictLog:
+    """Append-only JSONL log of LLM verdicts used as training data"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, text: str, category: str, kind: str, verdict: bool):
+        """
+        Append a single verdict
+
+        Args:
+            text: Candidate text the LLM judged
+            category: PII category
+            kind: Prompt family ('agent' or 'name')
+            verdict: True if the LLM answered YES
+        """
+        entry = {
+            'text': normalize_verdict_text(text),
+            'category': category,
+            'kind': kind,
+            'verdict': bool(verdict),
+            'ts': time.time()
+        }
+        try:
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            logger.warning(f"Failed to record LLM verdict: {e}")
+
+    def load(self) -> List[Dict]:
+        """Load all recorded verdicts, skipping corrupt lines"""
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+
+class LocalVerdictClassifier:
+    """
+    Hashed character n-gram logistic regression over (kind, category, text)
+
+    Predictions are a sparse dot product over a few dozen hashed features,
+    so a verdict costs microseconds instead of a network round trip.
+    """
+
+    def __init__(self, dimensions: int = 2 ** 16, ngram_range: Tuple[int, int] = (2, 4)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.weights = np.zeros(dimensions, dtype=np.float64)
+        self.bias = 0.0
+        self.trained = False
+
+    def featurize(self, text: str, category: str, kind: str) -> List[int]:
+        """
+        Hash a candidate into feature indices
+
+        Args:
+            text: Candidate text
+            category: PII category
+            kind: Prompt family
+
+        Returns:
+            List of feature indices (duplicates count as repeated features)
+        """
+        normalized = normalize_verdict_text(text)
+        padded = f"^{normalized}$"
+        tokens = [f"k:{kind}", f"c:{category}", f"kc:{kind}:{category}", f"len:{min(len(normalized), 20)}"]
+        if normalized.isdigit():
+            tokens.append('digits')
+        if normalized.isalpha():
+            tokens.append('alpha')
+
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for start in range(max(1, len(padded) - n + 1)):
+                tokens.append(f"{n}:{padded[start:start + n]}")
+
+        return [zlib.crc32(token.encode('utf-8')) % self.dimensions for token in tokens]
+
+    def predict_proba(self, text: str, category: str, kind: str) -> float:
+        """Probability that the LLM would answer YES"""
+        indices = self.featurize(text, category, kind)
+        logit = self.bias + float(self.weights[indices].sum())
+        return 1.0 / (1.0 + np.exp(-logit))
+
+    def predict(self, text: str, category: str, kind: str) -> Tuple[bool, float]:
+        """
+        Predict a verdict with its confidence
+
+        Returns:
+            Tuple of (verdict, confidence) where confidence is in [0.5, 1]
+        """
+        probability = self.predict_proba(text, category, kind)
+        verdict = probability >= 0.5
+        return verdict, probability if verdict else 1.0 - probability
+
+    def fit(self, records: Iterable[Dict], epochs: int = 200, learning_rate: float = 0.5, l2: float = 1e-4) -> Dict[str, float]:
+        """
+        Train with full-batch gradient descent on the sparse hashed features
+
+        Args:
+            records: Verdict records with text/category/kind/verdict keys
+            epochs: Gradient steps
+            learning_rate: Step size
+            l2: L2 regularisation strength
+
+        Returns:
+            Training summary
+        """
+        rows, cols, labels = [], [], []
+        for row, record in enumerate(records):
+            indices = self.featurize(record['text'], record['category'], record['kind'])
+            rows.extend([row] * len(indices))
+            cols.extend(indices)
+            labels.append(1.0 if record['verdict'] else 0.0)
+
+        if not labels:
+            raise ValueError("No verdicts to train on")
+
+        rows_arr = np.asarray(rows, dtype=np.int64)
+        cols_arr = np.asarray(cols, dtype=np.int64)
+        y = np.asarray(labels, dtype=np.float64)
+        n_samples = len(y)
+
+        weights = np.zeros(self.dimensions, dtype=np.float64)
+        bias = 0.0
+        for _ in range(epochs):
+            logits = np.bincount(rows_arr, weights=weights[cols_arr], minlength=n_samples) + bias
+            error = 1.0 / (1.0 + np.exp(-logits)) - y
+            gradient = np.bincount(cols_arr, weights=error[rows_arr], minlength=self.dimensions) / n_samples
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * float(error.mean())
+
+        self.weights = weights
+        self.bias = bias
+        self.trained = True
+
+        logits = np.bincount(rows_arr, weights=weights[cols_arr], minlength=n_samples) + bias
+        accuracy = float(((logits >= 0) == (y >= 0.5)).mean())
+        return {'samples': n_samples, 'positive_rate': float(y.mean()), 'train_accuracy': accuracy}
+
+    def save(self, path: str):
+        """Persist the model as a compressed NumPy archive"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights.astype(np.float32),
+            bias=np.array([self.bias]),
+            dimensions=np.array([self.dimensions]),
+            ngram_range=np.array(self.ngram_range)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalVerdictClassifier':
+        """Load a model saved with ``save``"""
+        with np.load(path) as archive:
+            model = cls(int(archive['dimensions'][0]), tuple(int(n) for n in archive['ngram_range']))
+            model.weights = archive['weights'].astype(np.float64)
+            model.bias = float(archive['bias'][0])
+        model.trained = True
+        return model
+
+    @classmethod
+    def load_if_exists(cls, path: str) -> Optional['LocalVerdictClassifier']:
+        """Load a model if one has been trained, otherwise return None"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            model = cls.load(path)
+            logger.info(f"Loaded local verdict classifier from {path}")
+            return model
+        except Exception as e:
+            logger.warning(f"Failed to load local verdict classifier: {e}")
+            return None
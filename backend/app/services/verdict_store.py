@@ -0,0 +1,147 @@
+"""
+Verdict Store Service: persistent LLM verdict cache that survives restarts
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from ..core.config import settings
+from .verdict_classifier import normalize_verdict_text
+
+logger = logging.getLogger(__name__)
+
+
+class VerdictStoreService:
+    """SQLite (WAL mode) store of LLM YES/NO answers keyed by text, category and prompt template"""
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.path = path or settings.VERDICT_STORE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.VERDICT_STORE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.VERDICT_STORE_MAX_ENTRIES
+        self.evict_every = 100  # writes between eviction sweeps
+        self.touch_batch = 100  # hits whose last-use times are written together
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: Dict[Tuple[str, str, str], float] = {}  # key -> last use not yet written
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                text TEXT NOT NULL,
+                category TEXT NOT NULL,
+                template TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (text, category, template)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts (last_used_at)")
+        self._conn.commit()
+        logger.info(f"Verdict Store Service initialized at {self.path}")
+
+    def get(self, text: str, category: str, template: str) -> Optional[str]:
+        """
+        Look up a stored LLM answer
+
+        Args:
+            text: Candidate text (normalized internally)
+            category: PII category
+            template: Prompt template version the verdict was produced with
+
+        Returns:
+            Stored answer (e.g. "YES"), or None if missing or expired
+        """
+        key = (normalize_verdict_text(text), category, template)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM verdicts WHERE text = ? AND category = ? AND template = ?",
+                key
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            # Last-use times only order evictions: keep them in memory and write them in batches
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, text: str, category: str, template: str, response: str):
+        """
+        Store an LLM answer, replacing any previous one for the same key
+
+        Args:
+            text: Candidate text (normalized internally)
+            category: PII category
+            template: Prompt template version
+            response: Raw YES/NO answer (kept verbatim so response parsing is unchanged on replay)
+        """
+        now = time.time()
+        key = (normalize_verdict_text(text), category, template)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (text, category, template, response, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, response, now, now)
+            )
+            self._conn.commit()
+
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired rows, then least recently used rows above the size limit (lock held)"""
+        self._flush_touches()
+        self._conn.execute("DELETE FROM verdicts WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE rowid IN (SELECT rowid FROM verdicts ORDER BY last_used_at ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Verdict store evicted {excess} least recently used entries")
+        self._conn.commit()
+
+    def _flush_touches(self):
+        """Write pending last-use times (lock held; the caller commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE verdicts SET last_used_at = ? WHERE text = ? AND category = ? AND template = ?",
+                [(used_at, *key) for key, used_at in self._touched.items()]
+            )
+            self._touched = {}
+
+    def get_stats(self) -> Dict[str, int]:
+        """Store size and hit/miss counters since startup"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        return {'entries': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
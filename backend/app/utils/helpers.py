@@ -4,6 +4,7 @@ Helper utility functions
 
 import os
 import uuid
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional
@@ -59,6 +60,20 @@ def get_file_size(file_path: str) -> Optional[int]:
         logger.error(f"Failed to get file size for {file_path}: {e}")
         return None
 
+async def write_file_async(file_path: str, content: bytes) -> None:
+    """
+    Write bytes to a file without blocking the event loop
+    
+    Args:
+        file_path: Destination path
+        content: File content
+    """
+    def write():
+        with open(file_path, "wb") as buffer:
+            buffer.write(content)
+    
+    await asyncio.to_thread(write)
+
 def is_pdf_file(filename: str) -> bool:
     """
     Check if filename has PDF extension
@@ -0,0 +1,132 @@
+"""
+Offline end-to-end benchmark of the redaction pipeline
+
+Runs every PDF in a directory through PIIProcessorService and reports per-document
+latency, overall throughput and LLM call counts. Record once against the live API
+(or the stub server), then replay the recording with injected latency to get
+reproducible numbers without network access:
+
+    python scripts/benchmark_pipeline.py --mode record
+    python scripts/benchmark_pipeline.py --mode replay --latency recorded
+    python scripts/benchmark_pipeline.py --mode replay --latency lognormal:-1.6,0.5 --repeat 3
+
+Documents run one at a time through the serial pipeline, without hedged LLM
+requests, so every run issues the same calls in the same order. Persistent caches
+(verdict store, local classifier, verdict log, image hash index) are disabled by
+default so repeated runs do identical work; pass --keep-caches to measure them.
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import logging
+import argparse
+import tempfile
+import statistics
+
+import fitz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the redaction pipeline over a directory of PDFs")
+    parser.add_argument("--input", default=settings.UPLOAD_DIR, help="Directory of input PDFs")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--recording", default=settings.LLM_TRANSPORT_PATH, help="Recording file (JSONL)")
+    parser.add_argument("--latency", default=settings.LLM_REPLAY_LATENCY, help="Injected replay latency spec")
+    parser.add_argument("--prompt", default="hide all personal information")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the input set")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N documents")
+    parser.add_argument("--keep-caches", action="store_true",
+                        help="Keep verdict store / local classifier / image hash index enabled")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    settings.LLM_TRANSPORT_MODE = args.mode
+    settings.LLM_TRANSPORT_PATH = args.recording
+    settings.LLM_REPLAY_LATENCY = args.latency
+    if args.mode == "record" and os.path.exists(args.recording):
+        os.remove(args.recording)
+    # Deterministic call order: no overlapping pages, no racing duplicate requests
+    settings.PIPELINE_MODE = "serial"
+    settings.ASYNC_PROCESSING = False
+    settings.GROQ_HEDGE_DELAY = None
+    if not args.keep_caches:
+        settings.VERDICT_STORE_ENABLED = False
+        settings.LOCAL_CLASSIFIER_ENABLED = False
+        settings.LLM_VERDICT_LOG_ENABLED = False
+        settings.IMAGE_HASH_INDEX_ENABLED = False
+
+    # Imported after the settings overrides so services pick them up
+    from app.services.pii_processor import PIIProcessorService
+
+    documents = sorted(glob.glob(os.path.join(args.input, "*.pdf")))[:args.limit]
+    if not documents:
+        print(f"No PDFs found in {args.input}")
+        return 1
+
+    processor = PIIProcessorService()
+    latencies, pages, failures = [], 0, 0
+    llm_calls = llm_avoided = 0
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        wall_start = time.perf_counter()
+        for _ in range(args.repeat):
+            for index, path in enumerate(documents):
+                output_path = os.path.join(output_dir, f"{index}.pdf")
+                start = time.perf_counter()
+                result = processor.process_document(path, output_path, redaction_prompt=args.prompt)
+                latencies.append(time.perf_counter() - start)
+                if not result.get('success'):
+                    failures += 1
+                    continue
+                stats = result['stats']
+                with fitz.open(path) as doc:
+                    pages += len(doc)
+                llm_calls += stats.get('llm_calls_made', 0)
+                llm_avoided += stats.get('llm_calls_avoided', 0)
+        wall = time.perf_counter() - wall_start
+
+    report = {
+        'mode': args.mode,
+        'latency_spec': args.latency if args.mode == "replay" else None,
+        'documents': len(latencies),
+        'failures': failures,
+        'pages': pages,
+        'wall_seconds': round(wall, 3),
+        'docs_per_second': round(len(latencies) / wall, 3),
+        'pages_per_second': round(pages / wall, 3),
+        'latency_mean': round(statistics.mean(latencies), 3),
+        'latency_p50': round(percentile(latencies, 50), 3),
+        'latency_p95': round(percentile(latencies, 95), 3),
+        'llm_calls_made': llm_calls,
+        'llm_calls_avoided': llm_avoided
+    }
+    replay_misses = getattr(processor.llm_agent.transport, 'misses', None)
+    if replay_misses is not None:
+        report['replay_misses'] = replay_misses
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Offline evaluation of the local verdict classifier against recorded LLM verdicts
+
+Trains on a deterministic split of the verdict log and reports, on the held-out
+part, overall agreement with the LLM plus coverage and agreement at the serving
+confidence threshold (the fraction of calls that would be answered locally).
+
+Usage (from the backend directory):
+    python scripts/evaluate_verdict_classifier.py [--log data/llm_verdicts.jsonl] [--holdout 0.2]
+"""
+
+import os
+import sys
+import time
+import zlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.verdict_classifier import VerdictLog, LocalVerdictClassifier
+
+
+def split_records(records, holdout: float):
+    """Split by hashed text so repeated values never straddle train and test"""
+    train, test = [], []
+    for record in records:
+        bucket = zlib.crc32(record['text'].encode('utf-8')) % 1000
+        (test if bucket < holdout * 1000 else train).append(record)
+    return train, test
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local verdict classifier")
+    parser.add_argument("--log", default=settings.LLM_VERDICT_LOG_PATH, help="Verdict log (JSONL)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Held-out fraction")
+    parser.add_argument("--threshold", type=float, default=settings.LOCAL_CLASSIFIER_THRESHOLD)
+    args = parser.parse_args()
+
+    records = VerdictLog(args.log).load()
+    train, test = split_records(records, args.holdout)
+    if not train or not test:
+        print(f"Not enough verdicts to evaluate ({len(records)} recorded)")
+        return 1
+
+    model = LocalVerdictClassifier()
+    model.fit(train)
+
+    agree = confident = confident_agree = 0
+    confusion = {(True, True): 0, (True, False): 0, (False, True): 0, (False, False): 0}
+    start = time.perf_counter()
+    for record in test:
+        verdict, confidence = model.predict(record['text'], record['category'], record['kind'])
+        expected = bool(record['verdict'])
+        confusion[(expected, verdict)] += 1
+        agree += verdict == expected
+        if confidence >= args.threshold:
+            confident += 1
+            confident_agree += verdict == expected
+    per_call_us = (time.perf_counter() - start) / len(test) * 1e6
+
+    print(f"Train/test verdicts: {len(train)}/{len(test)}")
+    print(f"Overall agreement with LLM: {agree / len(test):.1%}")
+    print(f"Answered locally at threshold {args.threshold:.2f}: {confident / len(test):.1%}")
+    if confident:
+        print(f"Agreement on locally answered: {confident_agree / confident:.1%}")
+    print(f"Confusion (LLM, local): YES/YES={confusion[(True, True)]} YES/NO={confusion[(True, False)]} "
+          f"NO/YES={confusion[(False, True)]} NO/NO={confusion[(False, False)]}")
+    print(f"Mean prediction latency: {per_call_us:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
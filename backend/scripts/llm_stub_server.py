@@ -0,0 +1,87 @@
+"""
+Fault-injecting stub of the GROQ chat completions endpoint
+
+Serves OpenAI-style responses locally with configurable latency, error and
+hang rates so the LLM call policies (circuit breaker, job budget, retries,
+hedging) can be exercised without network access.
+
+Usage (from the backend directory):
+    python scripts/llm_stub_server.py --port 8099 --latency-ms 200 --error-rate 0.3 --hang-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8099/openai/v1/chat/completions python main.py
+"""
+
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(args):
+    """Build a request handler bound to the fault-injection options"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode('utf-8')
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client already gave up (timeout or hedge winner elsewhere)
+                pass
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+
+            roll = random.random()
+            if roll < args.hang_rate:
+                # Simulate a request that never answers within the client timeout
+                time.sleep(args.hang_seconds)
+                return self._send_json(504, {'error': 'stub hang'})
+
+            latency = max(0.0, random.gauss(args.latency_ms, args.jitter_ms)) / 1000.0
+            time.sleep(latency)
+
+            if roll < args.hang_rate + args.error_rate:
+                return self._send_json(args.error_status, {'error': 'stub injected failure'})
+
+            answer = args.answer if args.answer != 'random' else random.choice(['YES', 'NO'])
+            self._send_json(200, {'choices': [{'message': {'role': 'assistant', 'content': answer}}]})
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fault-injecting GROQ stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction that sleep for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--answer", default="YES", help="YES, NO or random")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"GROQ stub listening on http://{args.host}:{args.port}/openai/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Train the local verdict classifier from recorded LLM verdicts
+
+Usage (from the backend directory):
+    python scripts/train_verdict_classifier.py [--log data/llm_verdicts.jsonl] [--out data/verdict_classifier.npz]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.verdict_classifier import VerdictLog, LocalVerdictClassifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local verdict classifier")
+    parser.add_argument("--log", default=settings.LLM_VERDICT_LOG_PATH, help="Verdict log (JSONL)")
+    parser.add_argument("--out", default=settings.LOCAL_CLASSIFIER_PATH, help="Output model path (.npz)")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    records = VerdictLog(args.log).load()
+    if not records:
+        print(f"No verdicts found in {args.log}")
+        return 1
+
+    model = LocalVerdictClassifier()
+    summary = model.fit(records, epochs=args.epochs, learning_rate=args.learning_rate, l2=args.l2)
+    model.save(args.out)
+
+    print(f"Trained on {summary['samples']} verdicts (YES rate {summary['positive_rate']:.1%})")
+    print(f"Training agreement with LLM: {summary['train_accuracy']:.1%}")
+    print(f"Saved model to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
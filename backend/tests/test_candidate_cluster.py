@@ -0,0 +1,124 @@
+"""
+Candidate clusters: sampled LLM verdicts shared with same-shaped, same-labelled candidates
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.models.job import DetectionResult
+from app.services.candidate_cluster import CandidateClusterService
+from app.services.candidate_scorer import CandidateScorerService
+from app.services.llm_agent import LLMAgentService
+from app.services.prompt_interpreter import PromptInterpreterService
+
+NAMES = ["RAVINDRA", "SURESH", "MAHESH", "DINESH", "GANESH"]
+
+
+def page_words(text: str):
+    return [(10.0 * index, 0.0, 10.0 * index + 8, 10.0, word, 0, 0, index)
+            for index, word in enumerate(text.split())]
+
+
+@pytest.fixture
+def scorer():
+    scorer = CandidateScorerService()
+    scorer.start_document()
+    return scorer
+
+
+@pytest.fixture
+def clusters(scorer, monkeypatch):
+    monkeypatch.setattr(settings, 'LLM_CLUSTER_SAMPLE_SIZE', 2)
+    monkeypatch.setattr(settings, 'LLM_CLUSTER_MAX_SIZE', 2)
+    clusters = CandidateClusterService(scorer)
+    clusters.start_job()
+    return clusters
+
+
+def labelled(scorer, page_num: int, name: str):
+    text = f"Candidate Name: {name}"
+    return scorer.build_page_context(page_num, text, page_words(text))
+
+
+def test_labelled_candidates_of_one_shape_share_a_key(scorer, clusters):
+    first = clusters.cluster_key("RAVINDRA", 'person_names', labelled(scorer, 0, "RAVINDRA"))
+    second = clusters.cluster_key("SURESH", 'person_names', labelled(scorer, 1, "SURESH"))
+
+    assert first == second == ('person_names', 'A', 'name')
+
+
+def test_unlabelled_candidates_are_not_clustered(scorer, clusters):
+    page_context = scorer.build_page_context(0, "Remarks RAVINDRA", page_words("Remarks RAVINDRA"))
+
+    assert clusters.cluster_key("RAVINDRA", 'person_names', page_context) is None
+    assert clusters.cluster_key("RAVINDRA", 'person_names', None) is None
+
+
+def test_verdict_is_shared_once_the_sample_agrees_then_resampled(clusters):
+    key = ('person_names', 'A', 'name')
+    for _ in range(2):
+        assert clusters.shared_verdict(key) is None
+        clusters.record(key, True)
+
+    assert [clusters.shared_verdict(key) for _ in range(2)] == [True, True]
+    # LLM_CLUSTER_MAX_SIZE shared: the next member starts a fresh sample
+    assert clusters.shared_verdict(key) is None
+    [audit] = clusters.audit()
+    assert (audit['members'], audit['validated'], audit['shared']) == (5, 2, 2)
+
+
+def test_disagreeing_sample_marks_the_cluster_mixed(clusters):
+    key = ('person_names', 'A', 'name')
+    clusters.record(key, True)
+    clusters.record(key, False)
+    clusters.record(key, True)
+
+    assert clusters.shared_verdict(key) is None
+    [audit] = clusters.audit()
+    assert audit['mixed'] and audit['verdict'] is None
+
+
+def test_clusters_do_not_span_jobs(clusters):
+    key = ('person_names', 'A', 'name')
+    clusters.record(key, True)
+    clusters.start_job()
+
+    assert clusters.audit() == []
+
+
+@pytest.fixture
+def interpreter(scorer, clusters, monkeypatch, tmp_path):
+    """Name checks through the LLM agent (answering YES) with clusters, without the local gate"""
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_MODE', 'replay')
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_PATH', str(tmp_path / "no_recording.jsonl"))
+    for name in ('VERDICT_STORE_ENABLED', 'LOCAL_CLASSIFIER_ENABLED', 'LLM_VERDICT_LOG_ENABLED'):
+        monkeypatch.setattr(settings, name, False)
+    agent = LLMAgentService()
+    agent.prompts = []
+    monkeypatch.setattr(agent, 'call_groq_api', lambda prompt, max_tokens=10: agent.prompts.append(prompt) or "YES")
+    return PromptInterpreterService(llm_agent=agent, candidate_clusters=clusters)
+
+
+def test_name_checks_ask_the_llm_only_for_the_sample(scorer, interpreter):
+    rules = interpreter.compile_redaction_prompt("hide names")
+
+    decisions = [interpreter.should_redact_detection(DetectionResult(name, 'person_names'), rules,
+                                                     labelled(scorer, page_num, name))
+                 for page_num, name in enumerate(NAMES[:4])]
+
+    assert decisions == [True] * 4
+    assert len(interpreter.llm_agent.prompts) == 2
+    assert interpreter.stats.llm_cluster_shared == 2
+
+
+def test_id_numbers_are_decided_locally_so_there_is_nothing_to_cluster(scorer, interpreter):
+    rules = interpreter.compile_redaction_prompt("hide id numbers")
+
+    for page_num in range(3):
+        text = "Application No 128230000295"
+        page_context = scorer.build_page_context(page_num, text, page_words(text))
+        detection = DetectionResult("128230000295", 'identification_numbers')
+        assert interpreter.should_redact_detection(detection, rules, page_context)
+
+    assert interpreter.llm_agent.prompts == []
+    assert interpreter.candidate_clusters.audit() == []
@@ -0,0 +1,80 @@
+"""
+Candidate scorer: the local LLM gate and its document-wide repeat counts
+"""
+
+import pytest
+
+from app.services.candidate_scorer import CandidateScorerService
+
+
+def page_words(text: str):
+    """Word tuples as ``page.get_text("words")`` returns them (one word per 10pt)"""
+    return [(10.0 * index, 0.0, 10.0 * index + 8, 10.0, word, 0, 0, index)
+            for index, word in enumerate(text.split())]
+
+
+@pytest.fixture
+def scorer():
+    scorer = CandidateScorerService()
+    scorer.start_document()
+    return scorer
+
+
+def context(scorer, page_num: int, text: str):
+    return scorer.build_page_context(page_num, text, page_words(text))
+
+
+@pytest.mark.parametrize("text, page_text, expected", [
+    ("ASHISH", "Candidate Name: ASHISH", True),  # capitals right after a name label: 0.9
+    ("ashish", "remarks ashish", False),  # lowercase: 0.25
+    ("Kumar", "Remarks Kumar", None),  # title case alone: 0.6, left to the LLM
+])
+def test_gate_decides_outside_the_uncertain_band(scorer, text, page_text, expected):
+    assert scorer.gate(text, 'person_names', context(scorer, 0, page_text)) is expected
+
+
+def test_gate_thresholds_are_inclusive(scorer):
+    page_context = context(scorer, 0, "Remarks Kumar")
+    assert scorer.score_candidate("Kumar", 'person_names', page_context) == 0.6
+
+    scorer.high_threshold = 0.6
+    assert scorer.gate("Kumar", 'person_names', page_context) is True
+    scorer.high_threshold, scorer.low_threshold = 0.75, 0.6
+    assert scorer.gate("Kumar", 'person_names', page_context) is False
+
+
+def test_gate_is_off_when_disabled(scorer):
+    scorer.enabled = False
+    assert scorer.gate("ASHISH", 'person_names', context(scorer, 0, "Candidate Name: ASHISH")) is None
+
+
+def test_repeat_counts_cover_the_whole_document_whatever_the_page_order(scorer):
+    pages = ["Candidate Name: ASHISH", "Footer ASHISH", "Footer ASHISH", "Footer ASHISH"]
+    for page_num, text in enumerate(pages):
+        scorer.count_page_words(page_num, page_words(text))
+
+    last = context(scorer, 3, pages[3])
+    first = context(scorer, 0, pages[0])
+
+    # The first page already sees the later repeats: 0.9 less the repetition penalty
+    assert first.repeat_counts['ashish'] == 4
+    assert scorer.score_candidate("ASHISH", 'person_names', first) == 0.7
+    assert scorer.gate("ASHISH", 'person_names', first) is None
+    assert last.repeat_counts['ashish'] == 4
+
+
+def test_page_contexts_share_one_read_only_count_mapping(scorer):
+    first = context(scorer, 0, "Candidate Name: ASHISH")
+    second = context(scorer, 1, "Footer ASHISH")
+
+    assert first.repeat_counts['ashish'] == second.repeat_counts['ashish'] == 2
+    with pytest.raises(TypeError):
+        first.repeat_counts['ashish'] = 0
+
+
+def test_a_page_is_counted_once(scorer):
+    scorer.count_page_words(0, page_words("Footer ASHISH"))
+    context(scorer, 0, "Footer ASHISH")
+    context(scorer, 0, "Footer ASHISH")
+
+    assert scorer.document_counts['ashish'] == 1
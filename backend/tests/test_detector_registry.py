@@ -0,0 +1,85 @@
+"""
+Detector registry: detector phases and page locking
+"""
+
+import threading
+
+import fitz
+import numpy as np
+import pytest
+
+from app.models.job import DetectionResult
+from app.services.coordinate_mapper import CoordinateMapperService
+from app.services.detector_registry import COST_CHEAP, Detector, DetectorRegistry, PageInput
+from app.services.detectors import OCRRegionDetector
+from app.services.pii_detection import PIIDetectionService
+from app.services.prompt_interpreter import PromptInterpreterService
+from app.services.raster_cache import RasterCacheService
+
+
+class SinglePhaseDetector(Detector):
+    name = "single"
+    two_phase = False
+
+    def detect(self, page_input):
+        return [DetectionResult("X", 'person_names', [0, 0, 1, 1])]
+
+
+class IncompleteDetector(Detector):
+    name = "incomplete"
+
+
+def registry_with(*detectors):
+    registry = DetectorRegistry(max_workers=2)
+    for detector in detectors:
+        registry.register(detector)
+    registry.start_job(detectors[0].stats)
+    return registry
+
+
+def test_single_phase_detector_does_its_work_in_the_candidate_phase():
+    registry = registry_with(SinglePhaseDetector())
+    page_input = PageInput(page_num=0)
+
+    candidates = registry.find_page_candidates(page_input)
+
+    assert [d.text for d in candidates['single']] == ["X"]
+    assert [d.text for d in registry.validate_page(page_input, candidates)] == ["X"]
+
+
+def test_two_phase_detector_without_find_candidates_names_what_is_missing():
+    registry = registry_with(IncompleteDetector())
+
+    with pytest.raises(RuntimeError, match="must implement find_candidates"):
+        registry.find_page_candidates(PageInput(page_num=0))
+
+
+@pytest.fixture
+def image_page():
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=300)
+    photo = np.full((100, 100, 3), 128, np.uint8)
+    page.insert_image(fitz.Rect(50, 50, 250, 250), pixmap=fitz.Pixmap(fitz.csRGB, 100, 100, photo.tobytes(), False))
+    yield page
+    doc.close()
+
+
+def test_ocr_region_runs_tesseract_without_the_page_lock(image_page, monkeypatch):
+    pytesseract = pytest.importorskip("pytesseract")
+    page_lock = threading.Lock()
+    lock_held = []
+
+    def image_to_data(image, output_type=None):
+        lock_held.append(page_lock.locked())
+        return {key: [] for key in ("text", "conf", "block_num", "par_num", "line_num",
+                                    "left", "top", "width", "height")}
+
+    monkeypatch.setattr(pytesseract, 'image_to_data', image_to_data)
+    detector = OCRRegionDetector(PIIDetectionService(), PromptInterpreterService(), CoordinateMapperService(),
+                                 min_area=100, raster_cache=RasterCacheService())
+    registry = registry_with(detector)
+
+    registry.find_page_candidates(PageInput(page_num=0, page=image_page, page_lock=page_lock))
+
+    assert lock_held == [False]
+    assert detector.cost_class != COST_CHEAP and detector.needs_page
@@ -0,0 +1,86 @@
+"""
+Image redaction: rasterized pages are redacted in place on the pinned PyMuPDF
+"""
+
+import fitz
+import numpy as np
+import pytest
+
+from app.services.image_redaction import ImageRedactionService, MODE_FILL, REDACTION_MODES
+from app.utils.images import encode_flate, insert_encoded_image, pixel_view, writable_pixels
+
+SCALE = 2.0
+
+
+@pytest.fixture
+def page():
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((20, 40), "Email: jane.doe@example.com", fontsize=14)
+    # A continuous-tone patch for the blur modes to work on
+    page.draw_rect(fitz.Rect(150, 100, 250, 180), color=None, fill=(0.2, 0.6, 0.9))
+    page.draw_line((150, 100), (250, 180), color=(1, 1, 1), width=6)
+    yield page
+    doc.close()
+
+
+def render(page):
+    return page.get_pixmap(matrix=fitz.Matrix(SCALE, SCALE), alpha=False)
+
+
+def text_box(page, text):
+    rect = page.search_for(text)[0] * fitz.Matrix(SCALE, SCALE)
+    return [int(rect.x0), int(rect.y0), int(rect.x1) + 1, int(rect.y1) + 1]
+
+
+def test_fill_blacks_out_text_on_a_rendered_page(page):
+    pix = render(page)
+    pixels = writable_pixels(pix)
+    box = text_box(page, "jane.doe@example.com")
+    before = pixels.copy()
+
+    applied = ImageRedactionService(mode=MODE_FILL).redact_regions(pixels, [box], [MODE_FILL])
+
+    x0, y0, x1, y1 = box
+    assert applied == 1
+    assert before[y0:y1, x0:x1].any()
+    assert not pixels[y0:y1, x0:x1].any()
+    outside = np.ones(pixels.shape[:2], dtype=bool)
+    outside[y0:y1, x0:x1] = False
+    assert np.array_equal(pixels[outside], before[outside])
+
+
+@pytest.mark.parametrize("mode", REDACTION_MODES)
+def test_every_mode_changes_only_its_region(page, mode):
+    pix = render(page)
+    pixels = writable_pixels(pix)
+    box = [300, 200, 500, 360]
+    before = pixels.copy()
+
+    ImageRedactionService(mode=mode).redact_regions(pixels, [box], [mode])
+
+    x0, y0, x1, y1 = box
+    assert not np.array_equal(pixels[y0:y1, x0:x1], before[y0:y1, x0:x1])
+    assert np.array_equal(pixels[:y0], before[:y0])
+    assert np.array_equal(pixels[:, :x0], before[:, :x0])
+
+
+def test_redacted_pixels_are_what_gets_encoded(page):
+    pix = render(page)
+    pixels = writable_pixels(pix)
+    ImageRedactionService(mode=MODE_FILL).redact_regions(pixels, [[0, 0, pix.width, pix.height]], [MODE_FILL])
+
+    image = encode_flate(pixels)
+    out = fitz.open()
+    out_page = out.new_page(width=300, height=200)
+    insert_encoded_image(out_page, out_page.rect, image)
+
+    assert (image.width, image.height) == (pix.width, pix.height)
+    assert not out_page.get_pixmap(alpha=False).samples.strip(b"\x00")
+    out.close()
+
+
+def test_read_only_view_is_refused(page):
+    pix = render(page)
+    with pytest.raises(ValueError, match="writable"):
+        ImageRedactionService(mode=MODE_FILL).redact_regions(pixel_view(pix), [[0, 0, 10, 10]], [MODE_FILL])
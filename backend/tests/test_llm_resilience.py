@@ -0,0 +1,96 @@
+"""
+LLM call policies: per-job time budget and hedged requests, against a stub transport
+"""
+
+import time
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.models.job import ProcessingStats
+from app.services.job_context import job_scope
+from app.services.llm_agent import LLMAgentService
+from app.services.llm_resilience import LLMCallBudget
+
+
+class StubResponse:
+    status_code = 200
+
+    def json(self):
+        return {'choices': [{'message': {'content': 'YES'}}]}
+
+
+class StubTransport:
+    """Answers YES after the given delays, one per request in order (the last one repeats)"""
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self.posts = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, headers, data, timeout):
+        with self._lock:
+            delay = self.delays[min(self.posts, len(self.delays) - 1)]
+            self.posts += 1
+        time.sleep(delay)
+        return StubResponse()
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_MODE', 'replay')
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_PATH', str(tmp_path / "no_recording.jsonl"))
+    for name in ('VERDICT_STORE_ENABLED', 'LOCAL_CLASSIFIER_ENABLED', 'LLM_VERDICT_LOG_ENABLED'):
+        monkeypatch.setattr(settings, name, False)
+    return LLMAgentService()
+
+
+def test_budget_is_reserved_before_the_call_and_settled_after():
+    budget = LLMCallBudget(1.0)
+
+    first = budget.reserve(5.0)
+    second = budget.reserve(5.0)
+    assert (first, second) == (1.0, 0.0)
+    assert budget.remaining() == 0.0
+
+    budget.release(first, 0.25)
+    assert budget.spent == 0.25
+    assert budget.remaining() == 0.75
+
+
+def test_concurrent_calls_of_one_job_cannot_overspend_the_budget(agent):
+    agent.timeout = 0.5
+    agent.call_budget = LLMCallBudget(0.5)
+    agent.transport = StubTransport(0.2)
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(agent.call_groq_api("Is it a name?")))
+               for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The first call holds the whole budget while in flight; the others fall back at once
+    assert agent.transport.posts == 1
+    assert sorted(answers) == ["", "", "", "YES"]
+    assert agent.stats.llm_budget_exhausted == 3
+    assert agent.call_budget.spent <= 0.5
+
+
+def test_hedged_requests_count_towards_the_job_that_sent_them(agent):
+    agent.hedge_delay = 0.05
+    agent.transport = StubTransport(0.5, 0.0)
+    shared_stats = agent.stats
+
+    with job_scope():
+        agent.stats = job_stats = ProcessingStats()
+        agent.call_budget = LLMCallBudget(10.0)
+        assert agent.call_groq_api("Is it a name?") == "YES"
+        spent = agent.call_budget.spent
+
+    assert job_stats.llm_hedges == 1
+    assert job_stats.llm_calls_made == 2
+    assert shared_stats.llm_calls_made == 0
+    assert 0 < spent < 0.5
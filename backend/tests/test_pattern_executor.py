@@ -0,0 +1,103 @@
+"""
+Pattern executor: every match survives the time budget, under concurrent load too
+"""
+
+import re
+import time
+import threading
+
+import pytest
+
+from app.services.pattern_executor import PatternExecutorService, _regex
+from app.services.pii_detection import PIIDetectionService
+
+NAME_PATTERN = PIIDetectionService().enhanced_patterns['person_names'][1]
+TEXT = "Copyright IIRS ISRO All Rights Reserved. Approved by DEAN ACADEMICS, IPU DELHI. " * 10
+
+
+def yield_cpu():
+    """What the detection loop does between matches: lets other threads run"""
+    time.sleep(0.001)
+
+
+def expected_spans(pattern, text):
+    return [match.span() for match in re.finditer(pattern, text, re.IGNORECASE)]
+
+
+def executor_spans(executor, pattern, text, between=None):
+    spans = []
+    for match in executor.finditer('person_names', 1, pattern, text, page_num=0):
+        spans.append(match.span())
+        if between:
+            between()
+    return spans
+
+
+@pytest.fixture
+def busy_threads():
+    """Two CPU-bound threads competing for the GIL"""
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(10000))
+
+    threads = [threading.Thread(target=spin, daemon=True) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_all_matches_under_concurrent_load(busy_threads):
+    executor = PatternExecutorService(time_budget_ms=10.0)
+    assert executor_spans(executor, NAME_PATTERN, TEXT, yield_cpu) == expected_spans(NAME_PATTERN, TEXT)
+
+
+def test_concurrent_pages_match_sequential(busy_threads):
+    executor = PatternExecutorService(time_budget_ms=10.0)
+    expected = expected_spans(NAME_PATTERN, TEXT)
+    results = [None] * 4
+
+    def run(index):
+        results[index] = executor_spans(executor, NAME_PATTERN, TEXT, yield_cpu)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * len(results)
+
+
+def test_caller_time_between_matches_is_not_budgeted():
+    executor = PatternExecutorService(time_budget_ms=5.0)
+    spans = executor_spans(executor, NAME_PATTERN, TEXT[:400], between=lambda: time.sleep(0.01))
+    assert spans == expected_spans(NAME_PATTERN, TEXT[:400])
+    assert executor.get_report()['patterns'][0]['budget_hits'] == 0
+
+
+@pytest.mark.skipif(_regex is None, reason="hard timeouts need the regex package")
+def test_timed_out_search_stops_the_pattern_for_the_page():
+    # Exponential backtracking on the run of a's: unbounded, this search takes several seconds
+    pattern = r'(a|aa)+b|x\d'
+    text = "x1 x2 " + "a" * 34 + " x3 x4"
+    executor = PatternExecutorService(time_budget_ms=20.0)
+    start = time.perf_counter()
+    spans = executor_spans(executor, pattern, text)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.5
+    assert spans == [(0, 2), (3, 5)]
+    profile = executor.get_report()['patterns'][0]
+    assert profile['budget_hits'] == 1 and profile['timeouts'] == 1
+    assert 'timed_out' in profile['flags']
+
+
+def test_long_matches_are_kept_and_counted():
+    pattern = r'b+'
+    text = "b " + "b" * 60 + " bb"
+    executor = PatternExecutorService(max_match_chars=50)
+    assert executor_spans(executor, pattern, text) == expected_spans(pattern, text)
+    assert executor.get_report()['patterns'][0]['oversized_matches'] == 1
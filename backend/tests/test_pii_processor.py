@@ -0,0 +1,215 @@
+"""
+Processor end to end: documents are detected, redacted, saved and verified offline
+"""
+
+import os
+import asyncio
+
+import fitz
+import pytest
+
+from app.core.config import settings
+from app.models.page import WordBox
+from app.services.ocr_service import OCRService
+from app.services.pii_processor import PIIProcessorService
+
+EMAIL = "jane.doe@example.com"
+PHONE = "+91 98765 43210"
+
+
+@pytest.fixture
+def offline(monkeypatch, tmp_path):
+    """Settings for a processor that never reaches the network or the shared data directory"""
+    # An empty recording: every LLM call misses and the local fallbacks decide
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_MODE', 'replay')
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_PATH', str(tmp_path / "no_recording.jsonl"))
+    monkeypatch.setattr(settings, 'LLM_REPLAY_LATENCY', 'none')
+    for name in ('VERDICT_STORE_ENABLED', 'LOCAL_CLASSIFIER_ENABLED', 'LLM_VERDICT_LOG_ENABLED',
+                 'IMAGE_HASH_INDEX_ENABLED'):
+        monkeypatch.setattr(settings, name, False)
+    monkeypatch.setattr(settings, 'RENDER_PROCESSES', 0)
+    monkeypatch.setattr(settings, 'PIPELINE_MODE', settings.PIPELINE_MODE)  # restored after ``run`` changes it
+    return monkeypatch
+
+
+def text_document(path: str) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Application form", fontsize=12)
+    page.insert_text((72, 100), f"Email: {EMAIL}", fontsize=12)
+    page.insert_text((72, 128), f"Phone: {PHONE}", fontsize=12)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def scanned_document(path: str, text_source: str) -> str:
+    """The text document as a scan: each page is only an image of itself"""
+    doc = fitz.open()
+    with fitz.open(text_source) as original:
+        for page in original:
+            scan = doc.new_page(width=page.rect.width, height=page.rect.height)
+            scan.insert_image(scan.rect, pixmap=page.get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False))
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def run(processor: PIIProcessorService, mode: str, source: str, output: str):
+    """Process one document in a pipeline mode, or with the async API"""
+    if mode == "async":
+        return asyncio.run(processor.process_document_async(source, output))
+    settings.PIPELINE_MODE = mode
+    return processor.process_document(source, output)
+
+
+def output_text(path: str) -> str:
+    with fitz.open(path) as doc:
+        return ''.join(page.get_text() for page in doc)
+
+
+@pytest.mark.parametrize("mode", ["serial", "staged", "async"])
+def test_text_page_is_redacted(offline, tmp_path, mode):
+    source = text_document(str(tmp_path / "form.pdf"))
+    output = str(tmp_path / "redacted.pdf")
+
+    result = run(PIIProcessorService(), mode, source, output)
+
+    assert result['success'], result.get('error')
+    assert result['pipeline']['mode'] == mode
+    assert result['total_detections'] > 0
+    redaction = result['redaction_result']
+    assert redaction['success'] and redaction['total_redactions'] > 0
+    assert redaction['verification']['clean']
+    # Redacted pages are rasterized: no text survives, and the email's pixels are black
+    assert EMAIL not in output_text(output)
+    with fitz.open(source) as original, fitz.open(output) as redacted:
+        email = original[0].search_for(EMAIL)[0]
+        pixels = redacted[0].get_pixmap(clip=email + (1, 1, -1, -1), alpha=False).samples
+    assert not pixels.strip(b"\x00")
+
+
+def multi_page_document(path: str) -> str:
+    """Pages with different values, so pages overlapping in the pipeline cannot be confused"""
+    doc = fitz.open()
+    for number, (name, phone) in enumerate([("jane.doe", "+91 98765 43210"), ("raj.kumar", "+91 91234 56789"),
+                                            ("li.wei", "+91 99887 76655")]):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Application form, page {number + 1}", fontsize=12)
+        page.insert_text((72, 100), f"Email: {name}@example.com", fontsize=12)
+        page.insert_text((72, 128), f"Phone: {phone}", fontsize=12)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def page_rasters(path: str):
+    with fitz.open(path) as doc:
+        return [page.get_pixmap(alpha=False).samples for page in doc]
+
+
+@pytest.mark.parametrize("mode", ["staged", "async"])
+def test_mode_matches_serial_output(offline, tmp_path, mode):
+    source = multi_page_document(str(tmp_path / "forms.pdf"))
+    serial_output = str(tmp_path / "serial.pdf")
+    output = str(tmp_path / f"{mode}.pdf")
+
+    expected = run(PIIProcessorService(), "serial", source, serial_output)
+    result = run(PIIProcessorService(), mode, source, output)
+
+    assert expected['success'] and result['success'], result.get('error')
+    assert expected['total_detections'] >= 6
+    for key in ('total_detections', 'text_detections', 'image_detections'):
+        assert result[key] == expected[key]
+    assert result['redaction_result']['total_redactions'] == expected['redaction_result']['total_redactions']
+    assert page_rasters(output) == page_rasters(serial_output)
+
+
+def test_scanned_page_is_ocrd_and_redacted_from_one_raster(offline, tmp_path):
+    text_source = text_document(str(tmp_path / "form.pdf"))
+    source = scanned_document(str(tmp_path / "scan.pdf"), text_source)
+    output = str(tmp_path / "redacted.pdf")
+    with fitz.open(text_source) as original:
+        words = [WordBox(*word[:5]) for word in original[0].get_text("words")]
+        text = original[0].get_text()
+        email = original[0].search_for(EMAIL)[0]
+    ocr_inputs = []
+
+    def ocr_image(self, img, scale=None):
+        # Tesseract stand-in: reads back the text the scan was made from
+        ocr_inputs.append(img.size)
+        return words, text
+
+    offline.setattr(OCRService, 'ocr_image', ocr_image)
+    result = run(PIIProcessorService(), "staged", source, output)
+
+    assert result['success'], result.get('error')
+    assert ocr_inputs, "the page was not OCR'd"
+    assert result['total_detections'] > 0
+    # OCR rendered the page once; redaction drew on that same raster
+    assert result['stats']['raster_cache_hits'] >= 1
+    with fitz.open(output) as redacted:
+        pixels = redacted[0].get_pixmap(clip=email + (1, 1, -1, -1), alpha=False).samples
+    assert not pixels.strip(b"\x00")
+
+
+def test_page_over_the_pixel_budget_is_rendered_in_tiles(offline, tmp_path):
+    # An A4 page at the default scale is about 2 million pixels
+    offline.setattr(settings, 'RENDER_MAX_PIXELS', 300_000)
+    source = text_document(str(tmp_path / "form.pdf"))
+    output = str(tmp_path / "redacted.pdf")
+
+    result = run(PIIProcessorService(), "serial", source, output)
+
+    assert result['success'], result.get('error')
+    assert result['stats']['pages_tiled'] == 1
+    assert result['stats']['peak_page_raster_bytes'] <= 300_000 * 3
+    with fitz.open(source) as original, fitz.open(output) as redacted:
+        email = original[0].search_for(EMAIL)[0]
+        page = redacted[0]
+        assert page.rect == original[0].rect
+        assert len(page.get_images()) > 1
+        # Each tile was redacted in its own raster
+        pixels = page.get_pixmap(clip=email + (1, 1, -1, -1), alpha=False).samples
+    assert not pixels.strip(b"\x00")
+
+
+def repeated_email_document(path: str) -> str:
+    """The email twice on one page: region redaction only scrubs the located occurrence"""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), f"Email: {EMAIL}", fontsize=12)
+    page.insert_text((72, 300), f"Contact {EMAIL} for details", fontsize=12)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_leak_check_flags_a_value_left_in_the_output(offline, tmp_path):
+    offline.setattr(settings, 'REDACTION_RENDER_MODE', 'regions')
+    source = repeated_email_document(str(tmp_path / "letter.pdf"))
+    output = str(tmp_path / "redacted.pdf")
+
+    result = run(PIIProcessorService(), "serial", source, output)
+
+    assert result['success'], result.get('error')
+    assert EMAIL in output_text(output)
+    report = result['redaction_result']['verification']
+    assert not report['clean']
+    assert report['leaked_pages'] == [1]
+    assert {'page': 1, 'category': 'email_addresses', 'count': 1} in report['leaks']
+    # Values themselves are never reported
+    assert EMAIL not in repr(report)
+
+
+def test_leak_check_in_fail_mode_fails_the_job_and_deletes_the_output(offline, tmp_path):
+    offline.setattr(settings, 'REDACTION_RENDER_MODE', 'regions')
+    offline.setattr(settings, 'LEAK_CHECK_MODE', 'fail')
+    source = repeated_email_document(str(tmp_path / "letter.pdf"))
+    output = str(tmp_path / "redacted.pdf")
+
+    result = run(PIIProcessorService(), "serial", source, output)
+
+    assert not result['success']
+    assert "pages [1]" in result['error']
+    assert not os.path.exists(output)
@@ -0,0 +1,73 @@
+"""
+Prompt interpreter: rule decisions and the LLM name check, without the network
+"""
+
+import pytest
+
+from app.core.config import settings
+from app.models.job import DetectionResult
+from app.models.page import PageContext
+from app.services.llm_agent import LLMAgentService
+from app.services.prompt_interpreter import PromptInterpreterService
+
+PAGE_TEXT = "Application No 123\nCandidate Name: RAVINDRA\nCourse: B.Tech"
+
+
+@pytest.fixture
+def agent(monkeypatch, tmp_path):
+    """LLM agent answering YES to every prompt it sends, which are kept in ``agent.prompts``"""
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_MODE', 'replay')
+    monkeypatch.setattr(settings, 'LLM_TRANSPORT_PATH', str(tmp_path / "no_recording.jsonl"))
+    for name in ('VERDICT_STORE_ENABLED', 'LOCAL_CLASSIFIER_ENABLED', 'LLM_VERDICT_LOG_ENABLED'):
+        monkeypatch.setattr(settings, name, False)
+    agent = LLMAgentService()
+    agent.prompts = []
+
+    def call_groq_api(prompt, max_tokens=10):
+        agent.prompts.append(prompt)
+        return "YES"
+
+    monkeypatch.setattr(agent, 'call_groq_api', call_groq_api)
+    return agent
+
+
+def name_detection(text: str, page_text: str, occurrence: int = 0) -> DetectionResult:
+    offset = -1
+    for _ in range(occurrence + 1):
+        offset = page_text.index(text, offset + 1)
+    return DetectionResult(text, 'person_names', offset=offset)
+
+
+def test_name_prompt_carries_the_candidates_page_context(agent):
+    interpreter = PromptInterpreterService(llm_agent=agent)
+    rules = interpreter.compile_redaction_prompt("hide names")
+    page_context = PageContext(page_num=0, full_text=PAGE_TEXT)
+
+    assert interpreter.should_redact_detection(name_detection("RAVINDRA", PAGE_TEXT), rules, page_context)
+
+    [prompt] = agent.prompts
+    assert 'CONTEXT: "Application No 123 Candidate Name: RAVINDRA Course: B.Tech"' in prompt
+
+
+def test_name_context_is_read_at_the_candidates_offset_within_the_token_budget(agent, monkeypatch):
+    monkeypatch.setattr(settings, 'LLM_CONTEXT_TOKEN_BUDGET', 8)
+    interpreter = PromptInterpreterService(llm_agent=agent)
+    rules = interpreter.compile_redaction_prompt("hide names")
+    page_text = "Guardian: RAVINDRA " + "filler " * 200 + "Signed by RAVINDRA on arrival"
+    page_context = PageContext(page_num=0, full_text=page_text)
+
+    interpreter.should_redact_detection(name_detection("RAVINDRA", page_text, occurrence=1), rules, page_context)
+
+    context = agent.prompts[0].split('CONTEXT: "')[1].split('"')[0]
+    assert "Signed by RAVINDRA" in context
+    assert "Guardian" not in context
+    assert len(context.split()) <= 8
+
+
+def test_name_prompt_without_a_page_has_no_context(agent):
+    interpreter = PromptInterpreterService(llm_agent=agent)
+    rules = interpreter.compile_redaction_prompt("hide names")
+
+    interpreter.should_redact_detection(DetectionResult("RAVINDRA", 'person_names'), rules)
+
+    assert "CONTEXT" not in agent.prompts[0]
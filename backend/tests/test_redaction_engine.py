@@ -0,0 +1,78 @@
+"""
+Redaction engine: redacted output pages on the pinned PyMuPDF
+"""
+
+import fitz
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.models.job import DetectionResult
+from app.services.redaction_engine import RedactionEngineService, RENDER_REGIONS
+from app.services.render_pool import RenderPool
+
+EMAIL = "jane.doe@example.com"
+PHOTO_RECT = fitz.Rect(150, 100, 250, 180)
+
+
+@pytest.fixture
+def source():
+    """One page with a line of kept text, an email and a photo"""
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((20, 30), "Application form", fontsize=14)
+    page.insert_text((20, 60), f"Email: {EMAIL}", fontsize=14)
+    photo = np.zeros((80, 100, 3), dtype=np.uint8)
+    photo[:, :, 0] = np.linspace(0, 255, 100, dtype=np.uint8)
+    photo[::8] = 255
+    page.insert_image(PHOTO_RECT, pixmap=fitz.Pixmap(fitz.csRGB, 100, 80, photo.tobytes(), False))
+    yield doc
+    doc.close()
+
+
+def detections(page):
+    email = page.search_for(EMAIL)[0]
+    return [
+        DetectionResult(EMAIL, 'email', list(email)),
+        DetectionResult('photo', 'image_photo', list(PHOTO_RECT))
+    ]
+
+
+def engine(monkeypatch, render_mode: str):
+    monkeypatch.setattr(settings, 'REDACTION_RENDER_MODE', render_mode)
+    return RedactionEngineService(render_pool=RenderPool(processes=0))
+
+
+def test_region_mode_scrubs_text_and_blurs_photo(source, monkeypatch, tmp_path):
+    output = str(tmp_path / "regions.pdf")
+    before = source[0].get_pixmap(clip=PHOTO_RECT, alpha=False).samples
+
+    result = engine(monkeypatch, RENDER_REGIONS).apply_redactions(source, detections(source[0]), output)
+
+    assert result['success'], result
+    assert result['total_redactions'] == 2
+    with fitz.open(output) as redacted:
+        page = redacted[0]
+        text = page.get_text()
+        # Still a vector page: unredacted text stays selectable
+        assert "Application form" in text
+        assert EMAIL not in text and "example" not in text
+        assert page.get_pixmap(clip=PHOTO_RECT, alpha=False).samples != before
+
+
+def test_render_pool_output_matches_in_process(source, monkeypatch, tmp_path):
+    path = str(tmp_path / "source.pdf")
+    source.save(path)
+    in_process_engine = engine(monkeypatch, "page")
+    pool = RenderPool(processes=2)
+    try:
+        with fitz.open(path) as doc:
+            page_detections = detections(doc[0])
+            in_process = in_process_engine.render_page(doc[0], page_detections)
+            pooled = pool.submit(doc[0], page_detections, in_process_engine.scale_factor,
+                                 in_process_engine.image_redaction).result(timeout=60)
+    finally:
+        pool._get_pool().shutdown()
+
+    # Workers return the same encoded bytes, so the output PDF is byte-identical
+    assert pooled == in_process
@@ -0,0 +1,40 @@
+"""
+Verdict store: answers survive a restart, expire and are evicted least recently used first
+"""
+
+from app.services.verdict_store import VerdictStoreService
+
+
+def test_verdict_survives_reopening(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite3")
+    store = VerdictStoreService(path=path)
+    store.put("Jane  Doe", "person_names", "v1", "YES")
+    store.close()
+
+    reopened = VerdictStoreService(path=path)
+    assert reopened.get("jane doe", "person_names", "v1") == "YES"
+    assert reopened.get("jane doe", "person_names", "v2") is None
+    assert reopened.get_stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+    reopened.close()
+
+
+def test_expired_verdict_is_a_miss(tmp_path):
+    store = VerdictStoreService(path=str(tmp_path / "verdicts.sqlite3"), ttl_seconds=-1)
+    store.put("Jane Doe", "person_names", "v1", "YES")
+    assert store.get("Jane Doe", "person_names", "v1") is None
+    store.close()
+
+
+def test_least_recently_used_verdicts_are_evicted(tmp_path):
+    store = VerdictStoreService(path=str(tmp_path / "verdicts.sqlite3"), max_entries=2)
+    store.evict_every = 3
+    store.put("first", "person_names", "v1", "YES")
+    store.put("second", "person_names", "v1", "NO")
+    # A hit makes "first" more recent than "second"; the batched last-use time is written on eviction
+    assert store.get("first", "person_names", "v1") == "YES"
+    store.put("third", "person_names", "v1", "YES")
+
+    assert store.get("second", "person_names", "v1") is None
+    assert store.get("first", "person_names", "v1") == "YES"
+    assert store.get("third", "person_names", "v1") == "YES"
+    store.close()